@@ -0,0 +1,246 @@
+from collections.abc import MutableMapping
+from typing import Any, Iterator
+from src import utils
+
+logger = utils.get_logger()
+
+
+class ParameterValidator:
+    """Validation rules of a single action parameter, parsed once from its schema"""
+    def __init__(self, param_def: dict) -> None:
+        self.__type: str | None = param_def.get('type')
+        self.__item_type: str | None = param_def.get('items', {}).get('type') if isinstance(param_def.get('items'), dict) else None
+        # Values of static enums by their lowercase form. Values of an enum_source are only known once the game is running and are checked when they are resolved
+        self.__enum_values: dict[str, Any] | None = {str(value).lower(): value for value in param_def['enum']} if param_def.get('enum') else None
+        scope: str | None = param_def.get('scope')
+        self.__validates_entities: bool = bool(scope) and (scope.startswith('conversation') or scope.startswith('nearby') or scope.startswith('all_npcs'))
+        self.__include_player: bool = bool(scope) and scope.endswith('_w_player')
+        self.__include_nearby: bool = bool(scope) and (scope.startswith('nearby') or scope.startswith('all_npcs'))
+        self.__nearby_only: bool = bool(scope) and scope.startswith('nearby')
+        self.__resolve_type: str | None = param_def.get('resolve_to_id')
+
+    @property
+    def validates_entities(self) -> bool:
+        """True if the parameter refers to NPCs that need to be checked against the characters"""
+        return self.__validates_entities
+
+    @property
+    def include_player(self) -> bool:
+        return self.__include_player
+
+    @property
+    def include_nearby(self) -> bool:
+        return self.__include_nearby
+
+    @property
+    def nearby_only(self) -> bool:
+        return self.__nearby_only
+
+    @property
+    def resolve_type(self) -> str | None:
+        return self.__resolve_type
+
+    def validate_value(self, value: Any) -> Any:
+        """Checks an argument provided by the LLM against the type and enum of the parameter.
+        Values that are close enough are converted (eg "25" for an integer), as LLMs do not always stick to the schema
+
+        Args:
+            value: The argument value provided by the LLM
+
+        Raises:
+            ValueError: If the value does not fit the parameter
+
+        Returns:
+            The value converted to the type of the parameter
+        """
+        if self.__validates_entities:
+            # NPC names are accepted as a single name or a list of names whatever the declared type, as the entity validation keeps the type the LLM used
+            if isinstance(value, list):
+                value = [ParameterValidator.__convert(item, 'string') for item in value]
+            else:
+                value = ParameterValidator.__convert(value, 'string')
+            values = value if isinstance(value, list) else [value]
+        elif self.__type == 'array':
+            if isinstance(value, list):
+                value = [ParameterValidator.__convert(item, self.__item_type) for item in value]
+            else: # a single item is accepted in place of a list
+                value = ParameterValidator.__convert(value, self.__item_type)
+            values = value if isinstance(value, list) else [value]
+        else:
+            value = ParameterValidator.__convert(value, self.__type)
+            values = [value]
+
+        if self.__enum_values is not None:
+            canonical_values = []
+            for item in values:
+                canonical_value = self.__enum_values.get(str(item).lower())
+                if canonical_value is None:
+                    raise ValueError(f"'{item}' is not one of {list(self.__enum_values.values())}")
+                canonical_values.append(canonical_value)
+            value = canonical_values if isinstance(value, list) else canonical_values[0]
+        return value
+
+    @staticmethod
+    def __convert(value: Any, value_type: str | None) -> Any:
+        if value_type == 'string':
+            if isinstance(value, str):
+                return value
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+        elif value_type == 'integer':
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if isinstance(value, str):
+                try:
+                    return ParameterValidator.__convert(float(value.strip()), value_type)
+                except ValueError:
+                    pass
+        elif value_type == 'number':
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return value
+            if isinstance(value, str):
+                try:
+                    return float(value.strip())
+                except ValueError:
+                    pass
+        elif value_type == 'boolean':
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+                return value.strip().lower() == 'true'
+        else: # untyped parameters accept any value
+            return value
+        raise ValueError(f"{value!r} is not a valid {value_type}")
+
+
+class ActionValidator:
+    """Argument validation rules of an action, parsed once from its parameter schema"""
+    def __init__(self, action: dict) -> None:
+        self.__parameters: dict[str, ParameterValidator] = {name: ParameterValidator(param_def) for name, param_def in action.get('parameters', {}).items()}
+        self.__required: frozenset[str] = frozenset(action.get('required', []))
+
+    def get_parameter(self, param_name: str) -> ParameterValidator | None:
+        return self.__parameters.get(param_name)
+
+    def validate_arguments(self, arguments: dict, action_identifier: str) -> dict | None:
+        """Validate that LLM-provided arguments match the action's parameter schema
+
+        Args:
+            arguments: Arguments provided by the LLM
+            action_identifier: Identifier of the action (for logger)
+
+        Returns:
+            Dictionary containing only the arguments that are defined by the action and fit their parameter, converted to the parameter's type,
+            or None if a required argument does not fit its parameter (the action should be skipped)
+        """
+        validated_args = {}
+        for arg_name, arg_value in arguments.items():
+            parameter = self.__parameters.get(arg_name)
+            if not parameter:
+                # LLM hallucinated a parameter that doesn't exist in the schema
+                logger.warning(
+                    f"LLM provided unknown argument '{arg_name}' for action '{action_identifier}'. "
+                    f"Valid parameters are: {list(self.__parameters.keys())}. Ignoring this argument."
+                )
+                continue
+            try:
+                validated_args[arg_name] = parameter.validate_value(arg_value)
+            except ValueError as e:
+                if arg_name in self.__required:
+                    logger.warning(f"Skipping action '{action_identifier}' - invalid value for required argument '{arg_name}': {e}")
+                    return None
+                logger.warning(f"LLM provided an invalid value for argument '{arg_name}' of action '{action_identifier}': {e}. Ignoring this argument.")
+        return validated_args
+
+
+class ActionRegistry(MutableMapping[str, dict]):
+    """Loaded actions by identifier, with indexes to look them up by function name and keyword and the argument validator of each action
+
+    The indexes and validators are updated whenever an action is added or removed,
+    so that tool calls can be matched to their action without scanning all loaded actions
+    """
+    def __init__(self) -> None:
+        self.__actions: dict[str, dict] = {}
+        self.__identifiers_by_name: dict[str, str] = {}
+        self.__identifiers_by_keyword: dict[str, str] = {}
+        self.__validators: dict[str, ActionValidator] = {}
+
+    def __getitem__(self, identifier: str) -> dict:
+        return self.__actions[identifier]
+
+    def __setitem__(self, identifier: str, action: dict) -> None:
+        if identifier in self.__actions:
+            self.__remove_from_indexes(identifier)
+        self.__actions[identifier] = action
+        self.__add_to_indexes(identifier, action)
+        self.__validators[identifier] = ActionValidator(action)
+
+    def __delitem__(self, identifier: str) -> None:
+        self.__remove_from_indexes(identifier)
+        del self.__actions[identifier]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__actions)
+
+    def __len__(self) -> int:
+        return len(self.__actions)
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self.__actions
+
+    def clear(self) -> None:
+        self.__actions.clear()
+        self.__identifiers_by_name.clear()
+        self.__identifiers_by_keyword.clear()
+        self.__validators.clear()
+
+    def get_identifier_by_name(self, name: str) -> str | None:
+        """Get the identifier of the action an LLM function name refers to
+
+        Args:
+            name: The function name, which is the 'name' of the action
+
+        Returns:
+            The action identifier, or None if no loaded action has the name
+        """
+        return self.__identifiers_by_name.get(name)
+
+    def get_identifier_by_keyword(self, keyword: str) -> str | None:
+        """Get the identifier of the action with a keyword ('key'), ignoring case
+
+        Args:
+            keyword: The keyword of the action
+
+        Returns:
+            The action identifier, or None if no loaded action has the keyword
+        """
+        return self.__identifiers_by_keyword.get(keyword.lower())
+
+    def get_validator(self, identifier: str) -> ActionValidator:
+        return self.__validators[identifier]
+
+    def __add_to_indexes(self, identifier: str, action: dict) -> None:
+        # If several actions share a name or keyword, the one loaded first is used
+        self.__identifiers_by_name.setdefault(action.get('name'), identifier)
+        keyword = action.get('key')
+        if keyword:
+            self.__identifiers_by_keyword.setdefault(keyword.lower(), identifier)
+
+    def __remove_from_indexes(self, identifier: str) -> None:
+        action = self.__actions[identifier]
+        del self.__validators[identifier]
+        name = action.get('name')
+        keyword = action.get('key')
+        name_indexed = self.__identifiers_by_name.get(name) == identifier
+        keyword_indexed = bool(keyword) and self.__identifiers_by_keyword.get(keyword.lower()) == identifier
+        if name_indexed:
+            del self.__identifiers_by_name[name]
+        if keyword_indexed:
+            del self.__identifiers_by_keyword[keyword.lower()]
+        if name_indexed or keyword_indexed:
+            # Fall back to another loaded action with the same name or keyword
+            for other_identifier, other_action in self.__actions.items():
+                if other_identifier != identifier:
+                    self.__add_to_indexes(other_identifier, other_action)
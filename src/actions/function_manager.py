@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from copy import deepcopy
 from openai.types.chat import ChatCompletionMessageToolCall
+from src.actions.action_registry import ActionRegistry
 from src.characters_manager import Characters
 from src.conversation.action import Action
 from src.games.gameable import Gameable
@@ -11,9 +12,10 @@ logger = utils.get_logger()
 
 
 class FunctionManager:
-    _actions: dict[str, dict] = {}  # Map identifier -> action data
-    _last_tool_calls: list[dict] = []  # Cache of last turn's parsed tool calls for duplicate filtering
+    _actions: ActionRegistry = ActionRegistry()  # Map identifier -> action data, indexed by name and keyword
+    _last_tool_call_keys: set[str] = set()  # Keys of the last turn's parsed tool calls for constant time duplicate checks
     _disabled_action_names: list[str] = []  # Track disabled actions for logger
+    _tools_cache: dict[str, tuple[dict, tuple, dict | None]] = {}  # Map identifier -> (action data, inputs fingerprint, generated tool)
 
     @staticmethod
     def parse_function_calls(tools_called: list[ChatCompletionMessageToolCall], characters: Characters = None, game: Gameable | None = None) -> list[dict]:
@@ -28,16 +30,14 @@ class FunctionManager:
             List of parsed function call information with validated parameters
         """
         parsed_tools = []
+        # Valid NPC names by scope, shared by all tool calls of this turn
+        npc_name_lookups: dict[tuple[bool, bool, bool], dict[str, str]] = {}
         
         if tools_called:
             for tool_call in tools_called:
                 try:
                     # Find the action identifier from the function name
-                    identifier = None
-                    for action_id, action_data in FunctionManager._actions.items():
-                        if action_data['name'] == tool_call['function']['name']:
-                            identifier = action_id
-                            break
+                    identifier = FunctionManager._actions.get_identifier_by_name(tool_call['function']['name'])
                     
                     if not identifier:
                         break  # Unknown function, skip
@@ -55,55 +55,57 @@ class FunctionManager:
 
                     # Get the action definition to validate against
                     action_def = FunctionManager._actions[identifier]
-                    defined_params = action_def.get('parameters', {})
+                    validator = FunctionManager._actions.get_validator(identifier)
                     
-                    # Validate that arguments match the schema
-                    validated_args = FunctionManager._validate_arguments_against_schema(parsed_arguments, defined_params, identifier)
+                    # Validate that arguments match the schema. None means a required argument is invalid and the action is skipped
+                    validated_args = validator.validate_arguments(parsed_arguments, identifier)
                     
                     # Validate entity names and resolve IDs based on parameter definitions
                     if validated_args:
                         for param_name, param_value in list(validated_args.items()):
-                            param_def = defined_params.get(param_name, {})
-                            scope: str | None = param_def.get('scope')
-                            resolve_type: str | None = param_def.get('resolve_to_id')
+                            param_validator = validator.get_parameter(param_name)
+                            resolve_type: str | None = param_validator.resolve_type
                             
                             # Validate parameters with scopes (NPC names, etc.)
-                            if scope and characters:
+                            if param_validator.validates_entities and characters:
                                 # Ensure the value is a list for easier validation
                                 entity_names = param_value if isinstance(param_value, list) else [param_value]
 
-                                if scope.startswith('conversation') or scope.startswith('nearby') or scope.startswith('all_npcs'):
-                                    # Determine validation flags based on scope
-                                    include_player = scope.endswith('_w_player')
-                                    include_nearby = scope.startswith('nearby') or scope.startswith('all_npcs')
-                                    nearby_only = scope.startswith('nearby')
-                                    
-                                    # Validate the NPC names
-                                    validated_entities = FunctionManager._validate_npc_names(
-                                        entity_names, 
-                                        characters, 
-                                        exclude_player=not include_player,
-                                        include_nearby=include_nearby,
-                                        nearby_only=nearby_only
-                                    )
-                                    
-                                    # Update the validated args with the validated list
-                                    # Preserve the original type (string or list)
-                                    if isinstance(param_value, list):
-                                        if validated_entities:
-                                            validated_args[param_name] = validated_entities
-                                        else:
-                                            logger.warning(f"Skipping action '{identifier}' - no valid entities for parameter '{param_name}'")
-                                            validated_args = None
-                                            break
+                                # Validation flags were determined from the scope when the action was loaded
+                                include_player = param_validator.include_player
+                                include_nearby = param_validator.include_nearby
+                                nearby_only = param_validator.nearby_only
+                                lookup_key = (include_player, include_nearby, nearby_only)
+                                if lookup_key not in npc_name_lookups:
+                                    npc_name_lookups[lookup_key] = FunctionManager._get_valid_npc_name_lookup(characters, not include_player, include_nearby, nearby_only)
+                                
+                                # Validate the NPC names
+                                validated_entities = FunctionManager._validate_npc_names(
+                                    entity_names, 
+                                    characters, 
+                                    exclude_player=not include_player,
+                                    include_nearby=include_nearby,
+                                    nearby_only=nearby_only,
+                                    valid_name_lookup=npc_name_lookups[lookup_key]
+                                )
+                                
+                                # Update the validated args with the validated list
+                                # Preserve the original type (string or list)
+                                if isinstance(param_value, list):
+                                    if validated_entities:
+                                        validated_args[param_name] = validated_entities
                                     else:
-                                        if validated_entities:
-                                            validated_args[param_name] = validated_entities[0]
-                                        else:
-                                            logger.warning(f"Skipping action '{identifier}' - no valid entities for parameter '{param_name}'")
-                                            validated_args = None
-                                            break
-                            
+                                        logger.warning(f"Skipping action '{identifier}' - no valid entities for parameter '{param_name}'")
+                                        validated_args = None
+                                        break
+                                else:
+                                    if validated_entities:
+                                        validated_args[param_name] = validated_entities[0]
+                                    else:
+                                        logger.warning(f"Skipping action '{identifier}' - no valid entities for parameter '{param_name}'")
+                                        validated_args = None
+                                        break
+                        
                             # Resolve parameters to game IDs (eg idle names to FormIDs, NPC names to ref_ids)
                             if resolve_type and game and validated_args:
                                 resolved_value = FunctionManager._resolve_parameter_to_id(param_value, resolve_type, game)
@@ -145,7 +147,7 @@ class FunctionManager:
         
         # Update cache with this turn's tool calls
         if len(parsed_tools) > 0:
-            FunctionManager._last_tool_calls = parsed_tools
+            FunctionManager._last_tool_call_keys = {FunctionManager._get_tool_call_key(parsed_tool) for parsed_tool in parsed_tools}
         
         return parsed_tools
 
@@ -165,8 +167,9 @@ class FunctionManager:
             return
 
         FunctionManager._actions.clear()
-        FunctionManager._last_tool_calls = []
+        FunctionManager._last_tool_call_keys = set()
         FunctionManager._disabled_action_names = []
+        FunctionManager._tools_cache.clear()
 
         disabled_set = set(n.lower() for n in disabled_actions) if disabled_actions is not None else set()
 
@@ -281,23 +284,31 @@ class FunctionManager:
     def generate_context_aware_tools(context, game: Gameable = None) -> list[dict]:
         """Generate OpenAI tools based on current conversation context
         
+        The tool generated for each action is cached together with the entity listings and enum values it was built from,
+        and reused as long as they stay the same. This keeps the serialized tools identical between turns,
+        so that provider-side prompt caches keep hitting
+        
         Args:
             context: The conversation context
             game: The Gameable instance for game-specific operations (e.g., idle lookups)
         """
         tools = []
         
+        base_game_name = context.config.game.base_game.display_name.lower().replace(" ", "")
+        is_multi_npc = context.npcs_in_conversation.contains_multiple_npcs()
+        is_radiant = is_multi_npc and not context.npcs_in_conversation.contains_player_character()
+        # Entity listings and enum values are shared by many actions, so they are only looked up once per call
+        scope_entities: dict[str, str] = {}
+        enum_values: dict[str, tuple[str, ...]] = {}
+        
         for action in FunctionManager._actions.values():
             # Filter by game compatibility
             if 'allowed_games' in action and action['allowed_games']:
-                base_game_name = context.config.game.base_game.display_name.lower().replace(" ", "")
                 cleaned_allowed_games = [g.lower().replace(" ", "") for g in action['allowed_games']]
                 if base_game_name not in cleaned_allowed_games:
                     continue
 
             # Filter by conversation type
-            is_multi_npc = context.npcs_in_conversation.contains_multiple_npcs()
-            is_radiant = is_multi_npc and not context.npcs_in_conversation.contains_player_character()
             if is_radiant:
                 if not action.get('radiant', False):
                     continue
@@ -308,36 +319,74 @@ class FunctionManager:
                 if not action.get('one_on_one', action.get('one-on-one', False)):
                     continue
 
-            # Create OpenAI tool definition
-            tool = {
-                'type': 'function',
-                'function': {
-                    'name': action['name'],
-                    'description': action['description']
-                }
-            }
+            # Fingerprint everything the tool definition depends on besides the action itself
+            fingerprint = []
+            for param_def in action.get('parameters', {}).values():
+                scope = param_def.get('scope')
+                if scope:
+                    if scope not in scope_entities:
+                        scope_entities[scope] = FunctionManager._get_entities_for_scope(scope, context)
+                    fingerprint.append(scope_entities[scope])
+                enum_source = param_def.get('enum_source')
+                if enum_source:
+                    if enum_source not in enum_values:
+                        enum_values[enum_source] = tuple(FunctionManager._get_enum_values_for_source(enum_source, game))
+                    fingerprint.append(enum_values[enum_source])
+            fingerprint = tuple(fingerprint)
+
+            cached = FunctionManager._tools_cache.get(action['identifier'])
+            if cached and cached[0] is action and cached[1] == fingerprint:
+                tool = cached[2]
+            else:
+                tool = FunctionManager._build_tool(action, scope_entities, enum_values)
+                FunctionManager._tools_cache[action['identifier']] = (action, fingerprint, tool)
+
+            if tool:
+                tools.append(tool)
+
+        return tools
 
+
+    @staticmethod
+    def _build_tool(action: dict, scope_entities: dict[str, str], enum_values: dict[str, tuple[str, ...]]) -> dict | None:
+        """Build the OpenAI tool definition of an action
+        
+        Args:
+            action: The action data
+            scope_entities: The entity listing of each parameter scope of the action
+            enum_values: The values of each enum_source of the action
             
-            tool['function']['parameters'] = {}
-            tool['function']['parameters']['type'] = 'object'
-            tool['function']['parameters']['properties'] = {}
-            # Only populate parameters if they exist
-            if 'parameters' in action:
-                tool['function']['parameters']['properties'] = deepcopy(action['parameters'])
-                if 'required' in action:
-                    tool['function']['parameters']['required'] = action['required']
-                
-                # Populate dynamic enums and clean internal fields
-                if not FunctionManager._populate_dynamic_enums(tool['function']['parameters'], game, action['identifier']):
-                    continue
-                
-                # Add context-aware entity listings, skipping tools when no scoped params have available entities
-                if not FunctionManager._add_npc_context_to_parameters(tool['function']['parameters'], context):
-                    continue
+        Returns:
+            The tool definition, or None if the action should not be offered in this context
+        """
+        # Create OpenAI tool definition
+        tool = {
+            'type': 'function',
+            'function': {
+                'name': action['name'],
+                'description': action['description']
+            }
+        }
 
-            tools.append(tool)
+        
+        tool['function']['parameters'] = {}
+        tool['function']['parameters']['type'] = 'object'
+        tool['function']['parameters']['properties'] = {}
+        # Only populate parameters if they exist
+        if 'parameters' in action:
+            tool['function']['parameters']['properties'] = deepcopy(action['parameters'])
+            if 'required' in action:
+                tool['function']['parameters']['required'] = action['required']
+            
+            # Populate dynamic enums and clean internal fields
+            if not FunctionManager._populate_dynamic_enums(tool['function']['parameters'], enum_values, action['identifier']):
+                return None
+            
+            # Add context-aware entity listings, skipping tools when no scoped params have available entities
+            if not FunctionManager._add_npc_context_to_parameters(tool['function']['parameters'], scope_entities):
+                return None
 
-        return tools
+        return tool
 
 
     @staticmethod
@@ -378,11 +427,28 @@ class FunctionManager:
         if action_def.get('allow_repeat', False):
             return False
         
-        for last_call in FunctionManager._last_tool_calls:
-            if (parsed_tool.get('identifier') == last_call.get('identifier') and
-                parsed_tool.get('arguments', {}) == last_call.get('arguments', {})):
-                return True
-        return False
+        return FunctionManager._get_tool_call_key(parsed_tool) in FunctionManager._last_tool_call_keys
+
+    @staticmethod
+    def _get_tool_call_key(parsed_tool: dict) -> str:
+        """Get a hashable key of a parsed tool call, equal for calls of the same action with the same arguments"""
+        return json.dumps([parsed_tool.get('identifier'), parsed_tool.get('arguments', {})], sort_keys=True, default=str)
+
+    @staticmethod
+    def contains_action(tool_calls: list[dict], identifier: str) -> bool:
+        """Check if any of the tool calls returned by the LLM calls the given action
+
+        Args:
+            tool_calls: Tool calls in the format returned by the LLM
+            identifier: The action identifier
+
+        Returns:
+            True if the action is loaded and one of the tool calls calls it
+        """
+        action = FunctionManager._actions.get(identifier)
+        if not action:
+            return False
+        return any(tool_call.get('function', {}).get('name') == action.get('name') for tool_call in tool_calls)
 
     @staticmethod
     def is_vision_action_active() -> bool:
@@ -432,36 +498,7 @@ class FunctionManager:
 
 
     @staticmethod
-    def _validate_arguments_against_schema(llm_arguments: dict, defined_params: dict, action_identifier: str) -> dict:
-        """Validate that LLM-provided arguments match the action's parameter schema
-        
-        Args:
-            llm_arguments: Arguments provided by the LLM
-            defined_params: Parameter schema from the action JSON config
-            action_identifier: Identifier of the action (for logger)
-            
-        Returns:
-            Dictionary containing only valid arguments that match the schema
-        """
-        validated_args = {}
-        
-        # Check each LLM-provided argument against the schema
-        for arg_name, arg_value in llm_arguments.items():
-            if arg_name in defined_params:
-                # Argument is valid according to schema
-                validated_args[arg_name] = arg_value
-            else:
-                # LLM hallucinated a parameter that doesn't exist in the schema
-                logger.warning(
-                    f"LLM provided unknown argument '{arg_name}' for action '{action_identifier}'. "
-                    f"Valid parameters are: {list(defined_params.keys())}. Ignoring this argument."
-                )
-        
-        return validated_args
-
-
-    @staticmethod
-    def _validate_npc_names(npc_names: list[str], characters: Characters, exclude_player: bool = True, include_nearby: bool = False, nearby_only: bool = False) -> list[str]:
+    def _validate_npc_names(npc_names: list[str], characters: Characters, exclude_player: bool = True, include_nearby: bool = False, nearby_only: bool = False, valid_name_lookup: dict[str, str] | None = None) -> list[str]:
         """Validate that NPC names exist based on scope
         
         Args:
@@ -470,6 +507,7 @@ class FunctionManager:
             exclude_player: If True, filter out player character (default: True)
             include_nearby: If True, validate against conversation + nearby NPCs (default: False)
             nearby_only: If True, only allow nearby NPC names (default: False)
+            valid_name_lookup: The lookup returned by _get_valid_npc_name_lookup for the same scope, if already built (optional)
             
         Returns:
             List of valid, unique NPC names
@@ -480,15 +518,10 @@ class FunctionManager:
         # Get the actual player name for "player" alias resolution
         actual_player_name = characters.get_player_name()
         
-        # Get all valid names based on scope
-        valid_name_list = characters.get_all_names_w_nearby(
-            include_player = not exclude_player,
-            include_nearby = include_nearby,
-            nearby_only = nearby_only
-        )
-        
-        # Build case-insensitive lookup: lowercase -> actual name
-        char_names_lower = {name.lower(): name for name in valid_name_list}
+        # Case-insensitive lookup: lowercase -> actual name
+        if valid_name_lookup is None:
+            valid_name_lookup = FunctionManager._get_valid_npc_name_lookup(characters, exclude_player, include_nearby, nearby_only)
+        char_names_lower = valid_name_lookup
         
         valid_names = []
         seen_lower = set()
@@ -522,7 +555,28 @@ class FunctionManager:
 
 
     @staticmethod
-    def _populate_dynamic_enums(parameters: dict, game: Gameable, action_identifier: str) -> bool:
+    def _get_valid_npc_name_lookup(characters: Characters, exclude_player: bool, include_nearby: bool, nearby_only: bool) -> dict[str, str]:
+        """Build a case-insensitive lookup of the NPC names that are valid for a scope
+        
+        Args:
+            characters: Characters manager containing character and nearby NPC information
+            exclude_player: If True, filter out player character
+            include_nearby: If True, include nearby NPCs
+            nearby_only: If True, only include nearby NPCs
+            
+        Returns:
+            Map of lowercase name -> actual name
+        """
+        valid_name_list = characters.get_all_names_w_nearby(
+            include_player = not exclude_player,
+            include_nearby = include_nearby,
+            nearby_only = nearby_only
+        )
+        return {name.lower(): name for name in valid_name_list}
+
+
+    @staticmethod
+    def _populate_dynamic_enums(parameters: dict, enum_values: dict[str, tuple[str, ...]], action_identifier: str) -> bool:
         """Populate dynamic enum values and clean internal fields from parameter schema
         
         Returns True when the tool should remain available,
@@ -530,7 +584,7 @@ class FunctionManager:
         
         Args:
             parameters: The 'parameters' dict from the tool schema
-            game: The Gameable instance for game-specific lookups
+            enum_values: The values of each enum_source, as looked up by _get_enum_values_for_source
             action_identifier: Action name for logger purposes
         """
         if 'properties' not in parameters:
@@ -539,9 +593,9 @@ class FunctionManager:
         for param_name, param_def in parameters['properties'].items():
             enum_source = param_def.get('enum_source')
             if enum_source:
-                enum_values = FunctionManager._get_enum_values_for_source(enum_source, game)
-                if enum_values:
-                    param_def['enum'] = enum_values
+                source_values = enum_values.get(enum_source)
+                if source_values:
+                    param_def['enum'] = list(source_values)
                 else:
                     logger.warning(f"Skipping action '{action_identifier}' - no enum values for source '{enum_source}'")
                     return False
@@ -556,7 +610,7 @@ class FunctionManager:
 
 
     @staticmethod
-    def _add_npc_context_to_parameters(parameters: dict, context) -> bool:
+    def _add_npc_context_to_parameters(parameters: dict, scope_entities: dict[str, str]) -> bool:
         """Add available NPC context to parameters based on their scope
         
         This function enhances parameter descriptions with lists of available entities
@@ -571,6 +625,10 @@ class FunctionManager:
         - 'nearby_w_player': Nearby NPCs not in conversation (includes player)
         - 'all_npcs': Conversation NPCs + nearby NPCs (excludes player)
         - 'all_npcs_w_player': Everyone (conversation + nearby, includes player)
+
+        Args:
+            parameters: The 'parameters' dict from the tool schema
+            scope_entities: The entity listing of each scope, as looked up by _get_entities_for_scope
         """
         if 'properties' not in parameters:
             return True
@@ -590,8 +648,7 @@ class FunctionManager:
             
             current_desc = param_def.get('description', '')
             
-            # Parse scope to get entity list
-            entity_list = FunctionManager._get_entities_for_scope(scope, context)
+            entity_list = scope_entities.get(scope, '')
             
             # Append entity list to parameter description for LLM context
             if entity_list:
@@ -219,6 +219,7 @@ class ConfigLoader:
             self.fast_response_mode_volume = self.__definitions.get_int_value("fast_response_mode_volume")
             self.streamed_fast_response = self.__definitions.get_bool_value("streamed_fast_response")
             self.allow_per_character_tts_overrides: bool = self.__definitions.get_bool_value("allow_per_character_tts_overrides")
+            self.voiceline_cache_size: int = self.__definitions.get_int_value("voiceline_cache_size")
 
             #Added from xTTS implementation
             self.xtts_default_model = self.__definitions.get_string_value("xtts_default_model")
@@ -278,6 +279,9 @@ class ConfigLoader:
             # if self.llm_api == "Custom":
             #     self.llm_api = self.__definitions.get_string_value("llm_custom_service_url")
             self.custom_token_count = self.__definitions.get_int_value("custom_token_count")
+            self.llm_max_connections: int = self.__definitions.get_int_value("llm_max_connections")
+            self.llm_max_keepalive_connections: int = self.__definitions.get_int_value("llm_max_keepalive_connections")
+            self.llm_keepalive_expiry: float = self.__definitions.get_float_value("llm_keepalive_expiry")
             try:
                 self.llm_params: dict[str, Any] | None = json.loads(self.__definitions.get_string_value("llm_params").replace('\n', ''))
             except Exception as e:
@@ -373,6 +377,7 @@ LLM parameter list must be valid JSON""")
             self.save_screenshot = self.__definitions.get_bool_value('save_screenshot')
             self.image_quality = self.__definitions.get_int_value("image_quality")
             self.resize_method = self.__definitions.get_string_value("resize_method")
+            self.similar_frame_threshold = self.__definitions.get_int_value("similar_frame_threshold")
             self.capture_offset = json.loads(self.__definitions.get_string_value("capture_offset"))
             self.use_game_screenshots = self.__definitions.get_bool_value("use_game_screenshots")
 
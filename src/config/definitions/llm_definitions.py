@@ -87,6 +87,24 @@ class LLMDefinitions:
                         If you are noticing that some voicelines are not being said in-game, try increasing this buffer."""
         return ConfigValueFloat("wait_time_buffer","Wait Time Buffer",description, 0, -999, 999,tags=[ConfigValueTag.advanced,ConfigValueTag.share_row])
     
+    @staticmethod
+    def get_llm_max_connections_config_value() -> ConfigValue:
+        description = """The maximum number of connections kept open to an LLM service at the same time.
+                        Mantella sends at most a few requests at once (eg the response, tool calls, vision and summaries), so this rarely needs to be changed."""
+        return ConfigValueInt("llm_max_connections","Max Connections",description, 10, 1, 100, tags=[ConfigValueTag.advanced,ConfigValueTag.share_row])
+
+    @staticmethod
+    def get_llm_max_keepalive_connections_config_value() -> ConfigValue:
+        description = """The maximum number of idle connections to an LLM service that are kept open to be reused by the next request.
+                        Reusing a connection saves the connection setup (eg the TLS handshake) at the start of each response."""
+        return ConfigValueInt("llm_max_keepalive_connections","Max Idle Connections",description, 5, 0, 100, tags=[ConfigValueTag.advanced,ConfigValueTag.share_row])
+
+    @staticmethod
+    def get_llm_keepalive_expiry_config_value() -> ConfigValue:
+        description = """Time (in seconds) an idle connection to an LLM service is kept open to be reused.
+                        Connections idle for longer are likely to have been closed by the service anyway."""
+        return ConfigValueFloat("llm_keepalive_expiry","Idle Connection Expiry",description, 60, 0, 3600, tags=[ConfigValueTag.advanced,ConfigValueTag.share_row])
+    
     @staticmethod
     def get_llm_params_config_value() -> ConfigValue:
         value = """{
@@ -106,6 +106,13 @@ If you have trouble installing the xVASynth version from Nexus, try installing i
             To use this feature, add a 'tts_service' value under the appropriate column in the characters CSV file.
             Characters without this column will fall back to the global TTS settings."""
         return ConfigValueBool("allow_per_character_tts_overrides", "Per-Character TTS Overrides", description, False, tags=[ConfigValueTag.advanced])
+
+    @staticmethod
+    def get_voiceline_cache_size_config_value() -> ConfigValue:
+        description = """The maximum disk space (in MB) used to keep synthesized voicelines so that repeated lines (eg goodbyes and greetings) do not need to be synthesized again.
+                        When the limit is reached, the least recently used voicelines are removed.
+                        Set to 0 to disable the cache."""
+        return ConfigValueInt("voiceline_cache_size", "Voiceline Cache Size", description, 200, 0, 100000, tags=[ConfigValueTag.advanced])
     
     # XTTS Section
 
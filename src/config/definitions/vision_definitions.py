@@ -33,6 +33,13 @@ class VisionDefinitions:
         description = "The image scaling algorithm used to resize in-game screenshots to match the target resolution. Algorithms are sorted from fastest / lowest quality (Nearest) to slowest / highest quality (Lanczos)."
         return ConfigValueSelection("resize_method", "Resize Method", description, "Nearest", ["Nearest", "Linear", "Cubic", "Lanczos"], tags=[ConfigValueTag.advanced,ConfigValueTag.share_row])
     
+    @staticmethod
+    def get_similar_frame_threshold_config_value() -> ConfigValue:
+        description = """How similar a screenshot needs to be to the previous one to be treated as the same scene, from 0-64. Higher values treat more different screenshots as the same.
+                        If the scene has not changed, the previous screenshot (and its description, if using a custom vision model) is reused instead of being processed again.
+                        Set to 0 to always process a new screenshot."""
+        return ConfigValueInt("similar_frame_threshold", "Similar Frame Threshold", description, 5, 0, 64, tags=[ConfigValueTag.advanced])
+
     @staticmethod
     def get_capture_offset_config_value() -> ConfigValue:
         value = '{"left": 0, "right": 0, "top": 0, "bottom": 0}'
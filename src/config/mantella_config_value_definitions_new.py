@@ -47,6 +47,9 @@ class MantellaConfigValueDefinitionsNew:
         llm_category.add_config_value(LLMDefinitions.get_custom_token_count_config_value())
         #llm_category.add_config_value(LLMDefinitions.get_llm_custom_service_url_config_value())
         llm_category.add_config_value(LLMDefinitions.get_wait_time_buffer_config_value())
+        llm_category.add_config_value(LLMDefinitions.get_llm_max_connections_config_value())
+        llm_category.add_config_value(LLMDefinitions.get_llm_max_keepalive_connections_config_value())
+        llm_category.add_config_value(LLMDefinitions.get_llm_keepalive_expiry_config_value())
         # llm_category.add_config_value(LLMDefinitions.get_try_filter_narration())
         llm_category.add_config_value(LLMDefinitions.get_llm_params_config_value())
         # llm_category.add_config_value(LLMDefinitions.get_stop_llm_generation_on_assist_keyword())
@@ -81,6 +84,7 @@ class MantellaConfigValueDefinitionsNew:
         tts_category.add_config_value(TTSDefinitions.get_fast_response_mode_volume_config_value())
         tts_category.add_config_value(TTSDefinitions.get_streamed_fast_response_config_value())
         tts_category.add_config_value(TTSDefinitions.get_allow_per_character_tts_overrides_config_value())
+        tts_category.add_config_value(TTSDefinitions.get_voiceline_cache_size_config_value())
         tts_category.add_config_value(TTSDefinitions.get_xtts_url_config_value())
         tts_category.add_config_value(TTSDefinitions.get_xtts_default_model_config_value())
         tts_category.add_config_value(TTSDefinitions.get_xtts_device_config_value())
@@ -130,6 +134,7 @@ class MantellaConfigValueDefinitionsNew:
         vision_category.add_config_value(VisionDefinitions.get_save_screenshot_config_value())
         vision_category.add_config_value(VisionDefinitions.get_image_quality_config_value())
         vision_category.add_config_value(VisionDefinitions.get_resize_method_config_value())
+        vision_category.add_config_value(VisionDefinitions.get_similar_frame_threshold_config_value())
         vision_category.add_config_value(VisionDefinitions.get_capture_offset_config_value())
         vision_category.add_config_value(VisionDefinitions.get_custom_vision_model_config_value())
         vision_category.add_config_value(VisionDefinitions.get_vision_llm_api_config_value())
@@ -297,6 +297,8 @@ class Conversation:
             new_message: UserMessage = UserMessage(self.__context.config, player_text, player_character.name, False)
             new_message.is_multi_npc_message = self.__context.npcs_in_conversation.contains_multiple_npcs()
             new_message = self.update_game_events(new_message)
+            # Capture the image of the game while the player's voiceline and the NPC response are prepared
+            self.__llm_client.prefetch_vision(new_message.get_ingame_events_text())
             self.__messages.add_message(new_message)
             player_voiceline = self.__get_player_voiceline(player_character, player_text)
             text = new_message.text
@@ -1,14 +1,28 @@
 import json
 import os
-from pathlib import Path
-import sys
+from threading import Lock
 import src.utils as utils
 from src.character_manager import Character
 from openai.types.chat import ChatCompletionMessageParam
 
+logger = utils.get_logger()
+
 
 class conversation_log:
+    """Stores the conversation history of each NPC.
+
+    Every conversation is appended as a single line to a JSON Lines file in the NPC's conversation folder, so saving does not need to read the existing history.
+    A small index file next to it keeps the number of conversations and messages in the log, so the length of a history can be looked up without parsing it.
+    The lengths are also cached in memory and only looked up again if the modification time or size of the log file has changed.
+    Conversation histories from older versions ({name}.json) are migrated to this format the first time they are accessed.
+    """
     game_path: str = "" # <- This gets set in the __init__ of gameable. Not clean but cleaner than other options
+    LOG_FILE_EXTENSION: str = ".jsonl"
+    LEGACY_LOG_FILE_EXTENSION: str = ".json"
+    INDEX_FILE_SUFFIX: str = "_index.json"
+    __lock: Lock = Lock()
+    # (game_path, world_id, name, ref_id) -> (path to the log file, (mtime, size) of the log file, number of messages)
+    __length_cache: dict[tuple[str, str, str, str], tuple[str, tuple[int, int] | None, int]] = {}
 
     @staticmethod
     @utils.time_it
@@ -16,59 +30,166 @@ class conversation_log:
         # save conversation history
 
         if len(messages) > 0:
-            # if this is not the first conversation
             conversation_history_file = conversation_log.__get_path_to_conversation_history_file(character, world_id)
-            # transformed_messages = messages.transform_to_openai_messages(messages.get_talk_only())
-            if os.path.exists(conversation_history_file):
-                with open(conversation_history_file, 'r', encoding='utf-8') as f:
-                    conversation_history = json.load(f)
-
-                # add new conversation to conversation history
-                conversation_history.append(messages) # append everything except the initial system prompt
-            # if this is the first conversation
-            else:
+            with conversation_log.__lock:
+                index = conversation_log.__load_index(conversation_history_file)
                 directory = os.path.dirname(conversation_history_file)
                 os.makedirs(directory, exist_ok=True)
-                conversation_history = [messages] # wrap the first conversation in a list
-            
-            with open(conversation_history_file, 'w', encoding='utf-8') as f:
-                json.dump(conversation_history, f, indent=4) # save everything except the initial system prompt
+                # add new conversation to conversation history (everything except the initial system prompt)
+                with open(conversation_history_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(messages, ensure_ascii=False) + '\n')
+
+                index['conversations'] += 1
+                index['messages'] += len(messages)
+                index['size'] = os.path.getsize(conversation_history_file)
+                conversation_log.__save_index(conversation_history_file, index)
+                conversation_log.__length_cache[conversation_log.__get_cache_key(character, world_id)] = (conversation_history_file, conversation_log.__get_file_version(conversation_history_file), index['messages'])
 
-    @staticmethod   
-    @utils.time_it 
+    @staticmethod
+    @utils.time_it
     def load_conversation_log(character: Character, world_id: str) -> list[str]:
         conversation_history_file = conversation_log.__get_path_to_conversation_history_file(character, world_id)
-        if os.path.exists(conversation_history_file):
-            with open(conversation_history_file, 'r', encoding='utf-8') as f:
-                conversation_history = json.load(f)
-            previous_conversations = []
-            for conversation in conversation_history:
+        previous_conversations = []
+        with conversation_log.__lock:
+            for conversation in conversation_log.__read_conversations(conversation_history_file):
                 previous_conversations.extend(conversation)
-            return previous_conversations
-        else:
-            return []
+        return previous_conversations
 
     @staticmethod
     @utils.time_it
     def get_conversation_log_length(character: Character, world_id: str) -> int:
+        cache_key = conversation_log.__get_cache_key(character, world_id)
+        cached_length = conversation_log.__length_cache.get(cache_key)
+        if cached_length:
+            conversation_history_file, file_version, length = cached_length
+            if conversation_log.__get_file_version(conversation_history_file) == file_version:
+                return length
+
         conversation_history_file = conversation_log.__get_path_to_conversation_history_file(character, world_id)
-        if os.path.exists(conversation_history_file):
-            with open(conversation_history_file, 'r', encoding='utf-8') as f:
-                conversation_history = json.load(f)
-            return sum(len(conversation) for conversation in conversation_history)
-        else:
-            return 0
-
-    @staticmethod    
+        with conversation_log.__lock:
+            length = conversation_log.__load_index(conversation_history_file)['messages']
+            conversation_log.__length_cache[cache_key] = (conversation_history_file, conversation_log.__get_file_version(conversation_history_file), length)
+        return length
+
+    @staticmethod
+    def __get_cache_key(character: Character, world_id: str) -> tuple[str, str, str, str]:
+        return (conversation_log.game_path, world_id, utils.remove_trailing_number(character.name), str(character.ref_id))
+
+    @staticmethod
+    def __get_file_version(file_path: str) -> tuple[int, int] | None:
+        """Returns the modification time and size of a file, or None if it does not exist"""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
     @utils.time_it
     def __get_path_to_conversation_history_file(character: Character, world_id: str) -> str:
         # if multiple NPCs in a conversation have the same name (eg Whiterun Guard) their names are appended with number IDs
         # these IDs need to be removed when saving the conversation
         name: str = utils.remove_trailing_number(character.name)
-        non_ref_path = f"{conversation_log.game_path}/{world_id}/{name}/{name}.json"
-        ref_path = f"{conversation_log.game_path}/{world_id}/{name} - {character.ref_id}/{name}.json"
+        non_ref_path = f"{conversation_log.game_path}/{world_id}/{name}/{name}"
+        ref_path = f"{conversation_log.game_path}/{world_id}/{name} - {character.ref_id}/{name}"
 
-        if os.path.exists(non_ref_path): # if a conversation folder already exists for this NPC, use it
-            return non_ref_path
+        if conversation_log.__log_exists(non_ref_path): # if a conversation folder already exists for this NPC, use it
+            path = non_ref_path
         else: # else include the NPC's reference ID in the folder name to differentiate generic NPCs
-            return ref_path
+            path = ref_path
+
+        with conversation_log.__lock:
+            conversation_log.__migrate_legacy_log(path)
+        return path + conversation_log.LOG_FILE_EXTENSION
+
+    @staticmethod
+    def __log_exists(path_without_extension: str) -> bool:
+        return os.path.exists(path_without_extension + conversation_log.LOG_FILE_EXTENSION) or os.path.exists(path_without_extension + conversation_log.LEGACY_LOG_FILE_EXTENSION)
+
+    @staticmethod
+    def __migrate_legacy_log(path_without_extension: str):
+        """Converts a conversation history saved as a single JSON list by older versions into the JSON Lines format.
+        The old file is kept with a '.migrated' extension
+        """
+        legacy_file = path_without_extension + conversation_log.LEGACY_LOG_FILE_EXTENSION
+        conversation_history_file = path_without_extension + conversation_log.LOG_FILE_EXTENSION
+        if not os.path.exists(legacy_file) or os.path.exists(conversation_history_file):
+            return
+
+        logger.info(f"Migrating conversation history '{legacy_file}' to '{conversation_history_file}'...")
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            conversation_history: list[list[ChatCompletionMessageParam]] = json.load(f)
+        temp_file = conversation_history_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            for conversation in conversation_history:
+                f.write(json.dumps(conversation, ensure_ascii=False) + '\n')
+        os.replace(temp_file, conversation_history_file)
+        os.replace(legacy_file, legacy_file + ".migrated")
+        conversation_log.__rebuild_index(conversation_history_file)
+
+    @staticmethod
+    def __get_index_path(conversation_history_file: str) -> str:
+        return conversation_history_file.removesuffix(conversation_log.LOG_FILE_EXTENSION) + conversation_log.INDEX_FILE_SUFFIX
+
+    @staticmethod
+    def __load_index(conversation_history_file: str) -> dict[str, int]:
+        """Loads the index of a conversation history. If the index does not match the size of the history (eg because Mantella was closed while saving), it is rebuilt
+
+        Returns:
+            dict[str, int]: the number of 'conversations' and 'messages' in the history and the 'size' of the history file in bytes
+        """
+        if not os.path.exists(conversation_history_file):
+            return {'conversations': 0, 'messages': 0, 'size': 0}
+
+        index_file = conversation_log.__get_index_path(conversation_history_file)
+        if os.path.exists(index_file):
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index['size'] == os.path.getsize(conversation_history_file):
+                    return index
+            except (json.JSONDecodeError, KeyError, TypeError):
+                pass
+        return conversation_log.__rebuild_index(conversation_history_file)
+
+    @staticmethod
+    def __save_index(conversation_history_file: str, index: dict[str, int]):
+        index_file = conversation_log.__get_index_path(conversation_history_file)
+        temp_file = index_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_file, index_file)
+
+    @staticmethod
+    def __rebuild_index(conversation_history_file: str) -> dict[str, int]:
+        conversation_log.__remove_incomplete_line(conversation_history_file)
+        index = {'conversations': 0, 'messages': 0, 'size': os.path.getsize(conversation_history_file)}
+        for conversation in conversation_log.__read_conversations(conversation_history_file):
+            index['conversations'] += 1
+            index['messages'] += len(conversation)
+        conversation_log.__save_index(conversation_history_file, index)
+        return index
+
+    @staticmethod
+    def __remove_incomplete_line(conversation_history_file: str):
+        """Cuts off a conversation that was only partially written, so the next conversation is appended on a new line"""
+        with open(conversation_history_file, 'rb+') as f:
+            content = f.read()
+            if content and not content.endswith(b'\n'):
+                logger.warning(f"Removing incomplete conversation from the end of '{conversation_history_file}'")
+                f.truncate(content.rfind(b'\n') + 1)
+
+    @staticmethod
+    def __read_conversations(conversation_history_file: str) -> list[list[ChatCompletionMessageParam]]:
+        if not os.path.exists(conversation_history_file):
+            return []
+        conversations = []
+        with open(conversation_history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    conversations.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable conversation in '{conversation_history_file}'")
+        return conversations
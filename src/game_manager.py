@@ -73,12 +73,19 @@ class GameStateManager:
         self.__update_context(input_json)
         self.__try_preload_voice_model()
         self.__talk.start_conversation()
+        self.__presynthesize_system_voicelines()
             
         return {
             comm_consts.KEY_REPLYTYPE: comm_consts.KEY_REPLYTTYPE_STARTCONVERSATIONCOMPLETED,
             comm_consts.KEY_STARTCONVERSATION_USENARRATOR: self.__conv_has_narrator}
     
 
+    def __presynthesize_system_voicelines(self):
+        '''Synthesizes the goodbye and "collecting thoughts" lines of the NPCs in the conversation in the background, so that ending or reloading the conversation does not wait for TTS'''
+        characters = self.__talk.context.npcs_in_conversation.get_non_player_characters()
+        self.__chat_manager.presynthesize_voicelines(characters, [self.__config.goodbye_npc_response, self.__config.collecting_thoughts_npc_response])
+
+
     def _build_random_conversation_client(self) -> ClientBase | None:
         """Build a random LLM client for the conversation if random selection is enabled.
 
@@ -247,7 +254,7 @@ class GameStateManager:
         else:
             self.__mic_input = False
             if self.__stt:
-                self.__stt.stop_listening()
+                self.__stt.close()
                 self.__stt = None
 
     ####### JSON constructions #########
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from typing import Any, Hashable
+import pandas as pd
+import src.utils as utils
+
+logger = utils.get_logger()
+
+
+class CharacterIndex:
+    """Hash maps from the identifying columns of the character DataFrame (base_id, name, race) to its row labels.
+
+    Matches a character with the same rules as a scan over the whole DataFrame would, in the following order:
+    name, ID, race -> name, ID -> name, partial ID, race -> name, partial ID -> name, race -> name -> ID.
+    A rule is only used if it matches exactly one row.
+    The partial ID is the last 5, 4 or 3 characters of the base ID, using the longest length that matches any row in the DataFrame.
+    """
+    FULL_ID_LENGTH: int = 6
+    PARTIAL_ID_LENGTHS: list[int] = [5, 4, 3]
+
+    def __init__(self, character_df: pd.DataFrame | None = None) -> None:
+        self.__maps: dict[str, defaultdict[Hashable, list[Hashable]]] = defaultdict(lambda: defaultdict(list))
+        self.__row_keys: dict[Hashable, list[tuple[str, Hashable]]] = {}
+        if character_df is not None:
+            for label, base_id, name, race in zip(character_df.index, character_df['base_id'], character_df['name'], character_df['race']):
+                self.add_row(label, base_id, name, race)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {'maps': {map_name: dict(keys) for map_name, keys in self.__maps.items()}, 'row_keys': self.__row_keys}
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__maps = defaultdict(lambda: defaultdict(list))
+        for map_name, keys in state['maps'].items():
+            self.__maps[map_name].update(keys)
+        self.__row_keys = state['row_keys']
+
+    @staticmethod
+    def __normalise_df_id(base_id: Any) -> str:
+        """Matches the DataFrame's base_id the same way as `series.fillna('').astype(str)`"""
+        if pd.isna(base_id):
+            return ''
+        return str(base_id)
+
+    def add_row(self, label: Hashable, base_id: Any, name: Any, race: Any):
+        """Adds a row of the character DataFrame to the index
+
+        Args:
+            label (Hashable): the label of the row in the DataFrame
+            base_id (Any): the value of the row's base_id column
+            name (Any): the value of the row's name column
+            race (Any): the value of the row's race column
+        """
+        if label in self.__row_keys:
+            self.remove_row(label)
+        id_text = self.__normalise_df_id(base_id)
+        full_id = id_text.lstrip('0').lower()
+        name_lower = str(name).lower()
+        race_lower = str(race).lower()
+
+        keys: list[tuple[str, Hashable]] = [
+            ('id', full_id),
+            ('name', name_lower),
+            ('name, race', (name_lower, race_lower)),
+            ('name, ID', (name_lower, full_id)),
+            ('name, ID, race', (name_lower, full_id, race_lower)),
+        ]
+        for length in self.PARTIAL_ID_LENGTHS:
+            partial_id = (id_text[-length:] if len(id_text) >= length else id_text).lstrip('0').lower()
+            keys.append((f'partial ID {length}', partial_id))
+            keys.append((f'name, partial ID {length}', (name_lower, partial_id)))
+            keys.append((f'name, partial ID {length}, race', (name_lower, partial_id, race_lower)))
+
+        for map_name, key in keys:
+            self.__maps[map_name][key].append(label)
+        self.__row_keys[label] = keys
+
+    def remove_row(self, label: Hashable):
+        """Removes a row from the index, eg before its identifying columns are changed
+
+        Args:
+            label (Hashable): the label of the row in the DataFrame
+        """
+        for map_name, key in self.__row_keys.pop(label, []):
+            labels = self.__maps[map_name][key]
+            labels.remove(label)
+            if not labels:
+                del self.__maps[map_name][key]
+
+    def __get_labels(self, map_name: str, key: Hashable) -> list[Hashable]:
+        keys = self.__maps.get(map_name)
+        if not keys:
+            return []
+        return keys.get(key, [])
+
+    def find_row(self, base_id: str, character_name: str, race: str) -> Hashable | None:
+        """Finds the single row that matches a character
+
+        Args:
+            base_id (str): the base ID of the character
+            character_name (str): the name of the character
+            race (str): the race of the character
+
+        Returns:
+            Hashable | None: the label of the matching row, or None if no rule matches exactly one row
+        """
+        character_name_lower = character_name.lower()
+        race_lower = race.lower()
+        full_id_search = base_id[-self.FULL_ID_LENGTH:].lstrip('0').lower()
+
+        # Partial ID match with decreasing lengths
+        partial_id: tuple[int, str] | None = None
+        for length in self.PARTIAL_ID_LENGTHS:
+            partial_id_search = base_id[-length:].lstrip('0').lower()
+            if self.__get_labels(f'partial ID {length}', partial_id_search):
+                partial_id = (length, partial_id_search)
+                break
+
+        ordered_matchers: dict[str, tuple[str, Hashable] | None] = {
+            'name, ID, race': ('name, ID, race', (character_name_lower, full_id_search, race_lower)), # needed for Fallout 4 NPCs like Curie
+            'name, ID': ('name, ID', (character_name_lower, full_id_search)),
+            'name, partial ID, race': (f'name, partial ID {partial_id[0]}, race', (character_name_lower, partial_id[1], race_lower)) if partial_id else None,
+            'name, partial ID': (f'name, partial ID {partial_id[0]}', (character_name_lower, partial_id[1])) if partial_id else None,
+            'name, race': ('name, race', (character_name_lower, race_lower)),
+            'name': ('name', character_name_lower),
+            'ID': ('id', full_id_search)
+        }
+
+        for matcher, lookup in ordered_matchers.items():
+            if not lookup:
+                continue
+            labels = self.__get_labels(*lookup)
+            if len(labels) == 1: #If there is exactly one match
+                logger.info(f'Matched {character_name} in CSV by {matcher}')
+                return labels[0]
+
+        return None
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
+import hashlib
 import json
 import os
+import pickle
 from pathlib import Path
-from typing import Any, TYPE_CHECKING
+from typing import Any, Hashable, TYPE_CHECKING
 import pandas as pd
+from src.games.character_index import CharacterIndex
 from src.conversation.conversation_log import conversation_log
 if TYPE_CHECKING:
     from src.conversation.context import Context
@@ -27,21 +30,27 @@ class Gameable(ABC):
         ABC (_type_): _description_
     """
     MANTELLA_VOICE_FOLDER = "MantellaVoice00"
+    CHARACTER_CACHE_VERSION = 1
 
     @utils.time_it
     def __init__(self, config: ConfigLoader, path_to_character_df: str, mantella_game_folder_path: str):
-        try:
-            self.__character_df: pd.DataFrame = self.__get_character_df(path_to_character_df)
-        except:
-            logger.error(f'Unable to read / open {path_to_character_df}. If you have recently edited this file, please try reverting to a previous version. This error is normally due to using special characters, or saving the CSV in an incompatible format.')
-            input("Press Enter to exit.")
-        
         self._is_vr: bool = config.game.is_vr
-        #Apply character overrides
         mod_overrides_folder = os.path.join(*[config.mod_path_base, self.extender_name, "Plugins","MantellaSoftware","data",f"{mantella_game_folder_path}","character_overrides"])
-        self.__apply_character_overrides(mod_overrides_folder, self.__character_df.columns.values.tolist())
         personal_overrides_folder = os.path.join(config.save_folder, f"data/{mantella_game_folder_path}/character_overrides")
-        self.__apply_character_overrides(personal_overrides_folder, self.__character_df.columns.values.tolist())
+        character_cache_file = os.path.join(config.save_folder, "data", mantella_game_folder_path, "character_cache.pkl")
+        character_cache_key = self.__get_character_cache_key(path_to_character_df, [mod_overrides_folder, personal_overrides_folder])
+        if not self.__load_character_cache(character_cache_file, character_cache_key):
+            try:
+                self.__character_df: pd.DataFrame = self.__get_character_df(path_to_character_df)
+            except:
+                logger.error(f'Unable to read / open {path_to_character_df}. If you have recently edited this file, please try reverting to a previous version. This error is normally due to using special characters, or saving the CSV in an incompatible format.')
+                input("Press Enter to exit.")
+            self.__character_index: CharacterIndex = CharacterIndex(self.__character_df)
+
+            #Apply character overrides
+            self.__apply_character_overrides(mod_overrides_folder, self.__character_df.columns.values.tolist())
+            self.__apply_character_overrides(personal_overrides_folder, self.__character_df.columns.values.tolist())
+            self.__save_character_cache(character_cache_file, character_cache_key)
 
         self.__conversation_folder_path = os.path.join(config.save_folder, "data", mantella_game_folder_path, "conversations")
         conversation_log.game_path = self.__conversation_folder_path
@@ -81,6 +90,52 @@ class Gameable(ABC):
         """ Return the path to the image file created by in-game screenshots"""
         pass
     
+    @utils.time_it
+    def __get_character_cache_key(self, path_to_character_df: str, overrides_folders: list[str]) -> str:
+        """Hashes the character CSV and all override files, so the cache is rebuilt whenever one of them changes"""
+        character_hash = hashlib.sha256(f"{self.CHARACTER_CACHE_VERSION}|{pd.__version__}".encode())
+        for file_path in [path_to_character_df] + [os.path.join(folder, file) for folder in overrides_folders if os.path.isdir(folder) for file in sorted(os.listdir(folder))]:
+            character_hash.update(file_path.encode())
+            try:
+                with open(file_path, 'rb') as f:
+                    character_hash.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                character_hash.update(b'missing')
+        return character_hash.hexdigest()
+
+    @utils.time_it
+    def __load_character_cache(self, cache_file: str, cache_key: str) -> bool:
+        """Loads the character DataFrame with applied overrides and its lookup index from the cache file
+
+        Returns:
+            bool: True if the cache was loaded, False if it does not exist or is outdated
+        """
+        if not os.path.exists(cache_file):
+            return False
+        try:
+            with open(cache_file, 'rb') as f:
+                cache = pickle.load(f)
+            if cache['key'] != cache_key:
+                return False
+            self.__character_df = cache['character_df']
+            self.__character_index = cache['character_index']
+        except Exception as e:
+            logger.warning(f"Could not load character cache '{cache_file}'. It will be recreated. Error: {e}")
+            return False
+        logger.debug(f"Loaded characters from cache '{cache_file}'")
+        return True
+
+    @utils.time_it
+    def __save_character_cache(self, cache_file: str, cache_key: str):
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            temp_file = f"{cache_file}.tmp"
+            with open(temp_file, 'wb') as f:
+                pickle.dump({'key': cache_key, 'character_df': self.__character_df, 'character_index': self.__character_index}, f)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            logger.warning(f"Could not save character cache '{cache_file}'. Error: {e}")
+
     @utils.time_it
     def __get_character_df(self, file_name: str) -> pd.DataFrame:
         encoding = utils.get_file_encoding(file_name)
@@ -203,70 +258,30 @@ class Gameable(ABC):
         return ref_id
 
     @utils.time_it
-    def _get_matching_df_rows_matcher(self, base_id: str, character_name: str, race: str) -> pd.Series | None:
-        character_name_lower = character_name.lower()
-        race_lower = race.lower()
-        
-        full_id_len = 6
-        full_id_search = base_id[-full_id_len:].lstrip('0')  # Strip leading zeros from the last 6 characters
+    def _get_matching_df_row(self, base_id: str, character_name: str, race: str) -> Hashable | None:
+        """Finds the row of a character in the character DataFrame
 
-        # Function to remove leading zeros from hexadecimal ID strings
-        def vectorized_remove_zeros(series):
-            return series.fillna('').astype(str).str.lstrip('0')
-        
-        def vectorized_partial_id_match(series, length):
-            str_series = series.fillna('').astype(str)
-            # Create mask for strings long enough
-            length_mask = str_series.str.len() >= length
-            # Apply different logic based on length
-            result = pd.Series('', index=series.index)  # Default to empty string
-            result[length_mask] = str_series[length_mask].str[-length:].str.lstrip('0')
-            result[~length_mask] = str_series[~length_mask].str.lstrip('0')
-            return result.str.lower()
-
-        df_id_cleaned = vectorized_remove_zeros(self.character_df['base_id']).str.lower()
-        id_match = df_id_cleaned == full_id_search.lower()
-        name_match = self.character_df['name'].astype(str).str.lower() == character_name_lower
-
-        race_match = self.character_df['race'].astype(str).str.lower() == race_lower
-
-        # Partial ID match with decreasing lengths
-        partial_id_match = pd.Series(False, index=self.character_df.index)
-        for length in [5, 4, 3]:
-            if partial_id_match.any():
-                break
-            partial_id_search = base_id[-length:].lstrip('0').lower()  # strip leading zeros from partial ID search
-            partial_id_match = vectorized_partial_id_match(self.character_df['base_id'], length) == partial_id_search
-
-        ordered_matchers = {
-            'name, ID, race': name_match & id_match & race_match, # match name, full ID, race (needed for Fallout 4 NPCs like Curie)
-            'name, ID': name_match & id_match, # match name and full ID
-            'name, partial ID, race': name_match & partial_id_match & race_match, # match name, partial ID, and race
-            'name, partial ID': name_match & partial_id_match, # match name and partial ID
-            'name, race': name_match & race_match, # match name and race
-            'name': name_match, # match just name
-            'ID': id_match # match just ID
-        }
-
-        for matcher in ordered_matchers:
-            view = self.character_df.loc[ordered_matchers[matcher]]
-            if view.shape[0] == 1: #If there is exactly one match
-                logger.info(f'Matched {character_name} in CSV by {matcher}')
-                return ordered_matchers[matcher]
-            
-        return None
+        Args:
+            base_id (str): the base ID of the character
+            character_name (str): the name of the character
+            race (str): the race of the character
+
+        Returns:
+            Hashable | None: the label of the matching row, or None if the character could not be matched unambiguously
+        """
+        return self.__character_index.find_row(base_id, character_name, race)
 
     @utils.time_it
     def find_character_info(self, base_id: str, character_name: str, race: str, gender: int, ingame_voice_model: str):
         parts = race.split('<')
         character_race = parts[1].split('Race ')[0] if len(parts) > 1 else race # TODO: check if this covers "character_currentrace.split('<')[1].split('Race ')[0]" from FO4
-        matcher = self._get_matching_df_rows_matcher(base_id, character_name, character_race)
-        if isinstance(matcher, type(None)):
+        row_label = self._get_matching_df_row(base_id, character_name, character_race)
+        if row_label is None:
             logger.info(f"Could not find {character_name} in {self.game_name_in_filepath}_characters.csv. Loading as a generic NPC.")
             character_info = self.load_unnamed_npc(character_name, character_race, gender, ingame_voice_model)
             is_generic_npc = True
         else:
-            result = self.character_df.loc[matcher]
+            result = self.character_df.loc[[row_label]]
             character_info = result.to_dict('records')[0]
             if (character_info['voice_model'] is None) or (pd.isnull(character_info['voice_model'])) or (character_info['voice_model'] == ''):
                 character_info['voice_model'] = self.find_best_voice_model(race, gender, ingame_voice_model) 
@@ -276,55 +291,85 @@ class Gameable(ABC):
     
     @utils.time_it
     def __apply_character_overrides(self, overrides_folder: str, character_df_column_headers: list[str]):
+        """Adds or updates the characters of all override files in a folder.
+        All changes are collected first and then applied to the character DataFrame in one go, so the DataFrame is only copied once
+
+        Args:
+            overrides_folder (str): the folder containing the .json and .csv override files
+            character_df_column_headers (list[str]): the columns of the character DataFrame
+        """
         os.makedirs(overrides_folder, exist_ok=True)
         override_files: list[str] = os.listdir(overrides_folder)
+        identity_columns = ['base_id', 'name', 'race']
+        next_new_label = len(self.character_df.index)
+        new_rows: dict[Hashable, dict[str, Any]] = {}
+        row_updates: dict[Hashable, dict[str, Any]] = {}
         for file in override_files:
             try:
-                filename, extension = os.path.splitext(file)
-                full_path_file = os.path.join(overrides_folder,file)
-                if extension == ".json":
-                    with open(full_path_file) as fp:
-                        json_object = json.load(fp)
-                        if isinstance(json_object, dict):#Otherwise it is already a list
-                            json_object = [json_object]
-                        for json_content in json_object:
-                            content: dict[str, str] = json_content
-                            name = content.get("name", "")
-                            base_id = content.get("base_id", "")
-                            race = content.get("race", "")
-                            matcher = self._get_matching_df_rows_matcher(base_id, name, race)
-                            if isinstance(matcher, type(None)): #character not in csv, add as new row
-                                row = []
-                                for entry in character_df_column_headers:
-                                    value = content.get(entry, "")
-                                    row.append(value)
-                                self.character_df.loc[len(self.character_df.index)] = row
-                            else: #character is in csv, update row
-                                for entry in character_df_column_headers:
-                                    value = content.get(entry, None)
-                                    if value and value != "":
-                                        self.character_df.loc[matcher, entry] = value
-                elif extension == ".csv":
-                    extra_df = self.__get_character_df(full_path_file)
-                    for i in range(extra_df.shape[0]):#for each row in df
-                        name = self.get_string_from_df(extra_df.iloc[i], "name")
-                        base_id = self.get_string_from_df(extra_df.iloc[i], "base_id")
-                        race = self.get_string_from_df(extra_df.iloc[i], "race")
-                        matcher = self._get_matching_df_rows_matcher(base_id, name, race)
-                        if isinstance(matcher, type(None)): #character not in csv, add as new row
-                            row = []
-                            for entry in character_df_column_headers:
-                                value = self.get_string_from_df(extra_df.iloc[i], entry)
-                                row.append(value)
-                            self.character_df.loc[len(self.character_df.index)] = row
-                        else: #character is in csv, update row
-                            for entry in character_df_column_headers:
-                                value = extra_df.iloc[i].get(entry, None)
-                                if value and not pd.isna(value) and value != "":
-                                    self.character_df.loc[matcher, entry] = value
+                for base_id, name, race, new_row, updated_values in self.__read_character_overrides(os.path.join(overrides_folder, file), character_df_column_headers):
+                    row_label = self._get_matching_df_row(base_id, name, race)
+                    if row_label is None: #character not in csv, add as new row
+                        row_label = next_new_label
+                        next_new_label += 1
+                        new_rows[row_label] = new_row
+                        row = new_row
+                    else: #character is in csv, update row
+                        if row_label in new_rows:
+                            row = new_rows[row_label]
+                        else:
+                            row = row_updates.setdefault(row_label, {})
+                        row.update(updated_values)
+                        if not any(column in updated_values for column in identity_columns):
+                            continue
+                    # Keep the lookup index up to date for the following overrides
+                    identity = [row[column] if column in row else self.character_df.at[row_label, column] for column in identity_columns]
+                    self.__character_index.add_row(row_label, *identity)
             except Exception as e:
                 logger.warning(f"Could not load character override file '{file}' in '{overrides_folder}'. Most likely there is an error in the formating of the file. Error: {e}")
 
+        updated_columns: dict[str, dict[Hashable, Any]] = {}
+        for row_label, updated_values in row_updates.items():
+            for column, value in updated_values.items():
+                updated_columns.setdefault(column, {})[row_label] = value
+        for column, values in updated_columns.items():
+            self.character_df.loc[list(values.keys()), column] = list(values.values())
+        if new_rows:
+            new_rows_df = pd.DataFrame(list(new_rows.values()), index=list(new_rows.keys()), columns=character_df_column_headers)
+            self.__character_df = pd.concat([self.character_df, new_rows_df])
+        if new_rows or row_updates:
+            logger.debug(f"Applied character overrides from '{overrides_folder}': {len(new_rows)} added, {len(row_updates)} updated")
+
+    def __read_character_overrides(self, file_path: str, character_df_column_headers: list[str]) -> list[tuple[str, str, str, dict[str, Any], dict[str, Any]]]:
+        """Reads the characters of a .json or .csv override file
+
+        Args:
+            file_path (str): the path to the override file
+            character_df_column_headers (list[str]): the columns of the character DataFrame
+
+        Returns:
+            list[tuple[str, str, str, dict[str, Any], dict[str, Any]]]: for each character its base_id, name and race, 
+            the row to add if the character is not in the csv yet and the values to update if it is
+        """
+        overrides = []
+        extension = os.path.splitext(file_path)[1]
+        if extension == ".json":
+            with open(file_path) as fp:
+                json_object = json.load(fp)
+            if isinstance(json_object, dict):#Otherwise it is already a list
+                json_object = [json_object]
+            for json_content in json_object:
+                content: dict[str, str] = json_content
+                new_row = {entry: content.get(entry, "") for entry in character_df_column_headers}
+                updated_values = {entry: value for entry in character_df_column_headers if (value := content.get(entry, None)) and value != ""}
+                overrides.append((content.get("base_id", ""), content.get("name", ""), content.get("race", ""), new_row, updated_values))
+        elif extension == ".csv":
+            extra_df = self.__get_character_df(file_path)
+            for content in extra_df.to_dict('records'):#for each row in df
+                new_row = {entry: self.get_string_from_df(content, entry) for entry in character_df_column_headers}
+                updated_values = {entry: value for entry in character_df_column_headers if (value := content.get(entry, None)) and not pd.isna(value) and value != ""}
+                overrides.append((self.get_string_from_df(content, "base_id"), self.get_string_from_df(content, "name"), self.get_string_from_df(content, "race"), new_row, updated_values))
+        return overrides
+
     @utils.time_it
     def _create_all_voice_folders(self, mod_path: str, voice_folder_col: str):
         all_voice_folders = self.character_df[voice_folder_col]
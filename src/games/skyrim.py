@@ -60,6 +60,7 @@ class Skyrim(Gameable):
         except:
             logger.warning(f'Unable to read / open "data/Skyrim/skyrim_idles.csv". Emote action will not be available.')
             self.__idles_table = pd.DataFrame()
+        self.__enabled_idle_names: list[str] | None = None
 
     @property
     def extender_name(self) -> str:
@@ -265,9 +266,12 @@ class Skyrim(Gameable):
         if self.__idles_table.empty:
             return []
         
-        # Check for 'x' (case-insensitive) in enabled column
-        enabled_mask = self.__idles_table['enabled'].astype(str).str.lower().str.strip() == 'x'
-        return self.__idles_table.loc[enabled_mask, 'idle_name'].unique().tolist()
+        # The idles table is only read at startup, so the enabled idles are only looked up once
+        if self.__enabled_idle_names is None:
+            # Check for 'x' (case-insensitive) in enabled column
+            enabled_mask = self.__idles_table['enabled'].astype(str).str.lower().str.strip() == 'x'
+            self.__enabled_idle_names = self.__idles_table.loc[enabled_mask, 'idle_name'].unique().tolist()
+        return list(self.__enabled_idle_names)
 
     def resolve_idle_id(self, idle_name: str) -> int | None:
         """Resolve an idle name to its FormID as an integer
@@ -3,6 +3,7 @@ class communication_constants:
     PREFIX: str = "mantella_"    
     KEY_REQUESTTYPE: str = PREFIX + "request_type"
     KEY_REPLYTYPE: str = PREFIX + "reply_type"
+    KEY_SESSIONID: str = PREFIX + "session_id"
 
     KEY_REQUESTTYPE_INIT: str = PREFIX + "initialize"
     KEY_REQUESTTYPE_STARTCONVERSATION: str = PREFIX + "start_conversation"
@@ -47,6 +47,7 @@ class ActorTalk(BaseModel):
 
 class BaseRequest(BaseModel):
     request_type: str = Field(..., alias=comm_consts.KEY_REQUESTTYPE)
+    session_id: Optional[str] = Field(None, alias=comm_consts.KEY_SESSIONID)
 
 class InitRequest(BaseRequest):
     request_type: Literal[comm_consts.KEY_REQUESTTYPE_INIT] = Field(
@@ -1,4 +1,9 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
+import re
+import time
+from threading import Lock
 from typing import Any, Hashable
 
 from fastapi import FastAPI, Request
@@ -22,16 +27,37 @@ from src.actions.function_manager import FunctionManager
 logger = utils.get_logger()
 
 
+class _Session:
+    """The GameStateManager of a game client's session, along with the lock that serializes its requests"""
+    def __init__(self) -> None:
+        self.game: Future[GameStateManager] = Future() # resolved once the GameStateManager has been created
+        self.lock: Lock = Lock()
+        self.last_used: float = time.time()
+
+
 class mantella_route(routeable):
     """Main route for Mantella conversations
+    
+    Requests are processed on a pool of worker threads so that the server stays responsive while a response is being prepared.
+    Each game client can send a session ID with its requests to get its own independent GameStateManager. 
+    Requests without a session ID all share the default session. 
+    Other sessions are ended once they have been idle for SESSION_IDLE_TIMEOUT seconds, or when more than MAX_SESSIONS are open
 
     Args:
         routeable (_type_): _description_
     """
+    DEFAULT_SESSION_ID: str = "default"
+    MAX_SESSIONS: int = 8
+    SESSION_IDLE_TIMEOUT: float = 60 * 60
+
     def __init__(self, config: ConfigLoader, language_info: dict[Hashable, str]) -> None:
         super().__init__(config)
         self.__language_info: dict[Hashable, str] = language_info
-        self.__game: GameStateManager | None = None
+        self.__game: GameStateManager | None = None # the GameStateManager of the default session
+        self.__default_session_lock: Lock = Lock()
+        self.__sessions: dict[str, _Session] = {}
+        self.__setup_lock: Lock = Lock()
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(thread_name_prefix="mantella_request")
 
         # if not self._can_route_be_used():
         #     error_message = "MantellaSoftware settings faulty. Please check MantellaSoftware's window or log."
@@ -39,9 +65,24 @@ class mantella_route(routeable):
 
     @utils.time_it
     def _setup_route(self):
+        # Requests still running on a worker thread are finished before their session is ended
         if self.__game:
-            self.__game.end_conversation({})
+            with self.__default_session_lock:
+                self.__game.end_conversation({})
+        sessions = list(self.__sessions.values())
+        self.__sessions.clear()
+        for session in sessions:
+            self.__end_session(session)
+
+        self.__game = self.__create_game_state_manager()
 
+    @utils.time_it
+    def __create_game_state_manager(self, voiceline_folder: str | None = None) -> GameStateManager:
+        """Creates a GameStateManager with its own game, TTS and LLM clients
+
+        Args:
+            voiceline_folder (str | None, optional): The folder to save voicelines to, so that sessions synthesizing at the same time do not overwrite each other's voicelines. Defaults to the TTS service's default folder
+        """
         game: Gameable
         game_enum = self._config.game
         if game_enum.base_game == GameEnum.FALLOUT4:
@@ -49,7 +90,7 @@ class mantella_route(routeable):
         else:
             game = Skyrim(self._config)
 
-        tts: TTSable = create_tts(self._config.tts_service, self._config, game)
+        tts: TTSable = create_tts(self._config.tts_service, self._config, game, voiceline_folder)
 
         llm_client = LLMClient(self._config)
 
@@ -57,43 +98,130 @@ class mantella_route(routeable):
         if self._config.summary_llm_enabled:
             summary_client = SummaryLLMClient(self._config)
 
-        chat_manager = ChatManager(self._config, tts, llm_client, game)
-        self.__game = GameStateManager(game, chat_manager, self._config, self.__language_info, llm_client, summary_client)
+        chat_manager = ChatManager(self._config, tts, llm_client, game, voiceline_folder)
+        return GameStateManager(game, chat_manager, self._config, self.__language_info, llm_client, summary_client)
+
+    def __get_session(self, session_id: str) -> tuple[_Session, bool]:
+        """Returns a session, adding it if it is new. Must be called while holding self.__setup_lock
+
+        Returns:
+            tuple[_Session, bool]: The session, and whether it is new (in which case the caller must create its GameStateManager)
+        """
+        is_new = session_id not in self.__sessions
+        if is_new:
+            logger.info(f"Starting new session '{session_id}'")
+            self.__sessions[session_id] = _Session()
+        session = self.__sessions[session_id]
+        session.last_used = time.time()
+        return session, is_new
+
+    def __start_session(self, session_id: str, session: _Session):
+        """Creates the GameStateManager of a new session. Runs without holding self.__setup_lock, so that other sessions are not held up in the meantime"""
+        voiceline_folder = f"{utils.get_tmp_dir()}/voicelines/sessions/{re.sub(r'[^A-Za-z0-9_-]', '_', session_id)}"
+        try:
+            session.game.set_result(self.__create_game_state_manager(voiceline_folder))
+        except Exception as e:
+            session.game.set_exception(e)
+
+    def __remove_expired_sessions(self, current_session_id: str) -> list[_Session]:
+        """Removes sessions that have been idle for too long, then the least recently used sessions beyond MAX_SESSIONS. 
+        Must be called while holding self.__setup_lock
+
+        Returns:
+            list[_Session]: The removed sessions, which need to be ended
+        """
+        now = time.time()
+        expired_ids = [session_id for session_id, session in self.__sessions.items() if session_id != current_session_id and now - session.last_used > self.SESSION_IDLE_TIMEOUT]
+        least_recently_used_ids = sorted((session_id for session_id in self.__sessions if session_id != current_session_id and session_id not in expired_ids), key=lambda session_id: self.__sessions[session_id].last_used)
+        excess_count = len(self.__sessions) - len(expired_ids) - self.MAX_SESSIONS
+        if excess_count > 0:
+            expired_ids.extend(least_recently_used_ids[:excess_count])
+        for session_id in expired_ids:
+            logger.info(f"Ending inactive session '{session_id}'")
+        return [self.__sessions.pop(session_id) for session_id in expired_ids]
+
+    def __end_session(self, session: _Session):
+        """Ends the conversation of a removed session once any request it is still processing has finished"""
+        with session.lock:
+            try:
+                game = session.game.result()
+            except Exception:
+                return # the session was never started
+            game.end_conversation({})
 
     @utils.time_it
-    def add_route_to_server(self, app: FastAPI):
-        @app.post("/mantella")
-        async def mantella(request: Request):
+    def __process_request(self, received_json: dict[str, Any]) -> dict[str, Any]:
+        """Processes a single request. Runs on a worker thread of the route's executor
+
+        Args:
+            received_json (dict[str, Any]): The json sent by the game client
+
+        Returns:
+            dict[str, Any]: The reply to send back
+        """
+        with self.__setup_lock:
             if not self._can_route_be_used():
                 error_message = "MantellaSoftware settings faulty. Please check MantellaSoftware's window or log."
                 logger.error(error_message)
                 return self.error_message(error_message)
-            if not self.__game:
-                error_message = "Game manager setup failed. There is most likely an issue with the config.ini."
-                logger.error(error_message)
-                return self.error_message(error_message)
+            session_id = str(received_json.get(comm_consts.KEY_SESSIONID) or self.DEFAULT_SESSION_ID)
+            if session_id == self.DEFAULT_SESSION_ID:
+                game, session_lock = self.__game, self.__default_session_lock
+                session, is_new_session = None, False
+            else:
+                session, is_new_session = self.__get_session(session_id)
+                session_lock = session.lock
+            expired_sessions = self.__remove_expired_sessions(session_id)
+
+        if is_new_session:
+            self.__start_session(session_id, session)
+        for expired_session in expired_sessions:
+            self.__end_session(expired_session)
+        if session:
+            try:
+                game = session.game.result()
+            except Exception as e:
+                logger.error(f"Could not start session '{session_id}': {e}")
+                with self.__setup_lock:
+                    if self.__sessions.get(session_id) is session:
+                        del self.__sessions[session_id] # try again with the next request
+                game = None
+        if not game:
+            error_message = "Game manager setup failed. There is most likely an issue with the config.ini."
+            logger.error(error_message)
+            return self.error_message(error_message)
+
+        # Requests of the same session are handled one at a time, as a GameStateManager only ever runs one conversation
+        with session_lock:
+            request_type: str = received_json[comm_consts.KEY_REQUESTTYPE]
+            match request_type:
+                case comm_consts.KEY_REQUESTTYPE_INIT:
+                    # nothing needs to be done for this request aside from self._can_route_be_used() being triggered
+                    logger.debug('Mantella settings initialized')
+                    return {comm_consts.KEY_REPLYTYPE: comm_consts.KEY_REPLYTTYPE_INITCOMPLETED}
+                case comm_consts.KEY_REQUESTTYPE_STARTCONVERSATION:
+                    return game.start_conversation(received_json)
+                case comm_consts.KEY_REQUESTTYPE_CONTINUECONVERSATION:
+                    return game.continue_conversation(received_json)
+                case comm_consts.KEY_REQUESTTYPE_PLAYERINPUT:
+                    return game.player_input(received_json)
+                case comm_consts.KEY_REQUESTTYPE_ENDCONVERSATION:
+                    return game.end_conversation(received_json)
+                case _:
+                    return self.error_message(f"Request type '{request_type}' was not recognized")
+
+    @utils.time_it
+    def add_route_to_server(self, app: FastAPI):
+        @app.post("/mantella")
+        async def mantella(request: Request):
             reply = {}
             received_json: dict[str, Any] | None = await request.json()
             if received_json:
                 logger.debug('Processing request...')
                 if self._config.show_http_debug_messages:
                     logger.log(self._log_level_http_in, json.dumps(received_json, indent=4))
-                request_type: str = received_json[comm_consts.KEY_REQUESTTYPE]
-                match request_type:
-                    case comm_consts.KEY_REQUESTTYPE_INIT:
-                        # nothing needs to be done for this request aside from self._can_route_be_used() being triggered
-                        logger.debug('Mantella settings initialized')
-                        reply = {comm_consts.KEY_REPLYTYPE: comm_consts.KEY_REPLYTTYPE_INITCOMPLETED}
-                    case comm_consts.KEY_REQUESTTYPE_STARTCONVERSATION:
-                        reply = self.__game.start_conversation(received_json)
-                    case comm_consts.KEY_REQUESTTYPE_CONTINUECONVERSATION:
-                        reply = self.__game.continue_conversation(received_json)
-                    case comm_consts.KEY_REQUESTTYPE_PLAYERINPUT:
-                        reply = self.__game.player_input(received_json)
-                    case comm_consts.KEY_REQUESTTYPE_ENDCONVERSATION:
-                        reply = self.__game.end_conversation(received_json)
-                    case _:
-                        reply = self.error_message(f"Request type '{request_type}' was not recognized")
+                # The GameStateManager methods block until a response is ready, so keep them off the event loop
+                reply = await asyncio.get_running_loop().run_in_executor(self.__executor, self.__process_request, received_json)
             else:
                 reply = self.error_message(f"Request did not contain properly formatted json!")
 
@@ -32,7 +32,8 @@ class ImageManager:
                  resize_method: str,
                  capture_offset: dict[str, int],
                  use_game_screenshots: bool,
-                 game_image_path: str | None) -> None:
+                 game_image_path: str | None,
+                 similar_frame_threshold: int = 0) -> None:
 
         WINDOW_TITLES = {
             GameEnum.SKYRIM: 'Skyrim Special Edition',
@@ -70,6 +71,11 @@ class ImageManager:
 
         self.__capture_params = None
 
+        # Frames whose hashes differ in fewer than this many bits are treated as the same scene
+        self.__similar_frame_threshold: int = similar_frame_threshold
+        self.__last_frame_hash: int | None = None
+        self.__last_image: str | None = None
+
         if platform.system() != "Windows":
             return
 
@@ -212,6 +218,37 @@ class ImageManager:
         return np.array(screenshot), width, height
     
 
+    @staticmethod
+    def _get_frame_hash(image: np.ndarray) -> int:
+        '''Calculate a perceptual (difference) hash of an image, which stays the same when the image only changes slightly
+
+        Args:
+            image (numpy.ndarray): The image to hash
+
+        Returns:
+            int: A 64 bit hash, with one bit per pair of neighbouring cells in a 9x8 grid of the image
+        '''
+        cells = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA).astype(np.float32)
+        if cells.ndim == 3:
+            cells = cells[:, :, :3].mean(axis=2) # ignore the alpha channel of window captures
+        is_brighter = (cells[:, 1:] > cells[:, :-1]).flatten()
+        return int(np.packbits(is_brighter).view('>u8')[0])
+
+
+    def _is_similar_to_last_frame(self, frame_hash: int) -> bool:
+        '''Check whether a frame shows the same scene as the last encoded frame
+
+        Args:
+            frame_hash (int): The hash of the frame returned by `_get_frame_hash`
+
+        Returns:
+            bool: True if the hashes differ in fewer bits than the similar frame threshold
+        '''
+        if self.__last_frame_hash is None or self.__last_image is None:
+            return False
+        return (frame_hash ^ self.__last_frame_hash).bit_count() < self.__similar_frame_threshold
+
+
     @utils.time_it
     def _encode_image_to_jpeg(self, screenshot):
         return cv2.imencode('.jpg', screenshot, [cv2.IMWRITE_JPEG_QUALITY, self.__image_quality])[1]
@@ -246,9 +283,18 @@ class ImageManager:
             # Process
             screenshot = self._resize_image(screenshot, width, height)
 
+            # Reuse the last image if the scene has not changed
+            if self.__similar_frame_threshold > 0:
+                frame_hash = self._get_frame_hash(screenshot)
+                if self._is_similar_to_last_frame(frame_hash):
+                    logger.debug('Scene has not changed since the last image, reusing it')
+                    return self.__last_image
+                self.__last_frame_hash = frame_hash
+
             # Encode
             buffer = self._encode_image_to_jpeg(screenshot)
             img_str = base64.b64encode(buffer).decode()
+            self.__last_image = img_str
 
             # Optionally, save the image to disk
             if self.__save_screenshot:
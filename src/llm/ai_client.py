@@ -10,7 +10,7 @@ class AIClient(ABC):
     @abstractmethod
     def request_call(self, messages: Message | message_thread) -> str | None:
         """A standard sync request call to the LLM. 
-        This method generates a new client, calls 'client.chat.completions.create', returns the result and closes when finished
+        This method calls 'client.chat.completions.create' on a reused client and returns the result
 
         Args:
             messages (conversation_thread): The message thread of the conversation
@@ -23,7 +23,7 @@ class AIClient(ABC):
     @abstractmethod
     def streaming_call(self, messages: Message | message_thread, is_multi_npc: bool, tools: list[dict] = None) -> AsyncGenerator[str | None, None]:
         """A standard streaming call to the LLM. Forwards the output of 'client.chat.completions.create' 
-        This method generates a new client, calls 'client.chat.completions.create' in a streaming way, yields the result immediately and closes when finished
+        This method calls 'client.chat.completions.create' in a streaming way on a reused client and yields the result immediately
 
         Args:
             messages (message_thread): The message thread of the conversation
@@ -37,6 +37,14 @@ class AIClient(ABC):
         """
         pass
     
+    def prefetch_vision(self, vision_hints: str) -> None:
+        """Prepares the image for the next streaming_call in the background, if vision is enabled for it. Clients without vision support do nothing
+
+        Args:
+            vision_hints (str): The in-game events of the message the image will be added to
+        """
+        pass
+
     @abstractmethod
     def get_count_tokens(self, messages: message_thread | list[Message] | Message | str) -> int:
         """Returns the number of tokens used by a list of messages
@@ -1,7 +1,9 @@
+import asyncio
 from threading import Lock
 from typing import AsyncGenerator, Any
 from enum import Enum
-from openai import APIConnectionError, BadRequestError, OpenAI, AsyncOpenAI, RateLimitError
+import httpx
+from openai import APIConnectionError, BadRequestError, OpenAI, AsyncOpenAI, RateLimitError, DefaultHttpxClient, DefaultAsyncHttpxClient
 from openai.types.chat import ChatCompletion
 import time
 import tiktoken
@@ -13,6 +15,7 @@ from src.llm.ai_client import AIClient
 from src.llm.message_thread import message_thread
 from src.llm.messages import Message, ImageMessage, UserMessage
 from src.llm.llm_model_list import LLMModelList
+from src.config.config_loader import ConfigLoader
 import src.utils as utils
 from src.telemetry.telemetry import create_span_from_thread
 from src.actions.function_manager import FunctionManager
@@ -28,6 +31,63 @@ class VisionMode(Enum):
     ON_DEMAND = "on_demand" # Image client active, Vision action controls enablement
 
 
+class _DrainOnCloseStream(httpx.AsyncByteStream):
+    """Wraps a streamed response body so that the end of the HTTP message is drained before it is closed, once the stream has finished.
+
+    The OpenAI SDK closes streamed responses as soon as it reads '[DONE]', before the end of the HTTP message has been received.
+    httpcore then has to drop the connection instead of returning it to the pool, so each streaming call would need a new connection.
+    Streams closed before '[DONE]' has been received (eg the generation was stopped early) are closed without draining, as the rest of the response may take a while
+    """
+    drain_timeout: float = 0.2
+    __done_marker: bytes = b'[DONE]'
+
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self.__iterator = stream.__aiter__()
+        self.__stream = stream
+        self.__tail: bytes = b'' # the last bytes received, to find the done marker even if it is split across chunks
+        self.__is_done: bool = False
+
+    async def __aiter__(self):
+        async for chunk in self.__iterator:
+            if not self.__is_done:
+                received = self.__tail + chunk
+                self.__is_done = self.__done_marker in received
+                self.__tail = received[-len(self.__done_marker):]
+            yield chunk
+
+    async def __drain(self):
+        async for _ in self.__iterator:
+            pass
+
+    async def aclose(self):
+        if self.__is_done:
+            try:
+                await asyncio.wait_for(self.__drain(), self.drain_timeout)
+            except Exception: # the rest of the response did not arrive in time, so the connection is dropped
+                pass
+        await self.__stream.aclose()
+
+
+class _KeepAliveAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async transport that keeps connections of streamed responses reusable, see :class:`_DrainOnCloseStream`"""
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle_async_request(request)
+        response.stream = _DrainOnCloseStream(response.stream)
+        return response
+
+
+def get_pool_limits(config: ConfigLoader) -> httpx.Limits:
+    """Reads the connection pool limits for the LLM clients from the config
+
+    Args:
+        config (ConfigLoader): The config to read the limits from
+
+    Returns:
+        httpx.Limits: The connection pool limits to pass to :class:`ClientBase`
+    """
+    return httpx.Limits(max_connections=config.llm_max_connections, max_keepalive_connections=config.llm_max_keepalive_connections, keepalive_expiry=config.llm_keepalive_expiry)
+
+
 class ClientBase(AIClient):
     '''Base class for connecting to OpenAI-compatible endpoints
 
@@ -38,7 +98,10 @@ class ClientBase(AIClient):
     tiktoken_cache_dir = "data"
     os.environ["TIKTOKEN_CACHE_DIR"] = tiktoken_cache_dir
 
-    def __init__(self, api_url: str, llm: str, llm_params: dict[str, Any] | None, custom_token_count: int, prompt_caching_enabled: bool = False) -> None:
+    # Default connection pool limits for the long-lived sync / async clients, if none are passed to the constructor
+    default_pool_limits: httpx.Limits = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+
+    def __init__(self, api_url: str, llm: str, llm_params: dict[str, Any] | None, custom_token_count: int, prompt_caching_enabled: bool = False, pool_limits: httpx.Limits | None = None) -> None:
         '''
         Args:
             api_url (str): The API endpoint URL or a known service name (e.g., 'OpenAI', 'OpenRouter')
@@ -46,12 +109,17 @@ class ClientBase(AIClient):
             llm_params (dict[str, Any] | None): Additional parameters for the LLM requests (eg temperature, max_tokens)
             custom_token_count (int): A fallback token limit if the model's limit isn't known
             prompt_caching_enabled (bool): Whether Claude prompt caching is enabled for OpenRouter
+            pool_limits (httpx.Limits | None): The connection pool limits of the clients, see :func:`get_pool_limits`. Defaults to `default_pool_limits`
         '''
         super().__init__()
+        self._pool_limits: httpx.Limits = pool_limits or self.default_pool_limits
         self._generation_lock: Lock = Lock()
         self._model_name: str = llm
         self._base_url = self._get_endpoint(api_url)
-        self._startup_async_client: AsyncOpenAI | None = None
+        self._sync_client: OpenAI | None = None
+        self._async_client: AsyncOpenAI | None = None
+        self._async_client_loop: asyncio.AbstractEventLoop | None = None
+        self._client_lock: Lock = Lock()
         self._request_params: dict[str, Any] | None = llm_params
         self._image_client = None
         self._function_client = None
@@ -69,6 +137,8 @@ class ClientBase(AIClient):
             self._is_local: bool = True
             self._api_key: str = 'abc123'
 
+        self._client_settings: tuple[str, str] = (self._base_url, self._api_key) # the pooled clients are rebuilt if these change
+
         referer = "https://art-from-the-machine.github.io/Mantella/"
         xtitle = "Mantella"
         self._header: dict[str, str] = {"HTTP-Referer": referer, "X-Title": xtitle}
@@ -96,6 +166,15 @@ class ClientBase(AIClient):
         """Enable vision for the next streaming_call"""
         self._enable_vision_next_call = True
 
+    def prefetch_vision(self, vision_hints: str) -> None:
+        """Start capturing the image for the next streaming_call in the background if vision will be enabled for it
+
+        Args:
+            vision_hints: The in-game events of the message the image will be added to
+        """
+        if self._image_client and self._should_enable_vision():
+            self._image_client.prefetch_image(vision_hints)
+
     def _should_enable_vision(self) -> bool:
         """Determine if vision should be enabled for this LLM call"""
         # Vision in always-on mode (Vision enabled and vision action is inactive)
@@ -143,14 +222,12 @@ class ClientBase(AIClient):
         """Generates a new AsyncOpenAI client already setup to be used right away.
         Close the client after usage using 'await client.close()'
 
-        The client needs to be closed after every call (and a new one created for the next call) to avoid connection issues
-
-        Use :func:`streaming_call` for a normal streaming call to the LLM
+        Use :func:`streaming_call` for a normal streaming call to the LLM, which reuses a pooled client instead
 
         Returns:
             AsyncOpenAI: The new async client object
         """
-        return AsyncOpenAI(api_key=self._api_key, base_url=self._base_url, default_headers=self._header)
+        return AsyncOpenAI(api_key=self._api_key, base_url=self._base_url, default_headers=self._header, http_client=DefaultAsyncHttpxClient(transport=_KeepAliveAsyncTransport(limits=self._pool_limits)))
 
 
     @utils.time_it
@@ -158,12 +235,60 @@ class ClientBase(AIClient):
         """Generates a new OpenAI client already setup to be used right away.
         Close the client after usage using 'client.close()'
 
-        Use :func:`request_call` for a normal call to the LLM
+        Use :func:`request_call` for a normal call to the LLM, which reuses a pooled client instead
 
         Returns:
             OpenAI: The new sync client object
         """
-        return OpenAI(api_key=self._api_key, base_url=self._base_url, default_headers=self._header)
+        return OpenAI(api_key=self._api_key, base_url=self._base_url, default_headers=self._header, http_client=DefaultHttpxClient(limits=self._pool_limits))
+
+
+
+
+    def _refresh_client_settings(self):
+        """Drops the pooled clients if the endpoint or API key has changed since they were created.
+        Must be called while holding self._client_lock
+        """
+        client_settings = (self._base_url, self._api_key)
+        if self._client_settings == client_settings:
+            return
+        if self._sync_client:
+            self._sync_client.close()
+        self._sync_client = None
+        self._async_client = None # can only be closed from the event loop it was used in, so it is left to be garbage collected
+        self._async_client_loop = None
+        self._client_settings = client_settings
+
+
+    def _get_sync_client(self) -> OpenAI:
+        """Returns the long-lived sync client of this ClientBase, creating it if needed.
+        The client keeps its connections alive between calls, so it must not be closed after use
+
+        Returns:
+            OpenAI: The pooled sync client
+        """
+        with self._client_lock:
+            self._refresh_client_settings()
+            if not self._sync_client:
+                self._sync_client = self.generate_sync_client()
+            return self._sync_client
+
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """Returns the long-lived async client of this ClientBase, creating it if needed.
+        Connections of an async client are bound to the event loop they were opened in,
+        so a new client is created if this is called from a different event loop than the last time
+
+        Returns:
+            AsyncOpenAI: The pooled async client
+        """
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            self._refresh_client_settings()
+            if not self._async_client or (self._async_client_loop and self._async_client_loop is not loop):
+                self._async_client = self.generate_async_client()
+            self._async_client_loop = loop
+            return self._async_client
 
 
     @utils.time_it
@@ -177,7 +302,7 @@ class ClientBase(AIClient):
             The full chat completion object or None if the request failed
         """
         with self._generation_lock:
-            sync_client = self.generate_sync_client()        
+            sync_client = self._get_sync_client()
             chat_completion: ChatCompletion = None
             logger.log(28, 'Getting LLM response...')
 
@@ -207,8 +332,6 @@ class ClientBase(AIClient):
             except RateLimitError:
                 logger.warning('Could not connect to LLM API, retrying in 5 seconds...')
                 time.sleep(5)
-            finally:
-                sync_client.close()
 
             return chat_completion
 
@@ -243,6 +366,10 @@ class ClientBase(AIClient):
         with create_span_from_thread("llm_streaming_call") as span:
             with self._generation_lock:
                 logger.log(28, 'Getting LLM response...')
+                stream = None
+                items: AsyncGenerator[tuple[str, str], None] | None = None
+                next_item: asyncio.Future | None = None
+                tool_check: asyncio.Task | None = None
 
                 if self._request_params:
                     request_params = self._request_params.copy() # copy of self._request_params to allow temporary override
@@ -251,93 +378,79 @@ class ClientBase(AIClient):
                 if is_multi_npc: # override max_tokens to be at least 250 in radiant / multi-NPC conversations
                     request_params["max_tokens"] = max(self.max_tokens_param, 250)
                 try:
-                    # Prepare the messages including the image if provided
-                    vision_hints = ''
-                    if isinstance(messages, Message):
-                        openai_messages = [messages.get_openai_message()]
-                        if isinstance(messages, UserMessage):
-                            vision_hints = messages.get_ingame_events_text()
-                    else:
-                        openai_messages = messages.get_openai_messages()
-                        last_message = messages.get_last_message()
-                        if isinstance(last_message, UserMessage):
-                            vision_hints = last_message.get_ingame_events_text()
-                    
-                    # Determine if vision should be enabled for this call
-                    if self._should_enable_vision():
-                        if self._image_client:
-                            openai_messages = self._image_client.add_image_to_messages(openai_messages, vision_hints)
-                            logger.log(23, f"Vision enabled for this LLM call")
-                        else:
-                            logger.warning("Vision tool called but Vision not enabled in config - ignoring")
-                        self._enable_vision_next_call = False  # Reset flag after use
-
                     # Handle tool calling: use dedicated function client if available, otherwise use main LLM
                     if tools:
                         if self._function_client:
-                            pre_fetched_tool_calls = self._function_client.check_for_actions(messages, tools)
-                            if pre_fetched_tool_calls:
-                                yield ("tool_calls", pre_fetched_tool_calls)
+                            # The function LLM is queried while the main response starts streaming, rather than before it
+                            tool_check = asyncio.create_task(asyncio.to_thread(self._function_client.check_for_actions, messages, tools))
                         else:
                             # If custom function LLM isn't enabled, let the main LLM handle tool calling as well as text generation
                             request_params["tools"] = tools
-                    
-                    # Apply Claude cache breakpoint after all message transformations
-                    if self._caching_enabled and self._claude_cache.is_applicable(self._base_url, self._model_name):
-                        try:
-                            openai_messages = self._claude_cache.transform_messages(openai_messages)
-                        except Exception as e:
-                            logger.debug(f"Claude caching transform failed: {e}")
 
-                    # Create async client for main LLM streaming (after function client has run if applicable)
-                    if self._startup_async_client:
-                        async_client = self._startup_async_client
-                        self._startup_async_client = None # do not reuse the same client
-                    else:
-                        async_client = self.generate_async_client()
+                    openai_messages, is_vision_enabled = self.__prepare_streaming_messages(messages)
+
+                    # Reuse the pooled async client so that the connection to the LLM stays open between calls
+                    async_client = self._get_async_client()
                     
                     # Dict to track partial tool calls by index
                     accumulated_tool_calls = {}
                     
-                    async for chunk in await async_client.chat.completions.create(
+                    stream = await async_client.chat.completions.create(
                         model=self.model_name, 
                         messages=openai_messages, 
                         stream=True,
                         **request_params,
-                    ):
+                    )
+                    items = self.__read_stream(stream, accumulated_tool_calls)
+
+                    if tool_check:
+                        # Hold back the start of the response until the function LLM has chosen its actions, as the actions are expected first
+                        buffered_items: list[tuple[str, str]] = []
+                        next_item = asyncio.ensure_future(anext(items, None))
+                        while not tool_check.done():
+                            await asyncio.wait({next_item, tool_check}, return_when=asyncio.FIRST_COMPLETED)
+                            if next_item.done():
+                                if next_item.result() is None: # the response finished first
+                                    break
+                                buffered_items.append(next_item.result())
+                                next_item = asyncio.ensure_future(anext(items, None))
                         try:
-                            if chunk and chunk.choices and chunk.choices[0].delta:
-                                delta = chunk.choices[0].delta
-                                
-                                # Handle regular content
-                                if delta.content:
-                                    yield ("content", delta.content)
-                                
-                                # Accumulate tool calls by index
-                                if delta.tool_calls:
-                                    for tool_call in delta.tool_calls:
-                                        idx = tool_call.index
-                                        if idx not in accumulated_tool_calls:
-                                            accumulated_tool_calls[idx] = {
-                                                "id": tool_call.id if tool_call.id else "",
-                                                "type": "function",
-                                                "function": {
-                                                    "name": "",
-                                                    "arguments": ""
-                                                }
-                                            }
-                                        
-                                        # Accumulate the parts
-                                        if tool_call.id:
-                                            accumulated_tool_calls[idx]["id"] = tool_call.id
-                                        if tool_call.function and tool_call.function.name:
-                                            accumulated_tool_calls[idx]["function"]["name"] += tool_call.function.name
-                                        if tool_call.function and tool_call.function.arguments:
-                                            accumulated_tool_calls[idx]["function"]["arguments"] += tool_call.function.arguments
-                                
+                            pre_fetched_tool_calls = await tool_check
                         except Exception as e:
-                            logger.error(f"LLM API Connection Error: {e}")
-                            break
+                            logger.error(f"Function LLM error: {e}")
+                            pre_fetched_tool_calls = None
+
+                        if pre_fetched_tool_calls and self._image_client and not is_vision_enabled and FunctionManager.contains_action(pre_fetched_tool_calls, 'mantella_npc_vision'):
+                            # The response needs to see what the NPC sees, so it is restarted with the image included
+                            logger.log(23, "Vision requested by function LLM, restarting response with vision enabled")
+                            next_item.cancel()
+                            await asyncio.gather(next_item, return_exceptions=True)
+                            await items.aclose()
+                            await stream.close()
+                            self.enable_vision_for_next_call()
+                            openai_messages, is_vision_enabled = self.__prepare_streaming_messages(messages)
+                            stream = await async_client.chat.completions.create(
+                                model=self.model_name, 
+                                messages=openai_messages, 
+                                stream=True,
+                                **request_params,
+                            )
+                            items = self.__read_stream(stream, accumulated_tool_calls)
+                            buffered_items = []
+                            next_item = None
+
+                        if pre_fetched_tool_calls:
+                            yield ("tool_calls", pre_fetched_tool_calls)
+                        for item in buffered_items:
+                            yield item
+                        if next_item:
+                            item = await next_item
+                            next_item = None
+                            if item:
+                                yield item
+
+                    async for item in items:
+                        yield item
                     
                     # After streaming completes, yield any accumulated tool calls
                     if accumulated_tool_calls:
@@ -362,8 +475,91 @@ class ClientBase(AIClient):
                     else:
                         logger.error(f"LLM API Streaming Error: {e}")
                 finally:
-                    if async_client:
-                        await async_client.close()
+                    if tool_check and not tool_check.done():
+                        tool_check.cancel()
+                    if next_item and not next_item.done():
+                        next_item.cancel()
+                        await asyncio.gather(next_item, return_exceptions=True)
+                    if items:
+                        await items.aclose()
+                    if stream:
+                        await stream.close() # release the connection back to the pool (eg if the stream was stopped early)
+
+
+    def __prepare_streaming_messages(self, messages: Message | message_thread) -> tuple[list[dict], bool]:
+        """Converts messages to the format sent to the LLM, adding an image of the game if vision is enabled for this call
+
+        Returns:
+            tuple[list[dict], bool]: the messages, and whether an image has been added to them
+        """
+        vision_hints = ''
+        if isinstance(messages, Message):
+            openai_messages = [messages.get_openai_message()]
+            if isinstance(messages, UserMessage):
+                vision_hints = messages.get_ingame_events_text()
+        else:
+            openai_messages = messages.get_openai_messages()
+            last_message = messages.get_last_message()
+            if isinstance(last_message, UserMessage):
+                vision_hints = last_message.get_ingame_events_text()
+        
+        # Determine if vision should be enabled for this call
+        is_vision_enabled = False
+        if self._should_enable_vision():
+            if self._image_client:
+                openai_messages = self._image_client.add_image_to_messages(openai_messages, vision_hints)
+                is_vision_enabled = True
+                logger.log(23, f"Vision enabled for this LLM call")
+            else:
+                logger.warning("Vision tool called but Vision not enabled in config - ignoring")
+            self._enable_vision_next_call = False  # Reset flag after use
+
+        # Apply Claude cache breakpoint after all message transformations
+        if self._caching_enabled and self._claude_cache.is_applicable(self._base_url, self._model_name):
+            try:
+                openai_messages = self._claude_cache.transform_messages(openai_messages)
+            except Exception as e:
+                logger.debug(f"Claude caching transform failed: {e}")
+        return openai_messages, is_vision_enabled
+
+
+    async def __read_stream(self, stream, accumulated_tool_calls: dict[int, dict]) -> AsyncGenerator[tuple[str, str], None]:
+        """Yields the text of a streamed response as it arrives, and collects any tool calls in the response into accumulated_tool_calls
+        """
+        async for chunk in stream:
+            try:
+                if chunk and chunk.choices and chunk.choices[0].delta:
+                    delta = chunk.choices[0].delta
+                    
+                    # Handle regular content
+                    if delta.content:
+                        yield ("content", delta.content)
+                    
+                    # Accumulate tool calls by index
+                    if delta.tool_calls:
+                        for tool_call in delta.tool_calls:
+                            idx = tool_call.index
+                            if idx not in accumulated_tool_calls:
+                                accumulated_tool_calls[idx] = {
+                                    "id": tool_call.id if tool_call.id else "",
+                                    "type": "function",
+                                    "function": {
+                                        "name": "",
+                                        "arguments": ""
+                                    }
+                                }
+                            
+                            # Accumulate the parts
+                            if tool_call.id:
+                                accumulated_tool_calls[idx]["id"] = tool_call.id
+                            if tool_call.function and tool_call.function.name:
+                                accumulated_tool_calls[idx]["function"]["name"] += tool_call.function.name
+                            if tool_call.function and tool_call.function.arguments:
+                                accumulated_tool_calls[idx]["function"]["arguments"] += tool_call.function.arguments
+                    
+            except Exception as e:
+                logger.error(f"LLM API Connection Error: {e}")
+                break
 
 
     @classmethod
@@ -531,7 +727,8 @@ For more information, see here: https://art-from-the-machine.github.io/Mantella/
 
     @utils.time_it
     def __num_tokens_from_messages(self, messages: message_thread | list[Message]) -> int:
-        '''Calculates token count for a list of messages formatted for OpenAI API calls
+        '''Calculates token count for a list of messages formatted for OpenAI API calls.
+        Each message caches its own count, and a message_thread keeps a running total, so only new or changed messages are encoded
 
         Args:
             messages (message_thread | list[Message]): The messages to count tokens for
@@ -539,22 +736,10 @@ For more information, see here: https://art-from-the-machine.github.io/Mantella/
         Returns:
             num_tokens (int): The estimated total token count
         '''
-        messages_to_check = []
         if isinstance(messages, message_thread):
-            messages_to_check = messages.get_openai_messages()
+            num_tokens = messages.get_token_count(self._encoding)
         else:
-            for m in messages:
-                messages_to_check.append(m.get_openai_message())
-
-        # note: this calculation is based on GPT-3.5, future models may deviate from this
-        num_tokens = 0
-        for message in messages_to_check:
-            num_tokens += 4  # every message follows <im_start>{role/name}\n{content}<im_end>\n
-            for key, value in message.items():
-                if isinstance(value, str):
-                    num_tokens += len(self._encoding.encode(value))
-                    if key == "name":  # if there's a name, the role is omitted
-                        num_tokens += -1  # role is always required and always 1 token
+            num_tokens = sum(m.get_token_count(self._encoding) for m in messages)
         num_tokens += 2  # every reply is primed with <im_start>assistant
         return num_tokens
     
@@ -2,7 +2,7 @@ import src.utils as utils
 from openai.types.chat import ChatCompletion
 from openai.types.chat import ChatCompletionMessageToolCall
 from src.config.config_loader import ConfigLoader
-from src.llm.client_base import ClientBase
+from src.llm.client_base import ClientBase, get_pool_limits
 from src.llm.message_thread import message_thread
 from src.llm.messages import Message
 from src.llm.messages import SystemMessage
@@ -32,7 +32,8 @@ class FunctionClient(ClientBase):
             'api_url': config.function_llm_api, 
             'llm': config.function_llm, 
             'llm_params': function_llm_params, 
-            'custom_token_count': config.function_llm_custom_token_count
+            'custom_token_count': config.function_llm_custom_token_count,
+            'pool_limits': get_pool_limits(config)
         }
         
         super().__init__(**setup_values)
@@ -1,9 +1,12 @@
 import src.utils as utils
 from openai.types.chat import ChatCompletionMessageParam
+import time
 import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
 from src.config.config_loader import ConfigLoader
 from src.image.image_manager import ImageManager
-from src.llm.client_base import ClientBase
+from src.llm.client_base import ClientBase, get_pool_limits
 from src.llm.messages import ImageMessage
 from src.model_profile_manager import get_profile_manager
 
@@ -13,6 +16,8 @@ logger = utils.get_logger()
 class ImageClient(ClientBase):
     '''Image class to handle LLM vision
     '''
+    MAX_PREFETCH_AGE: float = 10 # seconds before a prefetched image is considered out of date
+
     @utils.time_it
     def __init__(self, config: ConfigLoader) -> None:
         self.__config = config    
@@ -27,7 +32,7 @@ class ImageClient(ClientBase):
                 apply_profile=config.apply_model_profiles,
                 log_context="ImageClient(custom)",
             )
-            setup_values = {'api_url': config.vision_llm_api, 'llm': config.vision_llm, 'llm_params': resolved_params, 'custom_token_count': config.vision_custom_token_count}
+            setup_values = {'api_url': config.vision_llm_api, 'llm': config.vision_llm, 'llm_params': resolved_params, 'custom_token_count': config.vision_custom_token_count, 'pool_limits': get_pool_limits(config)}
         else: # default to base LLM config values
             resolved_params = profile_manager.resolve_params(
                 service=config.llm_api,
@@ -36,7 +41,7 @@ class ImageClient(ClientBase):
                 apply_profile=config.apply_model_profiles,
                 log_context="ImageClient(base)",
             )
-            setup_values = {'api_url': config.llm_api, 'llm': config.llm, 'llm_params': resolved_params, 'custom_token_count': config.custom_token_count}
+            setup_values = {'api_url': config.llm_api, 'llm': config.llm, 'llm_params': resolved_params, 'custom_token_count': config.custom_token_count, 'pool_limits': get_pool_limits(config)}
         
         super().__init__(**setup_values)
 
@@ -59,7 +64,90 @@ class ImageClient(ClientBase):
                                                 config.resize_method, 
                                                 config.capture_offset,
                                                 config.use_game_screenshots,
-                                                config.game_path)
+                                                config.game_path,
+                                                config.similar_frame_threshold)
+        self.__prefetch_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vision_prefetch")
+        self.__prefetch_lock: Lock = Lock()
+        self.__prefetched_image: Future[tuple[str | None, str | None]] | None = None
+        self.__prefetched_vision_hints: str = ''
+        self.__prefetch_start_time: float = 0
+        # The image manager returns the same image while the scene does not change, in which case its description is reused
+        self.__last_description: tuple[str, str, str] | None = None # (image, vision hints, description)
+
+    def prefetch_image(self, vision_hints: str) -> None:
+        '''Starts capturing and encoding an image of the game (and describing it when using a custom vision model) in the background,
+        so that it is ready by the time the image is added to the messages
+
+        Args:
+            vision_hints (str): The in-game events to pass to the custom vision model along with the image
+        '''
+        with self.__prefetch_lock:
+            if self.__prefetched_image and not self.__prefetched_image.done():
+                return # the image being captured is recent enough
+            self.__prefetched_vision_hints = vision_hints
+            self.__prefetch_start_time = time.time()
+            self.__prefetched_image = self.__prefetch_executor.submit(self.__capture_image, vision_hints)
+
+    def __capture_image(self, vision_hints: str) -> tuple[str | None, str | None]:
+        image = self.__image_manager.get_image()
+        image_transcription = None
+        if image is not None and self.__custom_vision_model:
+            image_transcription = self.__describe_image(image, vision_hints)
+        return image, image_transcription
+
+    def __take_prefetched_image(self, vision_hints: str) -> tuple[str | None, str | None]:
+        '''Takes the result of `prefetch_image`, capturing the image now if there is no recent prefetched image
+
+        Returns:
+            tuple[str | None, str | None]: The base64 encoded image, and its description if using a custom vision model
+        '''
+        with self.__prefetch_lock:
+            prefetched_image = self.__prefetched_image
+            prefetched_vision_hints = self.__prefetched_vision_hints
+            is_recent = time.time() - self.__prefetch_start_time < self.MAX_PREFETCH_AGE
+            self.__prefetched_image = None
+
+        image, image_transcription = None, None
+        if prefetched_image and is_recent:
+            try:
+                image, image_transcription = prefetched_image.result()
+            except Exception as e:
+                logger.warning(f"Could not prefetch image: {e}")
+        if image is None:
+            return self.__capture_image(vision_hints)
+        if self.__custom_vision_model and (image_transcription is None or prefetched_vision_hints != vision_hints):
+            image_transcription = self.__describe_image(image, vision_hints)
+        return image, image_transcription
+
+    def __describe_image(self, image: str, vision_hints: str) -> str | None:
+        '''Asks the custom vision model for a description of an image
+
+        Args:
+            image (str): The base64 encoded image
+            vision_hints (str): The in-game events to pass to the vision model along with the image
+
+        Returns:
+            str | None: The description of the image cut to full sentences, or None if the vision model did not respond
+        '''
+        last_description = self.__last_description
+        if last_description and last_description[0] == image and last_description[1] == vision_hints:
+            logger.log(23, f"Image transcription (scene unchanged): {last_description[2]}")
+            return last_description[2]
+
+        if len(vision_hints) > 0:
+            vision_prompt = f"{self.__vision_prompt}\n{vision_hints}"
+        else:
+            vision_prompt = self.__vision_prompt
+        image_msg_instance = ImageMessage(self.__config, image, vision_prompt, self.__detail, True)
+        image_transcription = self.request_call(image_msg_instance)
+        if image_transcription:
+            last_punctuation = max(image_transcription.rfind(p) for p in self.__end_of_sentence_chars)
+            # filter transcription to full sentences
+            image_transcription = image_transcription if last_punctuation == -1 else image_transcription[:last_punctuation + 1]
+
+            logger.log(23, f"Image transcription: {image_transcription}")
+            self.__last_description = (image, vision_hints, image_transcription)
+        return image_transcription
     
     @utils.time_it
     def add_image_to_messages(self, openai_messages: list[ChatCompletionMessageParam], vision_hints: str) -> list[ChatCompletionMessageParam]:
@@ -71,7 +159,7 @@ class ImageClient(ClientBase):
         Returns:
             list[ChatCompletionMessageParam]: The updated list of messages with the image added
         '''
-        image = self.__image_manager.get_image()
+        image, image_transcription = self.__take_prefetched_image(vision_hints)
         if image is None:
             return openai_messages
         
@@ -98,19 +186,7 @@ class ImageClient(ClientBase):
                     ]
                 })
         else:
-            if len(vision_hints) > 0:
-                vision_prompt = f"{self.__vision_prompt}\n{vision_hints}"
-            else:
-                vision_prompt = self.__vision_prompt
-            image_msg_instance = ImageMessage(self.__config, image, vision_prompt, self.__detail, True)
-            image_transcription = self.request_call(image_msg_instance)
             if image_transcription:
-                last_punctuation = max(image_transcription.rfind(p) for p in self.__end_of_sentence_chars)
-                # filter transcription to full sentences
-                image_transcription = image_transcription if last_punctuation == -1 else image_transcription[:last_punctuation + 1]
-
-                logger.log(23, f"Image transcription: {image_transcription}")
-
                 # Add the image to the last user message or create a new message if needed
                 if last_user_message_idx is not None:
                     openai_messages[last_user_message_idx]['content'] = [
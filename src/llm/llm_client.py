@@ -3,7 +3,7 @@ from openai import AsyncOpenAI
 from src.config.config_loader import ConfigLoader
 from src.llm.image_client import ImageClient
 from src.llm.function_client import FunctionClient
-from src.llm.client_base import ClientBase
+from src.llm.client_base import ClientBase, get_pool_limits
 from src.model_profile_manager import get_profile_manager
 
 logger = utils.get_logger()
@@ -22,14 +22,14 @@ class LLMClient(ClientBase):
             apply_profile=config.apply_model_profiles,
             log_context="LLMClient",
         )
-        super().__init__(config.llm_api, config.llm, llm_params, config.custom_token_count, config.claude_prompt_caching_enabled)
+        super().__init__(config.llm_api, config.llm, llm_params, config.custom_token_count, config.claude_prompt_caching_enabled, get_pool_limits(config))
 
         if self._is_local:
             logger.info(f"Running Mantella with local language model")
         else:
             logger.log(23, f"Running Mantella with '{config.llm}'. The language model can be changed in the Mantella UI: http://localhost:4999/ui")
 
-        self._startup_async_client: AsyncOpenAI | None = self.generate_async_client() # initialize first client in advance of sending first LLM request to save time
+        self._async_client: AsyncOpenAI | None = self.generate_async_client() # initialize first client in advance of sending first LLM request to save time
 
         if config.vision_enabled:
             logger.info(f"Setting up vision language model...")
@@ -1,4 +1,5 @@
 from copy import deepcopy
+import tiktoken
 from src.config.config_loader import ConfigLoader
 from src.llm.messages import Message, SystemMessage, UserMessage, AssistantMessage, ImageMessage, ImageDescriptionMessage, ToolMessage
 from typing import Callable
@@ -12,11 +13,66 @@ class message_thread():
     def __init__(self, config: ConfigLoader, initial_system_message: str | SystemMessage | None) -> None:
         self.__messages: list[Message] = []
         self.__config = config
+        # Running token totals per encoding name over all messages that are not outdated
+        self.__token_totals: dict[str, int] = {}
+        self.__encodings: dict[str, tiktoken.Encoding] = {}
+        # Messages that were added or changed since the totals were last updated, by id
+        self.__outdated_messages: dict[int, Message] = {}
         if not initial_system_message:
             return
         if isinstance(initial_system_message, str):
             initial_system_message = SystemMessage(initial_system_message, config)
-        self.__messages.append(initial_system_message)
+        self.__append_message(initial_system_message)
+
+    def __append_message(self, new_message: Message):
+        self.__messages.append(new_message)
+        self.__track_message(new_message)
+
+    def __set_messages(self, new_messages: list[Message]):
+        for message in self.__messages:
+            self.__untrack_message(message)
+        self.__messages = new_messages
+        for message in self.__messages:
+            self.__track_message(message)
+
+    def __track_message(self, message: Message):
+        """Starts following changes to a message that has been added to the thread. Its tokens are counted the next time they are requested"""
+        message.add_content_changed_listener(self.__on_message_changed)
+        self.__outdated_messages[id(message)] = message
+
+    def __untrack_message(self, message: Message):
+        """Stops following a message that has been removed from the thread and removes it from the token totals"""
+        message.remove_content_changed_listener(self.__on_message_changed)
+        if self.__outdated_messages.pop(id(message), None) is None:
+            for encoding_name, encoding in self.__encodings.items():
+                self.__token_totals[encoding_name] -= message.get_token_count(encoding)
+
+    def __on_message_changed(self, message: Message, previous_token_counts: dict[str, int]):
+        if id(message) in self.__outdated_messages:
+            return
+        for encoding_name in self.__token_totals:
+            self.__token_totals[encoding_name] -= previous_token_counts[encoding_name]
+        self.__outdated_messages[id(message)] = message
+
+    @utils.time_it
+    def get_token_count(self, encoding: tiktoken.Encoding) -> int:
+        """Returns the summed token count of all messages in this thread. 
+        Only messages that were added or changed since the last call are counted again
+
+        Args:
+            encoding (tiktoken.Encoding): The encoding to count the tokens with
+
+        Returns:
+            int: The estimated token count of the messages (without the tokens priming the reply)
+        """
+        if encoding.name not in self.__token_totals:
+            self.__encodings[encoding.name] = encoding
+            self.__token_totals[encoding.name] = sum(m.get_token_count(encoding) for m in self.__messages if id(m) not in self.__outdated_messages)
+        for message in self.__outdated_messages.values():
+            for encoding_name, known_encoding in self.__encodings.items():
+                self.__token_totals[encoding_name] += message.get_token_count(known_encoding)
+        self.__outdated_messages.clear()
+        return self.__token_totals[encoding.name]
     
     def __len__(self) -> int:
         return self.__messages.__len__()
@@ -59,7 +115,7 @@ class message_thread():
         return message_thread.transform_to_openai_messages(self.__messages)
 
     def add_message(self, new_message: UserMessage | AssistantMessage | ImageMessage | ImageDescriptionMessage | ToolMessage):
-        self.__messages.append(new_message)
+        self.__append_message(new_message)
 
     @utils.time_it
     def add_non_system_messages(self, new_messages: list[Message]):
@@ -70,7 +126,7 @@ class message_thread():
         """
         for new_message in new_messages:
             if not isinstance(Message, SystemMessage):
-                self.__messages.append(new_message)
+                self.__append_message(new_message)
     
     @utils.time_it
     def reload_message_thread(self, new_prompt: str, is_too_long: Callable[[list[Message], float], bool], percent_modifier: float):
@@ -91,7 +147,7 @@ class message_thread():
             
         messages_to_keep.reverse()
         result.extend(messages_to_keep)
-        self.__messages = result
+        self.__set_messages(result)
 
     @utils.time_it
     def get_talk_only(self, include_system_generated_messages: bool = False) -> list[Message]:
@@ -145,6 +201,7 @@ class message_thread():
                 m.is_multi_npc_message = multi_npc_conversation
             for m in messages_to_remove:
                 self.__messages.remove(m)
+                self.__untrack_message(m)
     
     def has_message_type(self, message_type: type) -> bool:
         """Checks if there is any message of the specified type in the messages.
@@ -166,9 +223,10 @@ class message_thread():
         """
         for idx, msg in enumerate(self.__messages):
             if isinstance(msg, message_type):
-                self.__messages[idx] = new_message
-                # Move the new message to the end of the list
-                self.__messages.append(self.__messages.pop(idx))
+                self.__messages.pop(idx)
+                self.__untrack_message(msg)
+                # Add the new message to the end of the list
+                self.__append_message(new_message)
                 break
             
     def delete_all_message_type(self, message_type: type):
@@ -177,7 +235,7 @@ class message_thread():
         Args:
             message_type (type): The type of messages to delete.
         """
-        self.__messages = [msg for msg in self.__messages if not isinstance(msg, message_type)]
+        self.__set_messages([msg for msg in self.__messages if not isinstance(msg, message_type)])
 
     def replace_or_add_message(self, message_instance, message_type: type):
         if self.has_message_type(message_type):
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import Callable
+import tiktoken
 from openai.types.chat import ChatCompletionMessageParam
 from src.config.definitions.llm_definitions import NarrationIndicatorsEnum
 from src.config.config_loader import ConfigLoader
@@ -15,6 +17,8 @@ class Message(ABC):
         self.__text: str = text
         self.__is_multi_npc_message: bool = False
         self.__is_system_generated_message = is_system_generated_message
+        self.__token_counts: dict[str, int] = {} # cached token count per encoding name, cleared whenever the content changes
+        self.__content_changed_listeners: list[Callable[['Message', dict[str, int]], None]] = []
         if config:
             if config.narration_indicators == NarrationIndicatorsEnum.BRACKETS:
                 self.__narration_start: str = "["
@@ -37,6 +41,7 @@ class Message(ABC):
     @text.setter
     def text(self, text: str):
         self.__text = text
+        self._on_content_changed()
 
     @property
     def narration_start(self) -> str:
@@ -52,7 +57,9 @@ class Message(ABC):
     
     @is_multi_npc_message.setter
     def is_multi_npc_message(self, is_multi_npc_message: bool):
-        self.__is_multi_npc_message = is_multi_npc_message
+        if self.__is_multi_npc_message != is_multi_npc_message:
+            self.__is_multi_npc_message = is_multi_npc_message
+            self._on_content_changed()
 
     @property
     def is_system_generated_message(self) -> bool:
@@ -62,6 +69,53 @@ class Message(ABC):
     def is_system_generated_message(self, is_system_generated_message: bool):
         self.__is_system_generated_message = is_system_generated_message
 
+    def __getstate__(self) -> dict:
+        # Listeners belong to the message_threads this message is part of and must not be copied along with the message
+        state = self.__dict__.copy()
+        state['_Message__content_changed_listeners'] = []
+        return state
+
+    def add_content_changed_listener(self, listener: Callable[['Message', dict[str, int]], None]):
+        """Registers a listener that is called whenever the content of this message changes
+
+        Args:
+            listener (Callable[[Message, dict[str, int]], None]): Called with this message and its token counts from before the change
+        """
+        self.__content_changed_listeners.append(listener)
+
+    def remove_content_changed_listener(self, listener: Callable[['Message', dict[str, int]], None]):
+        if listener in self.__content_changed_listeners:
+            self.__content_changed_listeners.remove(listener)
+
+    def _on_content_changed(self):
+        """Drops the cached token counts of this message and informs the listeners. Call this whenever the content of the message changes
+        """
+        previous_token_counts = self.__token_counts
+        self.__token_counts = {}
+        for listener in list(self.__content_changed_listeners):
+            listener(self, previous_token_counts)
+
+    def get_token_count(self, encoding: tiktoken.Encoding) -> int:
+        """Returns the number of tokens this message takes up in an OpenAI API call. The count is cached until the content of the message changes
+
+        Args:
+            encoding (tiktoken.Encoding): The encoding to count the tokens with
+
+        Returns:
+            int: The estimated token count
+        """
+        token_count = self.__token_counts.get(encoding.name)
+        if token_count is None:
+            # note: this calculation is based on GPT-3.5, future models may deviate from this
+            token_count = 4  # every message follows <im_start>{role/name}\n{content}<im_end>\n
+            for key, value in self.get_openai_message().items():
+                if isinstance(value, str):
+                    token_count += len(encoding.encode(value))
+                    if key == "name":  # if there's a name, the role is omitted
+                        token_count += -1  # role is always required and always 1 token
+            self.__token_counts[encoding.name] = token_count
+        return token_count
+
     @abstractmethod
     def get_openai_message(self) -> ChatCompletionMessageParam:
         """Returns the message in form of an appropriately formatted openai.types.chat.ChatCompletionMessageParam
@@ -111,6 +165,7 @@ class AssistantMessage(Message):
     
     def add_sentence(self, new_sentence: Sentence):
         self.__sentences.append(new_sentence.content)
+        self._on_content_changed()
     
     @property
     def tool_calls(self) -> list[dict] | None:
@@ -121,6 +176,7 @@ class AssistantMessage(Message):
     def tool_calls(self, value: list[dict] | None):
         """Set the tool calls for this assistant message"""
         self.__tool_calls = value
+        self._on_content_changed()
 
     def get_formatted_content(self) -> str:
         if len(self.__sentences) < 1:
@@ -195,6 +251,7 @@ class UserMessage(Message):
         for event in events:
             if len(event) > 0:
                 self.__ingame_events.append(event)
+        self._on_content_changed()
     
     def count_ingame_events(self) -> int:
         return len(self.__ingame_events)
@@ -207,6 +264,7 @@ class UserMessage(Message):
     
     def set_ingame_time(self, time: str, time_group: str):
         self.__time = time, time_group
+        self._on_content_changed()
 
     def append_text(self, text_to_append: str):
         """Appends a string to the system message text."""
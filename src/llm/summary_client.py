@@ -1,5 +1,5 @@
 from src.config.config_loader import ConfigLoader
-from src.llm.client_base import ClientBase
+from src.llm.client_base import ClientBase, get_pool_limits
 from src.model_profile_manager import get_profile_manager
 
 class SummaryLLMClient(ClientBase):
@@ -13,4 +13,4 @@ class SummaryLLMClient(ClientBase):
             apply_profile=config.apply_model_profiles,
             log_context="SummaryLLMClient",
         )
-        super().__init__(config.summary_llm_api, config.summary_llm, summary_llm_params, config.summary_custom_token_count)
+        super().__init__(config.summary_llm_api, config.summary_llm, summary_llm_params, config.summary_custom_token_count, pool_limits=get_pool_limits(config))
@@ -1,5 +1,6 @@
 import asyncio
-from threading import Lock
+import queue
+from threading import Lock, Thread
 import time
 import unicodedata
 from openai import APIConnectionError
@@ -23,12 +24,13 @@ from src.characters_manager import Characters
 from src.character_manager import Character
 from src.llm.message_thread import message_thread
 from src.llm.ai_client import AIClient
-from src.llm.client_base import ClientBase
+from src.llm.client_base import ClientBase, get_pool_limits
 from src.model_profile_manager import get_profile_manager, ModelProfileManager
 from src.actions.function_manager import FunctionManager
 from src.llm.messages import AssistantMessage, ToolMessage
 from src.tts.ttsable import TTSable
 from src.tts.synthesization_options import SynthesizationOptions
+from src.tts.voiceline_file_pool import VoicelineFilePool, get_voiceline_file_pool
 from src.tts.tts_factory import parse_tts_service, create_tts
 from src.config.definitions.tts_definitions import TTSEnum
 from src.config.definitions.game_definitions import GameEnum
@@ -40,14 +42,20 @@ logger = utils.get_logger()
 
 
 class ChatManager:
-    def __init__(self, config: ConfigLoader, tts: TTSable, client: AIClient, game: Gameable | None = None):
+    # Maximum number of parsed sentences waiting to be voiced before the LLM stream is paused
+    __synthesis_queue_size: int = 8
+
+    def __init__(self, config: ConfigLoader, tts: TTSable, client: AIClient, game: Gameable | None = None, voiceline_folder: str | None = None):
         self.loglevel = 28
         self.__config: ConfigLoader = config
         self.__tts: TTSable = tts
+        self.__voiceline_folder: str | None = voiceline_folder # passed on to TTS services started for character overrides
         self.__client: AIClient = client
         self.__game: Gameable | None = game
         self.__is_generating: bool = False
+        self.__response_count: int = 0 # number of responses started, so that background work can tell when a new response has started
         self.__stop_generation = asyncio.Event()
+        self.__event_loop_runner = asyncio.Runner() # a single event loop is reused across responses so that pooled LLM connections stay open
         self.__tts_access_lock = Lock()
         self.__is_first_sentence: bool = False
         self.__contains_player_character: bool = False
@@ -60,6 +68,7 @@ class ChatManager:
         self.__per_character_clients: dict[str, AIClient] = {}
         self.__per_service_tts: dict[TTSEnum, TTSable] = {}
         self.__profile_manager: ModelProfileManager = get_profile_manager()
+        self.__voiceline_file_pool: VoicelineFilePool = get_voiceline_file_pool()
 
     @property
     def tts(self) -> TTSable:
@@ -120,7 +129,7 @@ class ChatManager:
             return self.__per_service_tts[service]
         try:
             logger.info(f"Starting TTS service '{service}' due to CSV character override")
-            instance = create_tts(service, self.__config, self.__game)
+            instance = create_tts(service, self.__config, self.__game, self.__voiceline_folder)
             self.__per_service_tts[service] = instance
             return instance
         except Exception as e:
@@ -155,6 +164,7 @@ class ChatManager:
                 llm_params=llm_params,
                 custom_token_count=self.__config.custom_token_count,
                 prompt_caching_enabled=self.__config.claude_prompt_caching_enabled,
+                pool_limits=get_pool_limits(self.__config),
             )
             # Copy sub-clients from the main client so vision and tool-calling remain available
             per_char_client._image_client = getattr(self.__client, '_image_client', None)
@@ -168,13 +178,14 @@ class ChatManager:
             return self.__client
 
     @utils.time_it
-    def generate_sentence(self, content: SentenceContent) -> Sentence:
+    def generate_sentence(self, content: SentenceContent, defer_voiceline_files: bool = False) -> Sentence:
         """Generates the audio for a text and returns the corresponding sentence
 
         Args:
             text (str): the text to be voices
             character_to_talk (Character): the character to say the sentence
             is_system_generated_sentence (bool, optional): Is this sentence system generated? Defaults to False.
+            defer_voiceline_files (bool, optional): Return before the lip sync files of the voiceline are generated. The caller must wait for them via the voiceline file pool before passing the sentence on to the game. Defaults to False.
 
         Returns:
             Sentence | None: _description_
@@ -197,17 +208,8 @@ class ChatManager:
                     synth_options = SynthesizationOptions(False, self.__is_first_sentence, stream_first_line)
                     audio_file, played_externally = self.__tts.synthesize(self.__config.narrator_voice, text, self.__config.narrator_voice, self.__config.narrator_voice, "en", synth_options, self.__config.narrator_voice)
                 else:
-                    synth_options = SynthesizationOptions(character_to_talk.is_in_combat, self.__is_first_sentence, stream_first_line)
-                    selected_tts_service = parse_tts_service(character_to_talk.tts_service) if self.__config.allow_per_character_tts_overrides else None
-                    if selected_tts_service is not None:
-                        try:
-                            tts_instance = self._get_or_create_tts(selected_tts_service)
-                            audio_file, played_externally = tts_instance.synthesize(character_to_talk.tts_voice_model, text, character_to_talk.in_game_voice_model, character_to_talk.csv_in_game_voice_model, character_to_talk.voice_accent, synth_options, character_to_talk.advanced_voice_model)
-                        except Exception as e:
-                            logger.warning(f"Per-character TTS '{character_to_talk.tts_service}' failed for {character_to_talk.name}: {e}. Falling back to default TTS.")
-                            audio_file, played_externally = self.__tts.synthesize(character_to_talk.tts_voice_model, text, character_to_talk.in_game_voice_model, character_to_talk.csv_in_game_voice_model, character_to_talk.voice_accent, synth_options, character_to_talk.advanced_voice_model)
-                    else:
-                        audio_file, played_externally = self.__tts.synthesize(character_to_talk.tts_voice_model, text, character_to_talk.in_game_voice_model, character_to_talk.csv_in_game_voice_model, character_to_talk.voice_accent, synth_options, character_to_talk.advanced_voice_model)
+                    synth_options = SynthesizationOptions(character_to_talk.is_in_combat, self.__is_first_sentence, stream_first_line, defer_voiceline_files)
+                    audio_file, played_externally = self.__synthesize_for_character(character_to_talk, text, synth_options)
             except Exception as e:
                 utils.play_error_sound()
                 error_text = f"Text-to-Speech Error: {e}"
@@ -216,6 +218,125 @@ class ChatManager:
             self.__is_first_sentence = False
             return Sentence(SentenceContent(character_to_talk, text, content.sentence_type, content.is_system_generated_sentence, content.actions), audio_file, utils.get_audio_duration(audio_file), played_externally=played_externally, synthesis_start_time=synthesis_start_time)
 
+    def __synthesize_for_character(self, character_to_talk: Character, text: str, synth_options: SynthesizationOptions) -> tuple[str, bool]:
+        """Synthesizes a voiceline with the character's TTS service (if per-character overrides are allowed), falling back to the default TTS service
+
+        Must be called while holding ``self.__tts_access_lock``.
+        """
+        selected_tts_service = parse_tts_service(character_to_talk.tts_service) if self.__config.allow_per_character_tts_overrides else None
+        if selected_tts_service is not None:
+            try:
+                tts_instance = self._get_or_create_tts(selected_tts_service)
+                return tts_instance.synthesize(character_to_talk.tts_voice_model, text, character_to_talk.in_game_voice_model, character_to_talk.csv_in_game_voice_model, character_to_talk.voice_accent, synth_options, character_to_talk.advanced_voice_model)
+            except Exception as e:
+                logger.warning(f"Per-character TTS '{character_to_talk.tts_service}' failed for {character_to_talk.name}: {e}. Falling back to default TTS.")
+        return self.__tts.synthesize(character_to_talk.tts_voice_model, text, character_to_talk.in_game_voice_model, character_to_talk.csv_in_game_voice_model, character_to_talk.voice_accent, synth_options, character_to_talk.advanced_voice_model)
+
+    def __is_voice_loaded_for_character(self, character: Character) -> bool:
+        """Whether the TTS service that voices the character already has the character's voice model loaded"""
+        selected_tts_service = parse_tts_service(character.tts_service) if self.__config.allow_per_character_tts_overrides else None
+        tts_instance = self.__tts
+        if selected_tts_service is not None and selected_tts_service != self.__config.tts_service:
+            # TTS services of character overrides are not started just to synthesize voicelines in advance
+            tts_instance = self.__per_service_tts.get(selected_tts_service)
+            if tts_instance is None:
+                return False
+        return tts_instance.is_voice_loaded(character.tts_voice_model, character.in_game_voice_model, character.csv_in_game_voice_model, character.advanced_voice_model)
+
+    @utils.time_it
+    def presynthesize_voicelines(self, characters: list[Character], voicelines: list[str]) -> Thread | None:
+        """Synthesizes fixed voicelines (eg goodbyes) for each character in the background, so that they are taken from the voiceline cache once they are needed.
+        Only characters whose voice model is already loaded are voiced, so that the voice model of the next response is never swapped out.
+        Presynthesis waits for a response that is already being generated, and stops for good once another response starts, so that it does not hold up the voicing of responses
+
+        Args:
+            characters (list[Character]): the characters to synthesize the voicelines for
+            voicelines (list[str]): the texts of the voicelines
+
+        Returns:
+            Thread | None: the background thread, or None if there is nothing to synthesize or voicelines are not cached
+        """
+        voicelines = [voiceline for voiceline in voicelines if len(voiceline.strip()) >= 3]
+        if not self.__tts.caches_voicelines or not characters or not voicelines:
+            return None
+        presynthesis_thread = Thread(target=self.__presynthesis_worker, args=(characters, voicelines), daemon=True)
+        presynthesis_thread.start()
+        return presynthesis_thread
+
+    def __presynthesis_worker(self, characters: list[Character], voicelines: list[str]):
+        while self.__is_generating:
+            time.sleep(0.1)
+        response_count = self.__response_count
+        for character in characters:
+            for voiceline in voicelines:
+                with self.__tts_access_lock:
+                    # Checked while holding the lock, as a response may have started while waiting for it
+                    if self.__is_generating or self.__response_count != response_count:
+                        return
+                    if not self.__is_voice_loaded_for_character(character):
+                        break
+                    try:
+                        # Lip files are generated, so that the cached voiceline can be used as any line of a response
+                        # Only the cached copy is needed, so the lip files are left to finish in the background
+                        synth_options = SynthesizationOptions(character.is_in_combat, False, defer_voiceline_files=True)
+                        self.__synthesize_for_character(character, ' ' + voiceline + ' ', synth_options)
+                    except Exception as e:
+                        logger.debug(f"Could not synthesize '{voiceline}' for {character.name} in advance: {e}")
+
+    def __synthesis_worker(self, synthesis_queue: queue.Queue, blocking_queue: SentenceQueue):
+        """Voices parsed sentences from the synthesis queue and passes them on to the blocking queue in the order they were queued.
+        Already finished sentences (eg action-only sentences) are passed through as they are. A None item ends the worker.
+        The lip sync files of each voiceline are generated in the background while the next sentence is voiced, so sentences are handed to a delivery worker
+        that passes them on once their files are ready. An item of the synthesis queue is only marked as done once it has been passed on.
+
+        Args:
+            synthesis_queue (queue.Queue): Queue of SentenceContent to voice or finished Sentence objects to pass through
+            blocking_queue (SentenceQueue): The queue the game retrieves its sentences from
+        """
+        delivery_queue: queue.Queue[Sentence | None] = queue.Queue()
+        delivery_thread = Thread(target=self.__delivery_worker, args=(delivery_queue, synthesis_queue, blocking_queue), daemon=True)
+        delivery_thread.start()
+        while True:
+            item: SentenceContent | Sentence | None = synthesis_queue.get()
+            is_delivered = False
+            try:
+                if item is None:
+                    delivery_queue.put(None)
+                    delivery_thread.join()
+                    return
+                if isinstance(item, Sentence):
+                    delivery_queue.put(item)
+                    is_delivered = True
+                elif not self.__stop_generation.is_set(): # Drop sentences that have not been voiced yet once generation is stopped
+                    delivery_queue.put(self.generate_sentence(item, defer_voiceline_files=True))
+                    is_delivered = True
+            except Exception as e:
+                logger.error(f"Error while voicing sentence: {e}")
+            finally:
+                if not is_delivered:
+                    synthesis_queue.task_done()
+
+    def __delivery_worker(self, delivery_queue: queue.Queue, synthesis_queue: queue.Queue, blocking_queue: SentenceQueue):
+        """Passes voiced sentences on to the blocking queue in the order they were voiced, once the lip sync files of their voicelines have been generated. A None item ends the worker.
+
+        Args:
+            delivery_queue (queue.Queue): Queue of voiced Sentence objects
+            synthesis_queue (queue.Queue): The queue the sentences were taken from, whose items are marked as done once passed on
+            blocking_queue (SentenceQueue): The queue the game retrieves its sentences from
+        """
+        while True:
+            sentence: Sentence | None = delivery_queue.get()
+            if sentence is None:
+                return
+            try:
+                if sentence.voice_file:
+                    self.__voiceline_file_pool.wait(sentence.voice_file)
+                blocking_queue.put(sentence)
+            except Exception as e:
+                logger.error(f"Error while passing on voiced sentence: {e}")
+            finally:
+                synthesis_queue.task_done()
+
     def __should_stream_first_line(self) -> bool:
         """Whether the next synthesized voiceline should be streamed from the TTS server and played externally as it arrives (Streamed Fast Response)"""
         return (self.__config.fast_response_mode
@@ -238,8 +359,9 @@ class ChatManager:
         if(not characters.last_added_character):
             return
         self.__is_generating = True
+        self.__response_count += 1
         
-        asyncio.run(self.process_response(characters.last_added_character, blocking_queue, messages, characters, actions, tools, game))
+        self.__event_loop_runner.run(self.process_response(characters.last_added_character, blocking_queue, messages, characters, actions, tools, game))
     
     @utils.time_it
     def stop_generation(self):
@@ -313,6 +435,12 @@ class ChatManager:
                 for i in indicators:
                     cut_indicators.add(i)
             accumulator: sentence_accumulator = sentence_accumulator(list(cut_indicators))
+
+            # Sentences are voiced by a separate worker so that the LLM stream keeps being read while TTS is running
+            # The queue is bounded so that the stream is only paused if synthesis falls too far behind
+            synthesis_queue: queue.Queue[SentenceContent | Sentence | None] = queue.Queue(maxsize=self.__synthesis_queue_size)
+            synthesis_thread = Thread(target=self.__synthesis_worker, args=(synthesis_queue, blocking_queue), daemon=True)
+            synthesis_thread.start()
         
             try:
                 current_sentence: str = ''
@@ -407,7 +535,7 @@ class ChatManager:
 
                                         logger.log(23, f"Parsed actions: {parsed_tools}")
                                         action_only_sentence = SentenceContent(active_character, "", SentenceTypeEnum.SPEECH, True, parsed_tools)
-                                        blocking_queue.put(Sentence(action_only_sentence, "", 0))
+                                        synthesis_queue.put(Sentence(action_only_sentence, "", 0))
                             else:
                                 # Fallback for backward compatibility (if item is just a string)
                                 has_text_response = True
@@ -437,8 +565,7 @@ class ChatManager:
                                             if first_sentence:
                                                 logger.log(self.loglevel, f"LLM took {round(time.time() - start_time, 5)} seconds to return the first sentence")
                                                 first_sentence = False
-                                            new_sentence = self.generate_sentence(parsed_sentence)
-                                            blocking_queue.put(new_sentence)
+                                            synthesis_queue.put(parsed_sentence)
                                             parsed_sentence = None
                                 if settings.stop_generation:
                                     break
@@ -480,6 +607,7 @@ class ChatManager:
                         logger.error(f"LLM API Error: {e}")
                         
                         error_response = "I can't find the right words at the moment."
+                        synthesis_queue.join() # Let any sentences received before the error be voiced first
                         new_sentence = self.generate_sentence(SentenceContent(active_character, error_response, SentenceTypeEnum.SPEECH, True))
                         blocking_queue.put(new_sentence)
                         if new_sentence.error_message: # If the error message itself has an error, just give up
@@ -507,13 +635,15 @@ class ChatManager:
                 # Handle any remaining content
                 if parsed_sentence:
                     if not self.__config.narration_handling == NarrationHandlingEnum.CUT_NARRATIONS or parsed_sentence.sentence_type != SentenceTypeEnum.NARRATION:
-                        new_sentence = self.generate_sentence(parsed_sentence)
-                        blocking_queue.put(new_sentence)
+                        synthesis_queue.put(parsed_sentence)
                 
                 if pending_sentence:
                     if not self.__config.narration_handling == NarrationHandlingEnum.CUT_NARRATIONS or pending_sentence.sentence_type != SentenceTypeEnum.NARRATION:
-                        new_sentence = self.generate_sentence(pending_sentence)
-                        blocking_queue.put(new_sentence)
+                        synthesis_queue.put(pending_sentence)
+
+                # Wait for all queued sentences to be voiced before signalling the end of the response
+                synthesis_queue.put(None)
+                synthesis_thread.join()
                 logger.log(23, f"Full raw response ({active_client.get_count_tokens(raw_response)} tokens): {raw_response.strip()}")
                 blocking_queue.is_more_to_come = False
                 # This sentence is required to make sure there is one in case the game is already waiting for it
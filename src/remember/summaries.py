@@ -1,7 +1,7 @@
 from collections import defaultdict
 import os
-import time
-from typing import Dict, List
+from threading import Lock
+from typing import Callable, Dict, List
 from src.config.config_loader import ConfigLoader
 from src.config.definitions.game_definitions import GameEnum
 from src.games.gameable import Gameable
@@ -13,6 +13,7 @@ from src.llm.messages import UserMessage, AssistantMessage
 from src.characters_manager import Characters
 from src.character_manager import Character, get_genders_text, get_races_text, get_genders_and_races_text
 from src.remember.remembering import Remembering
+from src.remember.summary_job_queue import SummaryJob, SummaryJobQueue, get_summary_job_queue
 from src import utils
 
 logger = utils.get_logger()
@@ -29,6 +30,17 @@ class Summaries(Remembering):
     """ Stores a conversation as a summary in a text file.
         Loads the latest summary from disk for a prompt text.
     """
+    # The latest summary file of each NPC folder and the content of the summary files that have been read.
+    # Shared between instances as all of them write to the same folders. Entries are replaced whenever a summary is written,
+    # and are only used while the (mtime, size) of the files and folders they were read from are unchanged, so that summaries edited outside of Mantella are picked up
+    # summary index key -> (path to the latest summary file, (mtime, size) of the summary folders of the NPC)
+    __latest_summary_files: dict[str, tuple[str, tuple[tuple[int, int] | None, ...]]] = {}
+    # path to a summary file -> ((mtime, size) of the file, deduplicated lines of the file)
+    __summary_file_lines: dict[str, tuple[tuple[int, int] | None, list[str]]] = {}
+    __summary_index_lock: Lock = Lock()
+    # Maximum time to wait for summaries that are still being created before the summaries already on disk are used
+    pending_summary_timeout_seconds: float = 60
+
     def __init__(self, game: Gameable, config: ConfigLoader, client: LLMClient, language_name: str, summary_client: SummaryLLMClient | None = None, summary_limit_pct: float = 0.3) -> None:
         super().__init__()
         self.loglevel = 28
@@ -39,6 +51,9 @@ class Summaries(Remembering):
         self.__language_name: str = language_name
         self.__memory_prompt: str = config.memory_prompt
         self.__resummarize_prompt: str = config.resummarize_prompt
+        # Summaries are created in the background so that ending a conversation does not have to wait for the LLM
+        self.__job_queue: SummaryJobQueue = get_summary_job_queue(os.path.join(os.path.dirname(game.conversation_folder_path), "summary_queue"))
+        self.__job_queue.set_handler(self.__run_summary_job)
 
     def __read_summary_lines(self, file_path: str, deduplicate: bool = False) -> list[str]:
         """Read a summary file and return non-empty stripped lines.
@@ -53,16 +68,44 @@ class Summaries(Remembering):
         if not os.path.exists(file_path):
             return []
         lines = []
+        seen_lines: set[str] = set()
         with open(file_path, 'r', encoding='utf-8') as f:
             for line in f:
                 stripped = line.strip()
-                if stripped and (not deduplicate or stripped not in lines):
+                if stripped and (not deduplicate or stripped not in seen_lines):
                     lines.append(stripped)
+                    seen_lines.add(stripped)
+        return lines
+
+    def __get_prompt_lines(self, file_path: str) -> list[str]:
+        """Returns the deduplicated lines of a summary file. The file is only read the first time or after it has changed"""
+        file_version = Summaries.__get_file_version(file_path)
+        with Summaries.__summary_index_lock:
+            cached_lines = Summaries.__summary_file_lines.get(file_path)
+        if cached_lines and cached_lines[0] == file_version:
+            return cached_lines[1]
+        lines = self.__read_summary_lines(file_path, deduplicate=True)
+        with Summaries.__summary_index_lock:
+            Summaries.__summary_file_lines[file_path] = (file_version, lines)
         return lines
 
+    @staticmethod
+    def __get_file_version(path: str) -> tuple[int, int] | None:
+        """Returns the modification time and size of a file or folder, or None if it does not exist"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def __invalidate_summary_file(self, file_path: str):
+        with Summaries.__summary_index_lock:
+            Summaries.__summary_file_lines.pop(file_path, None)
+
     @utils.time_it
     def get_prompt_text(self, characters: list[Character], world_id: str) -> str:
-        """Load the conversation summaries for all NPCs in the conversation and returns them as one string
+        """Load the conversation summaries for all NPCs in the conversation and returns them as one string.
+        Waits for summaries of these NPCs that are still being created in the background, up to `pending_summary_timeout_seconds`
 
         Args:
             characters (list[Character]): the non-player NPCs to load summaries for
@@ -71,25 +114,60 @@ class Summaries(Remembering):
         Returns:
             str: a concatenation of the summaries as a single string
         """
-        multi_npc = len(characters) > 1
+        npcs = [(character.name, character.ref_id) for character in characters]
+        keys = [self.__get_job_key(name, ref_id, world_id) for name, ref_id in npcs]
+        if self.__job_queue.has_pending_jobs(keys):
+            logger.info(f"Waiting for conversation summaries of {', '.join(name for name, _ in npcs)} to be saved...")
+            if not self.__job_queue.wait_for_jobs(keys, timeout=self.pending_summary_timeout_seconds):
+                logger.warning(f"Conversation summaries are taking too long to be saved. Continuing with the summaries saved so far...")
+        return self.__read_prompt_text(npcs, world_id)
+
+    def __read_prompt_text(self, npcs: list[tuple[str, str]], world_id: str) -> str:
+        """Reads the latest conversation summaries of the NPCs from disk
+
+        Args:
+            npcs (list[tuple[str, str]]): the name and ref_id of the NPCs to load summaries for
+            world_id (str): the world identifier used to separate summary folders by player characters
+
+        Returns:
+            str: a concatenation of the summaries as a single string
+        """
+        multi_npc = len(npcs) > 1
         character_memories = []
-        for character in characters:
-            conversation_summary_file = self.__get_latest_conversation_summary_file_path(character.name, character.ref_id, world_id)
-            paragraphs = self.__read_summary_lines(conversation_summary_file, deduplicate=True)
+        for npc_name, npc_ref_id in npcs:
+            conversation_summary_file = self.__get_latest_conversation_summary_file_path(npc_name, npc_ref_id, world_id)
+            paragraphs = self.__get_prompt_lines(conversation_summary_file)
             if not paragraphs:
                 continue
             memory = "\n".join(paragraphs)
             if multi_npc:
-                memory = f"[This is the beginning of {character.name}'s memory]\n{memory}\n[This is the end of {character.name}'s memory]"
+                memory = f"[This is the beginning of {npc_name}'s memory]\n{memory}\n[This is the end of {npc_name}'s memory]"
             character_memories.append(memory)
 
         if not character_memories:
             return ""
         return f"Below is a summary of past events:\n" + "\n\n".join(character_memories)
 
+    def wait_for_pending_summaries(self, timeout: float | None = None) -> bool:
+        """Blocks until all conversation summaries queued in the background have been saved
+
+        Args:
+            timeout (float | None): the maximum time to wait in seconds
+
+        Returns:
+            bool: True if all summaries have been saved, False if the timeout was reached
+        """
+        return self.__job_queue.wait_for_jobs(timeout=timeout)
+
+    @staticmethod
+    def __get_job_key(npc_name: str, npc_ref_id: str, world_id: str) -> str:
+        """Summary jobs are keyed by the summary folder they write to"""
+        return f"{world_id}/{utils.remove_trailing_number(npc_name)} - {npc_ref_id}"
+
     @utils.time_it
     def save_conversation_state(self, messages: message_thread, npcs_to_summarize: list[Character], npcs_in_conversation: Characters, world_id: str, is_reload=False, pending_shares: list[tuple[str, str, str]] | None = None, end_timestamp: float | None = None, is_radiant: bool = False):
-        """Save conversation summaries for the requested NPCs, with per-NPC thread tracking.
+        """Queue conversation summaries for the requested NPCs, with per-NPC thread tracking.
+        The summaries are created and saved by a background worker, this method returns without waiting for the LLM.
 
         NPCs only get summaries of the messages they actually heard (based on participation log).
         NPCs with identical message histories share a single LLM summarization call.
@@ -112,51 +190,100 @@ class Summaries(Remembering):
 
         npcs_with_shared_threads = self.group_shared_threads(npc_message_threads)
 
-        # Track per-NPC summaries for pending_shares
-        npc_summaries: Dict[str, str] = {}
-
         # Set a lower threshold for reloads to capture brief interactions, 
         # and a higher threshold for normal saves to avoid trivial summaries (eg "Guard: Hello there. Player: Goodbye.").
         # Radiant conversations are always valid for summarization regardless of length.
         min_messages = 0 if is_radiant else 2 if is_reload else 5
         player_name = npcs_in_conversation.get_player_name() or "the player"
+        share_targets = self.__get_share_targets(pending_shares, npcs_in_conversation)
 
         for npc_names in npcs_with_shared_threads:
-            # Generate one summary per unique conversation experience
-            summary = self.__create_new_conversation_summary(npc_message_threads[npc_names[0]], world_id, end_timestamp, min_messages=min_messages, player_name=player_name)
-
-            # Write the same summary to all NPCs who heard the same messages
+            # Generate one summary per unique conversation experience and write it to all NPCs who heard the same messages
+            npc_info = npc_message_threads[npc_names[0]]
+            targets: list[dict] = []
             for npc_name in npc_names:
-                npc_summaries[npc_name] = summary
-                if summary or is_reload:
-                    character = next(c for c in npcs_to_summarize if c.name == npc_name)
-                    self.__append_new_conversation_summary(summary, character.name, character.ref_id, world_id, player_name, npc_gender=character.gender, npc_race=character.race)
-
-        # Handle pending shares: write summary with prefix to recipient folders
-        if pending_shares:
-            for sharer_name, recipient_name, recipient_ref_id in pending_shares:
-                sharer_summary = npc_summaries.get(sharer_name, '')
-                if not sharer_summary:
+                character = next(c for c in npcs_to_summarize if c.name == npc_name)
+                targets.append({'name': character.name, 'ref_id': character.ref_id, 'gender': character.gender, 'race': character.race, 'share_prefix': None, 'state': 'pending'})
+                targets.extend(share_targets.get(npc_name, []))
+
+            job: SummaryJob = {
+                'world_id': world_id,
+                'player_name': player_name,
+                'is_reload': is_reload,
+                'end_timestamp': end_timestamp,
+                'involved_npcs': [[c.name, c.ref_id] for c in npc_info.characters],
+                'prompt_variables': self.__get_memory_prompt_variables(npc_info, player_name),
+                'text': None,
+                'summary': None,
+                'targets': targets,
+            }
+            if len(npc_info.messages) >= min_messages:
+                job['text'] = npc_info.messages.transform_to_dict_representation(npc_info.messages.get_talk_only())
+            else:
+                logger.info(f"Conversation summary not saved. Not enough dialogue spoken.")
+                if not is_reload:
                     continue
+                job['summary'] = ''
 
-                # Build participant names list, excluding the sharer and annotating the player
-                participant_names = []
-                for npc in npcs_in_conversation.get_all_characters_since_start():
-                    if npc.name == sharer_name:
-                        continue  # Exclude sharer from participant list
-                    participant_names.append(npc.name)
-                # Add the player
-                actual_player_name = npcs_in_conversation.get_player_name()
-                if actual_player_name:
-                    participant_names.append(f"{actual_player_name} (the player)")
-
-                # Create prefixed summary
-                participants_text = ", ".join(participant_names) if participant_names else "others"
-                prefixed_summary = f"{sharer_name} shared with {recipient_name} a conversation with {participants_text}:\n{sharer_summary}"
-
-                # Write to recipient using name and ref_id directly
-                self.__append_new_conversation_summary(prefixed_summary, recipient_name, recipient_ref_id, world_id, player_name)
-                logger.info(f"Shared conversation summary with {recipient_name}")
+            keys = [self.__get_job_key(npc_name, npc_ref_id, world_id) for npc_name, npc_ref_id in job['involved_npcs']]
+            keys.extend(self.__get_job_key(target['name'], target['ref_id'], world_id) for target in targets)
+            self.__job_queue.add_job(job, keys)
+
+    def __get_share_targets(self, pending_shares: list[tuple[str, str, str]] | None, npcs_in_conversation: Characters) -> Dict[str, list[dict]]:
+        """Returns the recipients of shared summaries for each sharer, including the prefix that is written in front of the shared summary"""
+        share_targets: Dict[str, list[dict]] = defaultdict(list)
+        if not pending_shares:
+            return share_targets
+        
+        for sharer_name, recipient_name, recipient_ref_id in pending_shares:
+            # Build participant names list, excluding the sharer and annotating the player
+            participant_names = []
+            for npc in npcs_in_conversation.get_all_characters_since_start():
+                if npc.name == sharer_name:
+                    continue  # Exclude sharer from participant list
+                participant_names.append(npc.name)
+            # Add the player
+            actual_player_name = npcs_in_conversation.get_player_name()
+            if actual_player_name:
+                participant_names.append(f"{actual_player_name} (the player)")
+
+            participants_text = ", ".join(participant_names) if participant_names else "others"
+            share_prefix = f"{sharer_name} shared with {recipient_name} a conversation with {participants_text}:"
+            share_targets[sharer_name].append({'name': recipient_name, 'ref_id': recipient_ref_id, 'gender': '', 'race': '', 'share_prefix': share_prefix, 'state': 'pending'})
+        return share_targets
+
+    def __run_summary_job(self, job: SummaryJob, save_progress: Callable[[], None]):
+        """Creates the summary of a queued job and writes it to all of the job's NPCs.
+        Progress is saved after every step so a retried or resumed job does not summarize or write anything twice
+
+        Args:
+            job (SummaryJob): the job created by save_conversation_state
+            save_progress (Callable[[], None]): stores the current state of the job on disk
+        """
+        world_id: str = job['world_id']
+        player_name: str = job['player_name']
+        if job['summary'] is None:
+            job['summary'] = self.__create_new_conversation_summary(job['text'], job['prompt_variables'], [(name, ref_id) for name, ref_id in job['involved_npcs']], world_id, job['end_timestamp'])
+            save_progress()
+        summary: str = job['summary']
+
+        for target in job['targets']:
+            is_shared = target['share_prefix'] is not None
+            # Shared summaries are only written if there is something to share, reloads save even if the summary is empty
+            if not summary and (is_shared or not job['is_reload']):
+                continue
+            if target['state'] == 'pending':
+                if is_shared:
+                    self.__write_conversation_summary(f"{target['share_prefix']}\n{summary}", target['name'], target['ref_id'], world_id)
+                    logger.info(f"Shared conversation summary with {target['name']}")
+                else:
+                    self.__write_conversation_summary(summary, target['name'], target['ref_id'], world_id)
+                target['state'] = 'written'
+                save_progress()
+            if target['state'] == 'written':
+                self.__resummarize_if_too_long(target['name'], target['ref_id'], world_id, player_name, target['gender'], target['race'])
+                target['state'] = 'done'
+                save_progress()
 
     @utils.time_it
     def get_threads_for_summarization(self, all_messages: message_thread, npcs_in_conversation: Characters) -> Dict[str, CharacterSummaryParameters]:
@@ -241,6 +368,12 @@ class Summaries(Remembering):
         # Remove trailing numbers from character names (e.g., "Whiterun Guard 1" -> "Whiterun Guard")
         base_name: str = utils.remove_trailing_number(npc_name)
         name_ref: str = f'{base_name} - {npc_ref_id}'
+        index_key = self.__get_summary_index_key(npc_name, npc_ref_id, world_id)
+        folders_version = self.__get_summary_folders_version(npc_name, npc_ref_id, world_id)
+        with Summaries.__summary_index_lock:
+            cached_summary_file = Summaries.__latest_summary_files.get(index_key)
+        if cached_summary_file and cached_summary_file[1] == folders_version:
+            return cached_summary_file[0]
         
         def get_folder_path(folder_name: str) -> str:
             return os.path.join(self.__game.conversation_folder_path, world_id, folder_name).replace(os.sep, '/')
@@ -272,70 +405,74 @@ class Summaries(Remembering):
             logger.info(f"{name_ref_path} does not exist. A new summary file will be created.")
         
         latest_file_number = get_latest_file_number(target_folder)
-        return f"{target_folder}/{base_name}_summary_{latest_file_number}.txt"
+        latest_summary_file = f"{target_folder}/{base_name}_summary_{latest_file_number}.txt"
+        with Summaries.__summary_index_lock:
+            Summaries.__latest_summary_files[index_key] = (latest_summary_file, folders_version)
+        return latest_summary_file
+
+    def __get_summary_index_key(self, npc_name: str, npc_ref_id: str, world_id: str) -> str:
+        return os.path.join(self.__game.conversation_folder_path, self.__get_job_key(npc_name, npc_ref_id, world_id))
+
+    def __get_summary_folders_version(self, npc_name: str, npc_ref_id: str, world_id: str) -> tuple[tuple[int, int] | None, ...]:
+        """Returns the (mtime, size) of both the name_ref and the legacy summary folder of the NPC, which change whenever a summary file is added or removed"""
+        base_name: str = utils.remove_trailing_number(npc_name)
+        world_folder = os.path.join(self.__game.conversation_folder_path, world_id)
+        return (Summaries.__get_file_version(os.path.join(world_folder, f'{base_name} - {npc_ref_id}')), Summaries.__get_file_version(os.path.join(world_folder, base_name)))
     
-    @utils.time_it
-    def __create_new_conversation_summary(self, npc_info: CharacterSummaryParameters, world_id: str, end_timestamp: float | None = None, min_messages: int = 5, player_name: str = "the player") -> str:
+    def __get_memory_prompt_variables(self, npc_info: CharacterSummaryParameters, player_name: str) -> dict[str, str]:
+        """Returns the variables of the memory prompt that are known when the conversation ends. The previous summaries are added when the summary is created"""
         if self.__config.game.base_game == GameEnum.FALLOUT4:
             location: str = 'the Commonwealth'
         else:
             location: str = "Skyrim"
 
-        bios = '\n\n'.join([f"{c.name}: {c.bio}" for c in npc_info.characters])
-        names = ', '.join([c.name for c in npc_info.characters])
-        genders = get_genders_text(npc_info.characters)
-        races = get_races_text(npc_info.characters)
-        genders_and_races = get_genders_and_races_text(npc_info.characters)
+        return {
+            'name': ', '.join([c.name for c in npc_info.characters]),
+            'language': self.__language_name,
+            'game': location,
+            'bios': '\n\n'.join([f"{c.name}: {c.bio}" for c in npc_info.characters]),
+            'player_name': player_name,
+            'genders': get_genders_text(npc_info.characters),
+            'races': get_races_text(npc_info.characters),
+            'genders_and_races': get_genders_and_races_text(npc_info.characters)
+        }
 
+    @utils.time_it
+    def __create_new_conversation_summary(self, text_to_summarize: str, prompt_variables: dict[str, str], involved_npcs: list[tuple[str, str]], world_id: str, end_timestamp: float | None = None) -> str:
         prompt = self.__memory_prompt.format(
-                    name=names,
-                    language=self.__language_name,
-                    game=location,
-                    bios=bios,
-                    conversation_summaries=self.get_prompt_text(npc_info.characters, world_id),
-                    player_name=player_name,
-                    genders=genders,
-                    races=races,
-                    genders_and_races=genders_and_races
+                    conversation_summaries=self.__read_prompt_text(involved_npcs, world_id),
+                    **prompt_variables
                 )
-        while True:
-            try:
-                if len(npc_info.messages) >= min_messages:
-                    summary = self.summarize_conversation(npc_info.messages.transform_to_dict_representation(npc_info.messages.get_talk_only()), prompt)
-                    # Prepend timestamp to summary if available
-                    if summary and end_timestamp is not None and self.__config.memory_prompt_datetime_prefix:
-                        timestamp_prefix = self.__format_timestamp(end_timestamp)
-                        summary = f"{timestamp_prefix}\n{summary}"
-                    return summary
-                else:
-                    logger.info(f"Conversation summary not saved. Not enough dialogue spoken.")
-                break
-            except Exception:
-                logger.error('Failed to summarize conversation. Retrying...')
-                time.sleep(5)
-                continue
-        return ""
+        summary = self.summarize_conversation(text_to_summarize, prompt)
+        # Prepend timestamp to summary if available
+        if summary and end_timestamp is not None and self.__config.memory_prompt_datetime_prefix:
+            timestamp_prefix = self.__format_timestamp(end_timestamp)
+            summary = f"{timestamp_prefix}\n{summary}"
+        return summary
 
     @utils.time_it
-    def __append_new_conversation_summary(self, new_summary: str, npc_name: str, npc_ref_id: str, world_id: str, player_name: str = "the player", npc_gender: str = "", npc_race: str = ""):
-        """Append a new conversation summary."""
+    def __write_conversation_summary(self, new_summary: str, npc_name: str, npc_ref_id: str, world_id: str):
+        """Appends a new conversation summary to the latest summary file of the NPC."""
         conversation_summary_file = self.__get_latest_conversation_summary_file_path(npc_name, npc_ref_id, world_id)
-        if os.path.exists(conversation_summary_file):
-            with open(conversation_summary_file, 'r', encoding='utf-8') as f:
-                previous_conversation_summaries = f.read()
-        else:
+        if not os.path.exists(conversation_summary_file):
             directory = os.path.dirname(conversation_summary_file)
             os.makedirs(directory, exist_ok=True)
-            previous_conversation_summaries = ''
        
         if len(new_summary) > 0:
             logger.info(f"Saving conversation summary for {npc_name} to: {conversation_summary_file}")
+            with open(conversation_summary_file, 'a', encoding='utf-8') as f:
+                f.write(new_summary)
+            self.__invalidate_summary_file(conversation_summary_file)
 
-            conversation_summaries = previous_conversation_summaries + new_summary
-            with open(conversation_summary_file, 'w', encoding='utf-8') as f:
-                f.write(conversation_summaries)
+    @utils.time_it
+    def __resummarize_if_too_long(self, npc_name: str, npc_ref_id: str, world_id: str, player_name: str = "the player", npc_gender: str = "", npc_race: str = ""):
+        """Summarizes the latest summary file of the NPC into a new file once it has reached the token limit for summaries."""
+        conversation_summary_file = self.__get_latest_conversation_summary_file_path(npc_name, npc_ref_id, world_id)
+        if os.path.exists(conversation_summary_file):
+            with open(conversation_summary_file, 'r', encoding='utf-8') as f:
+                conversation_summaries = f.read()
         else:
-            conversation_summaries = previous_conversation_summaries
+            conversation_summaries = ''
 
         summary_limit = int(self.__client.token_limit * self.__summary_limit_pct)
 
@@ -343,22 +480,15 @@ class Summaries(Remembering):
         # if summaries token limit is reached, summarize the summaries
         if count_tokens_summaries > summary_limit:
             logger.info(f'Token limit of conversation summaries reached ({count_tokens_summaries} / {summary_limit} tokens). Creating new summary file...')
-            while True:
-                try:
-                    prompt = self.__resummarize_prompt.format(
-                        name=npc_name,
-                        language=self.__language_name,
-                        game=self.__game.game_name_in_filepath,
-                        player_name=player_name,
-                        gender=npc_gender,
-                        race=npc_race
-                    )
-                    long_conversation_summary = self.summarize_conversation(conversation_summaries, prompt)
-                    break
-                except Exception:
-                    logger.error('Failed to summarize conversation. Retrying...')
-                    time.sleep(5)
-                    continue
+            prompt = self.__resummarize_prompt.format(
+                name=npc_name,
+                language=self.__language_name,
+                game=self.__game.game_name_in_filepath,
+                player_name=player_name,
+                gender=npc_gender,
+                race=npc_race
+            )
+            long_conversation_summary = self.summarize_conversation(conversation_summaries, prompt)
 
             # Split the file path and increment the number by 1
             base_directory, filename = os.path.split(conversation_summary_file)
@@ -369,6 +499,10 @@ class Summaries(Remembering):
 
             with open(new_conversation_summary_file, 'w', encoding='utf-8') as f:
                 f.write(long_conversation_summary)
+            self.__invalidate_summary_file(new_conversation_summary_file)
+            folders_version = self.__get_summary_folders_version(npc_name, npc_ref_id, world_id)
+            with Summaries.__summary_index_lock:
+                Summaries.__latest_summary_files[self.__get_summary_index_key(npc_name, npc_ref_id, world_id)] = (new_conversation_summary_file.replace(os.sep, '/'), folders_version)
 
     @utils.time_it
     def __format_timestamp(self, game_days: float) -> str:
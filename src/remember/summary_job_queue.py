@@ -0,0 +1,215 @@
+import json
+import os
+import time
+from threading import Condition, Lock, Thread
+from typing import Any, Callable
+from src import utils
+
+logger = utils.get_logger()
+
+
+SummaryJob = dict[str, Any]
+SummaryJobHandler = Callable[[SummaryJob, Callable[[], None]], None]
+
+
+class SummaryJobQueue:
+    """A durable queue of summarization jobs that are processed by background worker threads.
+
+    Every job is stored as a JSON file in the queue folder until it has been completed,
+    so jobs that were still pending when Mantella was closed are picked up again on the next start.
+    Each job lists the keys (eg the NPCs) it writes to. Jobs sharing a key are run one after another in the order they were added,
+    jobs without shared keys are run concurrently up to `max_concurrent_jobs`.
+    Jobs that keep failing are given up after `max_attempts` and their file is kept with a '.failed' extension.
+    """
+    max_concurrent_jobs: int = 2
+    max_attempts: int = 5
+    retry_delay_seconds: float = 5
+    max_retry_delay_seconds: float = 300
+
+    def __init__(self, queue_folder: str) -> None:
+        self.__queue_folder: str = queue_folder
+        self.__condition: Condition = Condition()
+        self.__jobs: list[SummaryJob] = []
+        self.__running_keys: set[str] = set()
+        self.__retry_times: dict[int, float] = {}
+        self.__handler: SummaryJobHandler | None = None
+        self.__next_job_id: int = 1
+        self.__workers: list[Thread] = []
+        self.__load_jobs()
+
+    @property
+    def queue_folder(self) -> str:
+        return self.__queue_folder
+
+    def set_handler(self, handler: SummaryJobHandler):
+        """Sets the function that processes the jobs and starts the workers if they are not running yet.
+        The handler may update the job dict and call the passed save function to store its progress on disk.
+        If the handler raises an exception, the job is retried with an increasing delay up to `max_attempts` times
+
+        Args:
+            handler (SummaryJobHandler): the function to process a single job with
+        """
+        with self.__condition:
+            self.__handler = handler
+            while len(self.__workers) < self.max_concurrent_jobs:
+                worker = Thread(target=self.__work, name=f"summary_worker_{len(self.__workers) + 1}", daemon=True)
+                self.__workers.append(worker)
+                worker.start()
+            self.__condition.notify_all()
+
+    def add_job(self, job: SummaryJob, keys: list[str]):
+        """Stores a new job on disk and queues it for processing
+
+        Args:
+            job (SummaryJob): the JSON serializable job data
+            keys (list[str]): the keys the job writes to
+        """
+        with self.__condition:
+            job['id'] = self.__next_job_id
+            job['keys'] = sorted(set(keys))
+            job['attempts'] = 0
+            self.__next_job_id += 1
+            self.__save_job(job)
+            self.__jobs.append(job)
+            self.__condition.notify_all()
+
+    def has_pending_jobs(self, keys: list[str] | None = None) -> bool:
+        with self.__condition:
+            return self.__has_pending_jobs(set(keys) if keys is not None else None)
+
+    def wait_for_jobs(self, keys: list[str] | None = None, timeout: float | None = None) -> bool:
+        """Blocks until all queued and running jobs that write to any of the keys have completed
+
+        Args:
+            keys (list[str] | None): the keys to wait for. Waits for all jobs if None
+            timeout (float | None): the maximum time to wait in seconds
+
+        Returns:
+            bool: True if no matching jobs are left, False if the timeout was reached
+        """
+        keys_to_wait_for = set(keys) if keys is not None else None
+        with self.__condition:
+            return self.__condition.wait_for(lambda: not self.__has_pending_jobs(keys_to_wait_for), timeout)
+
+    def __has_pending_jobs(self, keys: set[str] | None) -> bool:
+        if keys is None:
+            return len(self.__jobs) > 0
+        return any(not keys.isdisjoint(job['keys']) for job in self.__jobs)
+
+    def __work(self):
+        while True:
+            with self.__condition:
+                job = self.__get_next_job()
+                while not job:
+                    self.__condition.wait(self.__get_time_until_next_retry())
+                    job = self.__get_next_job()
+                self.__running_keys.update(job['keys'])
+                handler = self.__handler
+
+            succeeded = False
+            try:
+                handler(job, lambda: self.__save_job(job))
+                succeeded = True
+            except Exception as e:
+                logger.error(f"Summary job {job['id']} failed: {e}")
+
+            with self.__condition:
+                self.__running_keys.difference_update(job['keys'])
+                if succeeded:
+                    self.__jobs.remove(job)
+                    self.__retry_times.pop(job['id'], None)
+                    self.__delete_job(job)
+                elif job['attempts'] + 1 >= self.max_attempts:
+                    self.__jobs.remove(job)
+                    self.__retry_times.pop(job['id'], None)
+                    self.__fail_job(job)
+                    logger.error(f"Giving up on summary job {job['id']} after {self.max_attempts} attempts. The job has been kept at '{self.__get_job_path(job)}.failed'")
+                else:
+                    job['attempts'] += 1
+                    delay = min(self.retry_delay_seconds * (2 ** (job['attempts'] - 1)), self.max_retry_delay_seconds)
+                    self.__retry_times[job['id']] = time.monotonic() + delay
+                    self.__save_job(job)
+                    logger.info(f"Retrying summary job {job['id']} in {delay:.0f} seconds...")
+                self.__condition.notify_all()
+
+    def __get_next_job(self) -> SummaryJob | None:
+        """Returns the first job that is ready to run. A job has to wait for running jobs and earlier queued jobs that share one of its keys"""
+        if not self.__handler:
+            return None
+        blocked_keys: set[str] = set(self.__running_keys)
+        now = time.monotonic()
+        for job in self.__jobs:
+            job_keys = job['keys']
+            is_ready = blocked_keys.isdisjoint(job_keys) and self.__retry_times.get(job['id'], 0) <= now
+            blocked_keys.update(job_keys)
+            if is_ready:
+                return job
+        return None
+
+    def __get_time_until_next_retry(self) -> float | None:
+        if not self.__retry_times:
+            return None
+        return max(min(self.__retry_times.values()) - time.monotonic(), 0)
+
+    def __get_job_path(self, job: SummaryJob) -> str:
+        return os.path.join(self.__queue_folder, f"{job['id']:010d}.json")
+
+    def __save_job(self, job: SummaryJob):
+        os.makedirs(self.__queue_folder, exist_ok=True)
+        job_path = self.__get_job_path(job)
+        temp_path = f"{job_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(temp_path, job_path)
+
+    def __delete_job(self, job: SummaryJob):
+        try:
+            os.remove(self.__get_job_path(job))
+        except FileNotFoundError:
+            pass
+
+    def __fail_job(self, job: SummaryJob):
+        """Keeps the job on disk under a name that is not loaded again"""
+        job['attempts'] += 1
+        self.__save_job(job)
+        job_path = self.__get_job_path(job)
+        os.replace(job_path, f"{job_path}.failed")
+
+    def __load_jobs(self):
+        """Loads the jobs that were not completed in a previous session"""
+        if not os.path.exists(self.__queue_folder):
+            return
+        for file_name in sorted(os.listdir(self.__queue_folder)):
+            if not file_name.endswith('.json'):
+                continue
+            file_path = os.path.join(self.__queue_folder, file_name)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not load summary job '{file_path}': {e}")
+                continue
+            self.__jobs.append(job)
+            self.__next_job_id = max(self.__next_job_id, job['id'] + 1)
+        if self.__jobs:
+            logger.info(f"Resuming {len(self.__jobs)} unfinished conversation summaries...")
+
+
+_queues: dict[str, SummaryJobQueue] = {}
+_queues_lock: Lock = Lock()
+
+
+def get_summary_job_queue(queue_folder: str) -> SummaryJobQueue:
+    """Returns the job queue for a folder. Only one queue is created per folder so that jobs are never processed twice
+
+    Args:
+        queue_folder (str): the folder the jobs are stored in
+
+    Returns:
+        SummaryJobQueue: the job queue of the folder
+    """
+    queue_folder = os.path.abspath(queue_folder)
+    with _queues_lock:
+        if queue_folder not in _queues:
+            _queues[queue_folder] = SummaryJobQueue(queue_folder)
+        return _queues[queue_folder]
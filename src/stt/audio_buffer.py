@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class AudioBuffer:
+    """Preallocated buffer of mic input samples that is reused between utterances.
+
+    Chunks are copied into a single float32 array instead of concatenating a new array for every chunk,
+    so appending a chunk costs the same regardless of how much speech has already been captured.
+    When only the pre-roll (the last few chunks before speech is detected) is kept, older samples are dropped by moving the start of the buffer,
+    and the remaining samples are moved back to the front once the end of the array is reached.
+    The array only grows (by doubling) if an utterance does not fit into it, and is never shrunk.
+    """
+
+    def __init__(self, initial_capacity: int) -> None:
+        self.__data: np.ndarray = np.zeros(max(initial_capacity, 1), dtype=np.float32)
+        self.__start: int = 0
+        self.__end: int = 0
+
+    def __len__(self) -> int:
+        return self.__end - self.__start
+
+    @property
+    def capacity(self) -> int:
+        """The number of samples that fit into the buffer before it has to grow"""
+        return len(self.__data)
+
+    def append(self, chunk: np.ndarray) -> None:
+        """Copies a chunk of samples to the end of the buffer
+
+        Args:
+            chunk (np.ndarray): 1D array of float32 samples
+        """
+        chunk_length = len(chunk)
+        if self.__end + chunk_length > len(self.__data):
+            self.__make_room(chunk_length)
+        self.__data[self.__end:self.__end + chunk_length] = chunk
+        self.__end += chunk_length
+
+    def keep_last(self, length: int) -> None:
+        """Drops all but the last `length` samples without copying them
+
+        Args:
+            length (int): the number of samples to keep
+        """
+        if len(self) > length:
+            self.__start = self.__end - length
+
+    def clear(self) -> None:
+        """Empties the buffer while keeping its memory for the next utterance"""
+        self.__start = 0
+        self.__end = 0
+
+    def view(self) -> np.ndarray:
+        """Returns the buffered samples without copying them.
+        The returned array shares memory with the buffer, so it is only valid until the buffer is next changed
+
+        Returns:
+            np.ndarray: 1D array of float32 samples
+        """
+        return self.__data[self.__start:self.__end]
+
+    def __make_room(self, chunk_length: int) -> None:
+        length = len(self)
+        required_capacity = length + chunk_length
+        if required_capacity * 2 <= len(self.__data):
+            # Enough of the array is free once the dropped samples are discarded, so move the kept samples to the front
+            self.__data[:length] = self.__data[self.__start:self.__end]
+        else:
+            data = np.zeros(max(len(self.__data) * 2, required_capacity), dtype=np.float32)
+            data[:length] = self.__data[self.__start:self.__end]
+            self.__data = data
+        self.__start = 0
+        self.__end = length
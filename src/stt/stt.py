@@ -4,8 +4,12 @@ from faster_whisper import WhisperModel
 from src.config.config_loader import ConfigLoader
 from src.llm.client_base import ClientBase
 from src.stt.ptt_controller import PTTController
+from src.stt.audio_buffer import AudioBuffer
+from src.stt.vad_pool import get_vad_pool
 import src.utils as utils
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import io
 from pathlib import Path
@@ -19,7 +23,6 @@ import os
 import wave
 if TYPE_CHECKING:
     from sounddevice import InputStream
-from silero_vad_lite import SileroVAD
 
 logger = utils.get_logger()
 
@@ -39,6 +42,15 @@ class Transcriber:
     CHUNK_DURATION = CHUNK_SIZE / SAMPLING_RATE  # Explicit calculation of chunk duration in seconds
     LOOKBACK_CHUNKS = 5  # Number of chunks to keep in buffer when not recording
     MIN_PTT_DURATION = 0.3  # Minimum seconds of audio to accept from a PTT press
+    INCREMENTAL_TAIL_SECONDS = 4  # Seconds at the end of an utterance that are always decoded again in proactive mode, as the words in them may still change
+    PREALLOCATED_BUFFER_SECONDS = 30  # Seconds of mic input to reserve memory for up front (the buffer grows for longer listen timeouts)
+    TRANSCRIPTION_TIMEOUT = 30  # Seconds to wait for a response from an external Whisper service
+    TRANSCRIPTION_RETRIES = 2
+
+    # Connections to external Whisper services are shared by all Transcribers, so they stay open when mic input is turned off and on again
+    __openai_clients: dict[tuple[str, str | None], OpenAI] = {}
+    __sessions: dict[str, requests.Session] = {}
+    __clients_lock = threading.Lock()
     
     @utils.time_it
     def __init__(self, config: ConfigLoader):
@@ -66,6 +78,8 @@ class Transcriber:
         self.pause_threshold = config.pause_threshold
         self._temporary_pause_override: float | None = None  # Temporary pause threshold for Listen action
         self.audio_threshold = config.audio_threshold
+        # Local models in proactive mode only decode the part of an utterance that has not been committed yet
+        self.__incremental_transcription = False
         logger.log(self.loglevel, f"Audio threshold set to {self.audio_threshold}. If the mic is not picking up your voice, try lowering this `Speech-to-Text`->`Audio Threshold` value in the Mantella UI. If the mic is picking up too much background noise, try increasing this value.\n")
 
         # PTT settings
@@ -85,9 +99,8 @@ class Transcriber:
 
         self.__stt_service_name = config.whisper_url
         self.__api_key: str | None = self.__get_api_key()
-        self.__initial_client: OpenAI | None = None
         if (self.stt_service == 'whisper') and (self.__api_key) and ('openai' in self.whisper_url) and (self.external_whisper_service):
-            self.__initial_client = self.__generate_sync_client() # initialize first client in advance to save time
+            self.__get_openai_client() # initialize client in advance to save time
 
         self.__ignore_list = ['', 'thank you', 'thank you for watching', 'thanks for watching', 'the transcript is from the', 'the', 'thank you very much', "thank you for watching and i'll see you in the next video", "we'll see you in the next video", 'see you next time']
 
@@ -125,12 +138,16 @@ class Transcriber:
                 logger.log(self.loglevel, 'Loading Moonshine model from Hugging Face...')
                 self.transcribe_model = MoonshineOnnxModel(model_name=self.moonshine_model, model_precision=self.moonshine_precision)
             self.tokenizer = load_tokenizer()
+
+        if self.proactive_mic_mode and self.transcribe_model:
+            self.__incremental_transcription = True
         
-        # Initialize VAD
-        self.vad = SileroVAD(self.SAMPLING_RATE)
+        # Initialize VAD. The model is loaded once and only has its state reset between utterances
+        self.__vad_pool = get_vad_pool(self.SAMPLING_RATE)
+        self.vad = self.__vad_pool.acquire()
         
         # Audio processing state
-        self._audio_buffer = np.array([], dtype=np.float32)
+        self._audio_buffer = AudioBuffer(int(self.SAMPLING_RATE * min(self.listen_timeout, self.PREALLOCATED_BUFFER_SECONDS)) + self.CHUNK_SIZE)
         self._audio_queue = queue.Queue()
         self._stream: Optional[InputStream] = None
         
@@ -150,6 +167,12 @@ class Transcriber:
         self._consecutive_empty_count = 0
         self._max_consecutive_empty = 10
 
+        # Incremental transcription state (proactive mode with a local model)
+        self._committed_samples = 0 # Samples at the start of the utterance that have been transcribed for good
+        self._committed_text = ''
+        self._tail_words: list[str] = [] # Words of the last decoded tail that have not been committed yet
+        self._pause_samples: list[int] = [] # Positions in the utterance where the VAD did not detect speech
+
     @property
     def is_listening(self) -> bool:
         """Returns True if actively listening."""
@@ -172,20 +195,32 @@ class Transcriber:
         """
         with self._lock:
             self._temporary_pause_override = pause_seconds
-            # If already listening and speech hasn't been detected yet, recreate VAD iterator with new pause threshold
-            if self._running and not self._speech_detected:
-                self.vad_iterator = self._create_vad_iterator()
         
 
     @utils.time_it
-    def __generate_sync_client(self):
-        if self.__initial_client:
-            client = self.__initial_client
-            self.__initial_client = None # do not reuse the same client
-        else:
-            client = OpenAI(api_key=self.__api_key, base_url=self.whisper_url)
-
+    def __get_openai_client(self) -> OpenAI:
+        """Returns the client for the configured OpenAI compatible endpoint, which keeps its connections open between transcriptions"""
+        client_key = (self.whisper_url, self.__api_key)
+        with Transcriber.__clients_lock:
+            client = Transcriber.__openai_clients.get(client_key)
+            if not client:
+                client = OpenAI(api_key=self.__api_key, base_url=self.whisper_url, timeout=self.TRANSCRIPTION_TIMEOUT, max_retries=self.TRANSCRIPTION_RETRIES)
+                Transcriber.__openai_clients[client_key] = client
         return client
+
+
+    def __get_session(self) -> requests.Session:
+        """Returns the keep-alive session for the configured custom Whisper server"""
+        with Transcriber.__clients_lock:
+            session = Transcriber.__sessions.get(self.whisper_url)
+            if not session:
+                session = requests.Session()
+                # servers close idle connections, which shows up as a read error on the next transcription, so POST requests are retried as well
+                retry_adapter = HTTPAdapter(max_retries=Retry(total=self.TRANSCRIPTION_RETRIES, connect=self.TRANSCRIPTION_RETRIES, read=1, backoff_factor=0.1, allowed_methods=None))
+                session.mount('http://', retry_adapter)
+                session.mount('https://', retry_adapter)
+                Transcriber.__sessions[self.whisper_url] = session
+        return session
     
 
     @utils.time_it
@@ -225,7 +260,9 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
         """Transcribe audio using Moonshine model."""
         # Count speech end time from when the last transcribe is called
         self._speech_end_time = time.time()
-        if self.stt_service == 'moonshine':
+        if self.__incremental_transcription:
+            transcription = self._transcribe_incrementally(audio)
+        elif self.stt_service == 'moonshine':
             transcription = self.moonshine_transcribe(audio)
         else:
             transcription = self.whisper_transcribe(audio, self.prompt)
@@ -257,21 +294,13 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
             return result_text
         
         # Server versions of Whisper require the audio data to be a file type
-        audio_file = io.BytesIO()
-        audio_int16 = (audio * 32767).astype(np.int16)
-        with wave.open(audio_file, 'wb') as wf:
-            wf.setnchannels(1)  # Mono audio
-            wf.setsampwidth(2)  # 16-bit audio
-            wf.setframerate(self.SAMPLING_RATE)
-            wf.writeframes(audio_int16.tobytes())
-        audio_file.seek(0)
-        # Audio file needs a name or else Whisper gets angry
-        audio_file.name = 'out.wav'
+        wav_bytes = self.__to_wav_bytes(audio)
 
         if 'openai' in self.whisper_url: # OpenAI compatible endpoint
-            client = self.__generate_sync_client()
+            client = self.__get_openai_client()
             try:
-                response_data = client.audio.transcriptions.create(model=self.whisper_model, language=self.language, file=audio_file, prompt=prompt)
+                # Audio file needs a name or else Whisper gets angry
+                response_data = client.audio.transcriptions.create(model=self.whisper_model, language=self.language, file=('out.wav', wav_bytes), prompt=prompt)
             except Exception as e:
                 utils.play_error_sound()
                 if e.code in [404, 'model_not_found']:
@@ -284,14 +313,13 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
                 else:
                     logger.error(f'STT error: {e}')
                 input("Press Enter to exit.")
-            client.close()
             if utils.clean_text(response_data.text) in self.__ignore_list: # common phrases hallucinated by Whisper
                 return ''
             return response_data.text.strip()
         else: # custom server model
             data = {'model': self.whisper_model, 'prompt': prompt}
-            files = {'file': ('audio.wav', audio_file, 'audio/wav')}
-            response = requests.post(self.whisper_url, files=files, data=data)
+            files = {'file': ('audio.wav', wav_bytes, 'audio/wav')}
+            response = self.__get_session().post(self.whisper_url, files=files, data=data, timeout=self.TRANSCRIPTION_TIMEOUT)
             if response.status_code != 200:
                 logger.error(f'STT Error: {response.content}')
             response_data = json.loads(response.text)
@@ -304,11 +332,77 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
     @utils.time_it
     def moonshine_transcribe(self, audio: np.ndarray) -> str:
         """Transcribe audio using Moonshine model"""
-        tokens = self.transcribe_model.generate(audio[np.newaxis, :].astype(np.float32))
-        text = self.tokenizer.decode_batch(tokens)[0]
+        text = self.__moonshine_decode(audio)
         text = self.ensure_sentence_ending(text)
         
         return text
+
+
+    def __moonshine_decode(self, audio: np.ndarray) -> str:
+        tokens = self.transcribe_model.generate(audio[np.newaxis, :].astype(np.float32))
+        return self.tokenizer.decode_batch(tokens)[0]
+
+
+    @utils.time_it
+    def _transcribe_incrementally(self, audio: np.ndarray) -> str:
+        """Transcribe a growing utterance by only decoding the part after the committed prefix.
+
+        The start of the decoded tail is committed once it can no longer change, so the tail stays roughly INCREMENTAL_TAIL_SECONDS long
+        no matter how long the player keeps talking. Whisper commits words by their timestamps once two decodes in a row agree on them.
+        Moonshine does not provide timestamps, so the audio is committed up to a pause detected by the VAD instead.
+
+        Args:
+            audio: All samples of the utterance so far, starting from the same sample as in previous calls.
+
+        Returns:
+            The committed text followed by the transcription of the tail.
+        """
+        if self.stt_service == 'moonshine':
+            tail_text = self.__moonshine_transcribe_tail(audio)
+            return self.ensure_sentence_ending(f'{self._committed_text} {tail_text}'.strip())
+        tail_text = self.__whisper_transcribe_tail(audio)
+        return f'{self._committed_text}{tail_text}'.strip()
+
+
+    def __whisper_transcribe_tail(self, audio: np.ndarray) -> str:
+        tail = audio[self._committed_samples:]
+        prompt = f'{self.prompt}{self._committed_text}'
+        segments, _ = self.transcribe_model.transcribe(tail, task=self.task, language=self.language, beam_size=5, vad_filter=False, initial_prompt=prompt, word_timestamps=True)
+        words = [word for segment in segments for word in (segment.words or [])]
+
+        # Commit the words that the previous decode agreed on, as long as they end before the tail window
+        stable_end = (len(tail) / self.SAMPLING_RATE) - self.INCREMENTAL_TAIL_SECONDS
+        committed_count = 0
+        for word, previous_word in zip(words, self._tail_words):
+            if word.end > stable_end or utils.clean_text(word.word) != utils.clean_text(previous_word):
+                break
+            committed_count += 1
+
+        if committed_count > 0:
+            last_committed_word = words[committed_count - 1]
+            # Cut between the last committed word and the next one, as word timestamps are not exact
+            cut_time = (last_committed_word.end + words[committed_count].start) / 2 if committed_count < len(words) else last_committed_word.end
+            self._committed_samples += int(cut_time * self.SAMPLING_RATE)
+            self._committed_text += ''.join(word.word for word in words[:committed_count])
+            words = words[committed_count:]
+        self._tail_words = [word.word for word in words]
+
+        tail_text = ''.join(word.word for word in words)
+        if utils.clean_text(tail_text) in self.__ignore_list: # common phrases hallucinated by Whisper
+            return ''
+        return tail_text
+
+
+    def __moonshine_transcribe_tail(self, audio: np.ndarray) -> str:
+        # Commit everything up to the latest pause that is older than the tail window
+        stable_end = len(audio) - int(self.INCREMENTAL_TAIL_SECONDS * self.SAMPLING_RATE)
+        pauses = [pause for pause in self._pause_samples if self._committed_samples < pause <= stable_end]
+        if pauses:
+            committed_text = self.__moonshine_decode(audio[self._committed_samples:pauses[-1]]).strip()
+            self._committed_text = f'{self._committed_text} {committed_text}'.strip()
+            self._committed_samples = pauses[-1]
+            self._pause_samples = [pause for pause in self._pause_samples if pause > self._committed_samples]
+        return self.__moonshine_decode(audio[self._committed_samples:]).strip()
     
 
     def ensure_sentence_ending(self, text: str) -> str:
@@ -399,10 +493,10 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
         """
         if transcribe and len(self._audio_buffer) > 0:
             transcription_start_time = time.time()
-            self._current_transcription = self._transcribe(self._audio_buffer)
+            self._current_transcription = self._transcribe(self._audio_buffer.view())
             logger.log(self.loglevel, f'STT took {round(time.time() - transcription_start_time, 5)} seconds to transcribe')
         if save and self.__save_mic_input and len(self._audio_buffer) > 0:
-            self._save_audio(self._audio_buffer)
+            self._save_audio(self._audio_buffer.view())
         self._transcription_ready.set()
         # capture whether a transcription is pending, since _reset_state clears the speech flags
         has_transcription = bool(self._current_transcription and self._current_transcription.strip())
@@ -422,7 +516,7 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
 
         if is_pressed:
             # Accumulate audio while key is held
-            self._audio_buffer = np.concatenate((self._audio_buffer, chunk))
+            self._audio_buffer.append(chunk)
             if not self._ptt_active:
                 logger.log(self.loglevel, 'PTT pressed')
                 self._ptt_active = True
@@ -440,7 +534,7 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
                 self._reset_state()
         else:
             # Idle: clear buffer so stale data doesn't accumulate
-            self._audio_buffer = np.array([], dtype=np.float32)
+            self._audio_buffer.clear()
 
         # Timeout guard: prevent unbounded buffering from a stuck key
         if self._ptt_active and (len(self._audio_buffer) / self.SAMPLING_RATE) > self.listen_timeout:
@@ -462,10 +556,10 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
             The (possibly reset) chunk_count for the caller to carry forward.
         """
         # Update audio buffer
-        self._audio_buffer = np.concatenate((self._audio_buffer, chunk))
+        self._audio_buffer.append(chunk)
         if not self._speech_detected:
             # Keep limited lookback buffer when not recording
-            self._audio_buffer = self._audio_buffer[-lookback_size:]
+            self._audio_buffer.keep_last(lookback_size)
 
         # Process with VAD
         probability = self.vad.process(chunk)
@@ -476,6 +570,8 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
         if probability > self.audio_threshold and not self._speech_detected:
             logger.log(self.loglevel, 'Speech detected')
             self._speech_detected = True
+        elif probability <= self.audio_threshold and self._speech_detected and self.__incremental_transcription:
+            self._pause_samples.append(len(self._audio_buffer) - len(chunk))
 
         effective_pause = self._temporary_pause_override if self._temporary_pause_override is not None else self.pause_threshold
         if probability <= self.audio_threshold and self._speech_detected and time.time() - self._last_update_time > effective_pause:
@@ -496,7 +592,7 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
         # Periodic proactive transcription update
         if self.proactive_mic_mode and chunk_count >= self.refresh_freq:
             logger.debug(f'Transcribing {self.min_refresh_secs} of mic input...')
-            self._current_transcription = self._transcribe(self._audio_buffer)
+            self._current_transcription = self._transcribe(self._audio_buffer.view())
 
             if self._consecutive_empty_count >= self._max_consecutive_empty:
                 logger.warning(f'Could not transcribe input')
@@ -529,22 +625,34 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
             self._ptt_active = False
         except Exception:
             pass
-        self._audio_buffer = np.array([], dtype=np.float32)
-        self.vad = SileroVAD(self.SAMPLING_RATE)
+        self._audio_buffer.clear()
+        self.vad.reset()
         self._consecutive_empty_count = 0
+        self._committed_samples = 0
+        self._committed_text = ''
+        self._tail_words = []
+        self._pause_samples = []
 
 
     @utils.time_it
     def _save_audio(self, audio: np.ndarray) -> None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         audio_path = os.path.join(self.__mic_input_path, f'mic_input_{timestamp}.wav')
-        with wave.open(audio_path, 'wb') as wf:
+        with open(audio_path, 'wb') as f:
+            f.write(self.__to_wav_bytes(audio))
+
+
+    def __to_wav_bytes(self, audio: np.ndarray) -> bytes:
+        """Encodes float32 samples as an in-memory 16-bit mono WAV file"""
+        audio_file = io.BytesIO()
+        with wave.open(audio_file, 'wb') as wf:
             wf.setnchannels(1)  # Mono audio
             wf.setsampwidth(2)  # 16-bit audio
             wf.setframerate(self.SAMPLING_RATE)
             # Convert float32 to int16
             audio_int16 = (audio * 32767).astype(np.int16)
             wf.writeframes(audio_int16.tobytes())
+        return audio_file.getvalue()
 
 
     @utils.time_it
@@ -629,6 +737,15 @@ If you would prefer to run speech-to-text locally, please ensure the `Speech-to-
         logger.log(self.loglevel, 'Stopped listening for mic input')
 
 
+    def close(self) -> None:
+        """Stop listening and hand the VAD model back to the pool so that the next Transcriber does not need to load it again.
+        The Transcriber must not be used after it is closed."""
+        self.stop_listening()
+        if self.vad:
+            self.__vad_pool.release(self.vad)
+            self.vad = None
+
+
     @staticmethod
     @utils.time_it
     def activation_name_exists(transcript: str, activation_names: str | list[str]) -> bool:
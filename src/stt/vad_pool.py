@@ -0,0 +1,61 @@
+from threading import Lock
+from silero_vad_lite import SileroVAD
+import src.utils as utils
+
+logger = utils.get_logger()
+
+
+class VADPool:
+    """Keeps loaded Silero VAD models so that they can be handed from one Transcriber to the next.
+
+    Loading the model is much slower than resetting its state, so a VAD model is only created if no released model is available.
+    A model must only be used by one Transcriber at a time.
+    """
+
+    def __init__(self, sample_rate: int) -> None:
+        self.__sample_rate: int = sample_rate
+        self.__available: list[SileroVAD] = []
+        self.__lock: Lock = Lock()
+
+    @utils.time_it
+    def acquire(self) -> SileroVAD:
+        """Returns a VAD model with a cleared state, loading a new one if all models are in use
+
+        Returns:
+            SileroVAD: the VAD model, which should be passed to `release` once it is no longer used
+        """
+        with self.__lock:
+            if self.__available:
+                vad = self.__available.pop()
+                vad.reset()
+                return vad
+        logger.debug('Loading Silero VAD model...')
+        return SileroVAD(self.__sample_rate)
+
+    def release(self, vad: SileroVAD) -> None:
+        """Returns a VAD model to the pool
+
+        Args:
+            vad (SileroVAD): a model that was returned by `acquire`
+        """
+        with self.__lock:
+            self.__available.append(vad)
+
+
+_pools: dict[int, VADPool] = {}
+_pools_lock: Lock = Lock()
+
+
+def get_vad_pool(sample_rate: int) -> VADPool:
+    """Returns the VAD pool shared by all Transcribers in this process that use the same sample rate
+
+    Args:
+        sample_rate (int): the sample rate of the mic input
+
+    Returns:
+        VADPool: the pool for the sample rate
+    """
+    with _pools_lock:
+        if sample_rate not in _pools:
+            _pools[sample_rate] = VADPool(sample_rate)
+        return _pools[sample_rate]
@@ -5,6 +5,7 @@ from src.llm.client_base import ClientBase
 from src import utils
 import requests
 import io
+from typing import Any
 
 logger = utils.get_logger()
 
@@ -15,8 +16,8 @@ class OpenAICompatibleTTS(TTSable):
     supports_streaming = True
 
     @utils.time_it
-    def __init__(self, config: ConfigLoader) -> None:
-        super().__init__(config)
+    def __init__(self, config: ConfigLoader, voiceline_folder: str | None = None) -> None:
+        super().__init__(config, voiceline_folder)
         base_url = config.openai_tts_url
         if base_url.endswith('/v1'):
             self.__synthesize_url = f'{base_url}/audio/speech'
@@ -32,6 +33,10 @@ class OpenAICompatibleTTS(TTSable):
         self._check_if_service_is_running()
 
 
+    def _get_cache_parameters(self) -> dict[str, Any]:
+        return {'url': self.__base_url, 'model': self.__model, 'speed': self.__speed}
+
+
     @utils.time_it
     def change_voice(self, voice: str, in_game_voice: str | None = None, csv_in_game_voice: str | None = None, advanced_voice_model: str | None = None, voice_accent: str | None = None, voice_gender: int | None = None, voice_race: str | None = None):
         for voice_type in [advanced_voice_model, voice, in_game_voice, csv_in_game_voice]:
@@ -11,6 +11,7 @@ from queue import Queue, Empty
 from src.tts.synthesization_options import SynthesizationOptions
 from src.games.gameable import Gameable
 from pathlib import Path
+from typing import Any
 
 # https://stackoverflow.com/a/4896288/25532567
 ON_POSIX = 'posix' in sys.builtin_module_names
@@ -24,16 +25,25 @@ def enqueue_output(out, queue, stop_flag):
         if stop_flag():
             break
     out.close()
+    queue.put(None) # the output has ended, ie the process has exited
 
 class TTSServiceFailure(Exception):
     pass
 
 class Piper(TTSable):
     """Piper TTS handler
+
+    Piper is driven through stdin ("load_model <path>", "synthesize <text>"), and reports back through its output stream.
+    Once a voiceline has been written, Piper prints the path of the .wav file, which is used to detect when synthesis has finished.
     """
+    # Piper is only restarted if it has not finished a voiceline after this many seconds (as it has most likely hung)
+    __synthesis_timeout: float = 30
+    # Fallback in case Piper's line for a finished voiceline is missed: the .wav file is checked directly after this many seconds without it
+    __file_check_interval: float = 0.25
+
     @utils.time_it
-    def __init__(self, config: ConfigLoader, game: Gameable) -> None:
-        super().__init__(config)
+    def __init__(self, config: ConfigLoader, game: Gameable, voiceline_folder: str | None = None) -> None:
+        super().__init__(config, voiceline_folder)
         if self._language != 'en':
             logger.warning(f"Selected language is '{self._language}'', but Piper only supports English. Please change the selected text-to-speech model in `Text-to-Speech`->`TTS Service` in the Mantella UI")
         self.__game: Gameable = game
@@ -50,6 +60,10 @@ class Piper(TTSable):
         self.__available_models = self.get_available_models(self.__models_path)
 
 
+    def _get_cache_parameters(self) -> dict[str, Any]:
+        return {'models_path': str(self.__models_path)}
+
+
     @utils.time_it
     def get_available_models(self, folder_path):
         try:
@@ -86,35 +100,41 @@ class Piper(TTSable):
         attempts = 0
         max_attempts = 5
         while attempts < max_attempts:
+            self.__discard_output()
             self.__write_to_stdin(f"synthesize {voiceline}\n")
-            max_wait_time = 5
             start_time = time.time()
+            next_file_check = start_time + self.__file_check_interval
 
             crashed = False
-            while time.time() - start_time < max_wait_time:
+            while time.time() - start_time < self.__synthesis_timeout:
                 exit_code = self.process.poll()
                 if exit_code is not None and exit_code != 0:
                     logger.error(f"Piper process has crashed with exit code: {exit_code}")
-                    self._run_piper()
-                    if self.__selected_voice:
-                        self.change_voice(self.__selected_voice)
-                        self._check_voice_changed()
                     crashed = True
                     break
-                elif os.path.exists(final_voiceline_file):
-                    try: # don't just check if .wav exists, check if it has contents
-                        with wave.open(final_voiceline_file, 'rb') as wav_file:
-                            frames = wav_file.getnframes()
-                            rate = wav_file.getframerate()
-                            duration = frames / float(rate) if rate else 0.0
-                            logger.debug(f'"{voiceline}" is {duration} seconds long')
-                            if duration > 0:
-                                return
-                    except:
-                        pass
-                time.sleep(0.01)
+
+                try:
+                    line = self.q.get(timeout=max(next_file_check - time.time(), 0.001))
+                except Empty:
+                    line = ''
+                if line is None:
+                    logger.error(f"Piper process has exited with exit code: {self.process.poll()}")
+                    crashed = True
+                    break
+
+                # Earlier output was discarded before the command was sent, so the printed path means this voiceline has been written
+                if self.__is_voiceline_announced(line, final_voiceline_file):
+                    return
+                if time.time() >= next_file_check:
+                    if self.__is_voiceline_complete(final_voiceline_file, voiceline):
+                        return
+                    next_file_check = time.time() + self.__file_check_interval
 
             if crashed:
+                self._run_piper()
+                if self.__selected_voice:
+                    self.change_voice(self.__selected_voice)
+                    self._check_voice_changed()
                 attempts += 1
                 continue
 
@@ -131,6 +151,35 @@ class Piper(TTSable):
             f"Text: '{voiceline[:50]}...', Length: {len(voiceline)} chars"
         )
         raise TTSServiceFailure(f"Piper failed after {attempts} attempts (timeout/crash)")
+
+    def __discard_output(self):
+        """Discards output left over from earlier commands, so that it is not mistaken for the output of the next command"""
+        try:
+            while True:
+                if self.q.get_nowait() is None:
+                    self.q.put(None) # keep the end of the output, so that the exit of the process is still noticed
+                    return
+        except Empty:
+            pass
+
+    @staticmethod
+    def __is_voiceline_announced(line: str, final_voiceline_file: str) -> bool:
+        """Checks if a line of Piper's output is the path of the finished voiceline (Piper may print it relative to its working directory)"""
+        announced_file = line.strip()
+        return announced_file.endswith('.wav') and os.path.basename(announced_file) == os.path.basename(final_voiceline_file)
+
+    def __is_voiceline_complete(self, final_voiceline_file: str, voiceline: str) -> bool:
+        if not os.path.exists(final_voiceline_file):
+            return False
+        try: # don't just check if .wav exists, check if it has contents
+            with wave.open(final_voiceline_file, 'rb') as wav_file:
+                frames = wav_file.getnframes()
+                rate = wav_file.getframerate()
+                duration = frames / float(rate) if rate else 0.0
+                logger.debug(f'"{voiceline}" is {duration} seconds long')
+                return duration > 0
+        except:
+            return False
     
     @utils.time_it
     def _check_voice_changed(self, max_retries: int = 5):
@@ -148,15 +197,19 @@ class Piper(TTSable):
                     break
                 
                 try:  
-                    line = self.q.get_nowait() # or q.get(timeout=.1)
-                    if "Model loaded" in line:
-                        logger.log(self._loglevel, f'Model {self.__selected_voice} loaded')
-                        self.__waiting_for_voice_load = False
-                        self._last_voice = self.__selected_voice
-                        return True
+                    line = self.q.get(timeout=max(max_wait_time - (time.time() - start_time), 0.001))
                 except Empty:
-                    pass
-                time.sleep(0.01)
+                    continue
+                if line is None:
+                    logger.error(f"Piper process has exited with exit code: {self.process.poll()}")
+                    self.__waiting_for_voice_load = False
+                    crashed = True
+                    break
+                if "Model loaded" in line:
+                    logger.log(self._loglevel, f'Model {self.__selected_voice} loaded')
+                    self.__waiting_for_voice_load = False
+                    self._last_voice = self.__selected_voice
+                    return True
 
             if attempt >= max_retries:
                 break
@@ -228,7 +281,7 @@ class Piper(TTSable):
                 cwd=self._voiceline_folder, 
                 stdin=subprocess.PIPE, 
                 stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
+                stderr=subprocess.STDOUT, # Piper's logs are read from the same stream, so that they cannot fill up an unread pipe and block Piper
                 universal_newlines=True, 
                 encoding='utf-8',
                 bufsize=1, 
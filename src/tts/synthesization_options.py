@@ -1,10 +1,11 @@
 class SynthesizationOptions:
     """Options and additional information that can affect the synthesization of a voice line
     """
-    def __init__(self, aggro: bool, is_first_line_of_response: bool, stream_first_line: bool = False) -> None:
+    def __init__(self, aggro: bool, is_first_line_of_response: bool, stream_first_line: bool = False, defer_voiceline_files: bool = False) -> None:
         self.__aggro = aggro
         self.__is_first_line_of_response = is_first_line_of_response
         self.__stream_first_line = stream_first_line
+        self.__defer_voiceline_files = defer_voiceline_files
 
     @property
     def aggro(self) -> bool:
@@ -23,3 +24,11 @@ class SynthesizationOptions:
         """Should this voiceline be streamed from the TTS server and played externally as it arrives (if the service supports streaming)?
         """
         return self.__stream_first_line
+
+
+    @property
+    def defer_voiceline_files(self) -> bool:
+        """Should the lip sync (.lip / .fuz) files of this voiceline be generated in the background instead of before synthesis returns?
+        The caller is then responsible for waiting for them (see VoicelineFilePool.wait) before passing the voiceline on to the game
+        """
+        return self.__defer_voiceline_files
@@ -34,14 +34,18 @@ def parse_tts_service(value: str | None) -> TTSEnum | None:
     return result
 
 
-def create_tts(service: TTSEnum, config: ConfigLoader, game: Gameable | None = None) -> TTSable:
-    """Create a new TTS instance for the given service."""
+def create_tts(service: TTSEnum, config: ConfigLoader, game: Gameable | None = None, voiceline_folder: str | None = None) -> TTSable:
+    """Create a new TTS instance for the given service.
+
+    voiceline_folder overrides the default folder voicelines are saved to.
+    """
+    folder_args = [voiceline_folder] if voiceline_folder else []
     if service == TTSEnum.PIPER:
-        return Piper(config, game)
+        return Piper(config, game, *folder_args)
     elif service == TTSEnum.XTTS:
-        return XTTS(config, game)
+        return XTTS(config, game, *folder_args)
     elif service == TTSEnum.XVASYNTH:
-        return xVASynth(config)
+        return xVASynth(config, *folder_args)
     elif service == TTSEnum.OPENAI_COMPATIBLE:
-        return OpenAICompatibleTTS(config)
+        return OpenAICompatibleTTS(config, *folder_args)
     raise ValueError(f"Unknown TTS service: {service}")
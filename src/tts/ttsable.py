@@ -6,15 +6,21 @@ from pathlib import Path
 from subprocess import DEVNULL
 import subprocess
 from src.tts.synthesization_options import SynthesizationOptions
+from src.tts.voiceline_cache import VoicelineCache, get_voiceline_cache
+from src.tts.voiceline_file_pool import VoicelineFilePool, get_voiceline_file_pool
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+import io
 import shutil
+import tempfile
 import soundfile as sf
 import numpy as np
 import time
 from queue import Queue
-from threading import Thread, Event
+from threading import Thread, Event, get_ident
+from functools import partial
+from typing import Any
 from src.config.definitions.game_definitions import GameEnum
 import platform
 
@@ -30,7 +36,7 @@ class TTSable(ABC):
     supports_streaming: bool = False # whether the service can stream first-line audio for Streamed Fast Response
 
     @utils.time_it
-    def __init__(self, config: ConfigLoader) -> None:
+    def __init__(self, config: ConfigLoader, voiceline_folder: str | None = None) -> None:
         super().__init__()
         self._config: ConfigLoader = config
         self._loglevel = 29
@@ -41,8 +47,10 @@ class TTSable(ABC):
         self._tts_print = config.tts_print # to print output to console
         self._save_folder = config.save_folder
         self._output_path = utils.get_tmp_dir()
-        self._voiceline_folder = f"{self._output_path}/voicelines"
+        # TTS instances that can synthesize at the same time (eg of different sessions) need their own folder, as voicelines are first written to out.wav
+        self._voiceline_folder = voiceline_folder or f"{self._output_path}/voicelines"
         os.makedirs(f"{self._voiceline_folder}/save", exist_ok=True)
+        os.makedirs(f"{self._voiceline_folder}/lipsync", exist_ok=True)
         self._language = config.language
         self._last_voice = '' # last active voice model
         self._lip_generation_enabled = config.lip_generation
@@ -64,6 +72,20 @@ class TTSable(ABC):
         self._session.mount('http://', retry_adapter)
         self._session.mount('https://', retry_adapter)
 
+        self.__voiceline_cache: VoicelineCache | None = None
+        if config.voiceline_cache_size > 0:
+            self.__voiceline_cache = get_voiceline_cache(os.path.join(self._save_folder, "data", "voiceline_cache"), config.voiceline_cache_size * 1024 * 1024)
+        self.__voiceline_file_pool: VoicelineFilePool = get_voiceline_file_pool()
+
+    def is_voice_loaded(self, voice: str, in_game_voice: str | None = None, csv_in_game_voice: str | None = None, advanced_voice_model: str | None = None) -> bool:
+        """Whether the voice model last loaded by the TTS service matches any of the given voices, so that it does not need to be changed"""
+        return self._last_voice != '' and (not isinstance(self._last_voice, str) or self._last_voice.lower() in {isinstance(v, str) and v.lower() for v in {voice, in_game_voice, csv_in_game_voice, advanced_voice_model, f'fo4_{voice}'}})
+
+    @property
+    def caches_voicelines(self) -> bool:
+        """Whether synthesized voicelines are kept in the voiceline cache"""
+        return self.__voiceline_cache is not None
+
     @utils.time_it
     def stop_external_playback(self):
         """Stops any externally-played voiceline audio (streamed or fallback) currently playing"""
@@ -82,69 +104,72 @@ class TTSable(ABC):
             tuple[str, bool]: the path to the synthesized voiceline file, and whether the voiceline was already played externally during synthesis (streamed fast response)
         """
         logger.debug(f'last_voice: {self._last_voice}, voice: {voice}, in_game_voice: {in_game_voice}, csv_in_game_voice: {csv_in_game_voice}, advanced_voice_model: {advanced_voice_model}, voice_accent: {voice_accent}')
-        if self._last_voice == '' or (isinstance(self._last_voice, str) and self._last_voice.lower() not in {isinstance(v, str) and v.lower() for v in {voice, in_game_voice, csv_in_game_voice, advanced_voice_model, f'fo4_{voice}'}}):
-            self.change_voice(voice, in_game_voice, csv_in_game_voice, advanced_voice_model, voice_accent)
-
-        logger.log(22, f'Synthesizing voiceline: {voiceline.strip()}')
-
         final_voiceline_file_name = 'out' # "out" is the file name used by XTTS
         final_voiceline_file =  f"{self._voiceline_folder}/{final_voiceline_file_name}.wav"
 
         try:
-            if os.path.exists(final_voiceline_file):
-                os.remove(final_voiceline_file)
-            if os.path.exists(final_voiceline_file.replace(".wav", ".lip")):
-                os.remove(final_voiceline_file.replace(".wav", ".lip"))
+            for extension in ['.wav', '.lip', '.fuz']:
+                if os.path.exists(final_voiceline_file.replace(".wav", extension)):
+                    os.remove(final_voiceline_file.replace(".wav", extension))
         except:
             logger.warning("Failed to remove spoken voicelines")
 
-        played_externally = self.tts_synthesize(voiceline, final_voiceline_file, synth_options)
-        if not os.path.exists(final_voiceline_file):
-            logger.error(f'TTS failed to generate voiceline at: {Path(final_voiceline_file)}')
-            raise FileNotFoundError()
-        
-        if (self._lip_generation_enabled == 'enabled') or (self._lip_generation_enabled == 'lazy' and not synth_options.is_first_line_of_response):
-            self._generate_voiceline_files(final_voiceline_file, voiceline)
-        elif (self._lip_generation_enabled in ['lazy', 'disabled'] and self._game.base_game == GameEnum.FALLOUT4):
-            self._generate_voiceline_files(final_voiceline_file, voiceline, skip_lip_generation=True)
+        generate_lip_file = (self._lip_generation_enabled == 'enabled') or (self._lip_generation_enabled == 'lazy' and not synth_options.is_first_line_of_response)
+        required_artifacts: set[str] = set()
+        if generate_lip_file or self._game.base_game == GameEnum.FALLOUT4:
+            required_artifacts.add('.lip')
+        if self._game.base_game == GameEnum.FALLOUT4:
+            required_artifacts.add('.fuz')
+
+        cache_key: str | None = None
+        restored_artifacts: set[str] | None = None
+        if self.__voiceline_cache:
+            voice_parameters = {'voice': voice, 'in_game_voice': in_game_voice, 'csv_in_game_voice': csv_in_game_voice, 'advanced_voice_model': advanced_voice_model, 'voice_accent': voice_accent, 'aggro': synth_options.aggro, 'language': self._language, 'game': self._game.display_name, **self._get_cache_parameters()}
+            cache_key = VoicelineCache.get_key(type(self).__name__, voice_parameters, voiceline)
+            restored_artifacts = self.__restore_cached_voiceline(cache_key, final_voiceline_file)
+
+        if restored_artifacts is not None:
+            logger.log(22, f'Using cached voiceline: {voiceline.strip()}')
+            played_externally = False
+        else:
+            if not self.is_voice_loaded(voice, in_game_voice, csv_in_game_voice, advanced_voice_model):
+                self.change_voice(voice, in_game_voice, csv_in_game_voice, advanced_voice_model, voice_accent)
+
+            logger.log(22, f'Synthesizing voiceline: {voiceline.strip()}')
+            played_externally = self.tts_synthesize(voiceline, final_voiceline_file, synth_options)
+            if not os.path.exists(final_voiceline_file):
+                logger.error(f'TTS failed to generate voiceline at: {Path(final_voiceline_file)}')
+                raise FileNotFoundError()
         
         #rename to unique name        
-        if (os.path.exists(final_voiceline_file)):
-            #timestamp: str = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S_%f_")
-            #new_wav_file_name = f"{self._voiceline_folder}/save/{timestamp + final_voiceline_file_name}.wav" 
-
-            #Use a sanitized version of the voice text as filename
-            unique_name: str  = f'{voice} {voiceline.strip()}'[:150]
-            new_name: str = "".join(c for c in unique_name if c not in r'\/:*?"<>|.')
-            new_wav_file_name = f'{self._voiceline_folder}/save/{new_name.strip()}.wav'
+        #timestamp: str = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S_%f_")
+        #new_wav_file_name = f"{self._voiceline_folder}/save/{timestamp + final_voiceline_file_name}.wav" 
 
-            new_lip_file_name = new_wav_file_name.replace(".wav", ".lip")
-            new_fuz_file_name = new_wav_file_name.replace(".wav", ".fuz")
-
-            if os.path.exists(new_wav_file_name):       #Repeated phrase, delete previous file
-                os.remove(new_wav_file_name)
+        #Use a sanitized version of the voice text as filename
+        unique_name: str  = f'{voice} {voiceline.strip()}'[:150]
+        new_name: str = "".join(c for c in unique_name if c not in r'\/:*?"<>|.')
+        new_wav_file_name = f'{self._voiceline_folder}/save/{new_name.strip()}.wav'
 
+        # a repeated phrase reuses the file name, so any files still being generated for the previous one are finished first
+        self.__voiceline_file_pool.wait(new_wav_file_name)
+        for extension in ['.wav', '.lip', '.fuz']:
             try:
-                os.rename(final_voiceline_file, new_wav_file_name)
+                if os.path.exists(new_wav_file_name.replace(".wav", extension)): #Repeated phrase, delete previous file
+                    os.remove(new_wav_file_name.replace(".wav", extension))
+                if os.path.exists(final_voiceline_file.replace(".wav", extension)):
+                    os.rename(final_voiceline_file.replace(".wav", extension), new_wav_file_name.replace(".wav", extension))
             except Exception as ex:
-                logger.warning(f'{type(ex).__name__}: {ex.args}')
-
-            if (self._lip_generation_enabled == 'enabled') or (self._lip_generation_enabled == 'lazy' and not synth_options.is_first_line_of_response):
-                try:
-                    if os.path.exists(new_lip_file_name):
-                        os.remove(new_lip_file_name)
-                    os.rename(final_voiceline_file.replace(".wav", ".lip"), new_lip_file_name)
-                except:
-                    logger.error(f'Could not rename {final_voiceline_file.replace(".wav", ".lip")}')
-            try:
-                fuz_file_name = final_voiceline_file.replace(".wav", ".fuz")
-                if (os.path.exists(fuz_file_name)):
-                    if os.path.exists(new_fuz_file_name):
-                        os.remove(new_fuz_file_name)
-                    os.rename(fuz_file_name, new_fuz_file_name)
-            except:
-                logger.error(f'Could not rename {final_voiceline_file.replace(".wav", ".fuz")}')
-            final_voiceline_file = new_wav_file_name
+                logger.warning(f'Could not rename {final_voiceline_file.replace(".wav", extension)}: {type(ex).__name__}: {ex.args}')
+        final_voiceline_file = new_wav_file_name
+
+        if restored_artifacts is None or not required_artifacts.issubset(restored_artifacts):
+            if generate_lip_file or self._game.base_game == GameEnum.FALLOUT4:
+                # lip sync files are generated in the background, so that the next voiceline can be synthesized in the meantime
+                self.__voiceline_file_pool.submit(final_voiceline_file, partial(self.__generate_voiceline_files_in_background, final_voiceline_file, voiceline, not generate_lip_file, cache_key))
+                if not synth_options.defer_voiceline_files:
+                    self.__voiceline_file_pool.wait(final_voiceline_file)
+            elif cache_key:
+                self.__cache_voiceline(cache_key, final_voiceline_file, include_artifacts=False)
 
         # if Debug Mode is on, play the audio file
         # if (self.debug_mode == '1') & (self.play_audio_from_script == '1'):
@@ -152,6 +177,68 @@ class TTSable(ABC):
         return final_voiceline_file, played_externally
 
 
+    def _get_cache_parameters(self) -> dict[str, Any]:
+        """Settings of the TTS service that change how a voiceline sounds (other than the selected voice), which are included in the key of cached voicelines
+        """
+        return {}
+
+
+    @utils.time_it
+    def __restore_cached_voiceline(self, cache_key: str, final_voiceline_file: str) -> set[str] | None:
+        """Copies a cached voiceline and any cached lip sync files to where a newly synthesized voiceline would be saved
+
+        Returns:
+            set[str] | None: the extensions of the restored lip sync files (.lip / .fuz), or None if the voiceline is not cached
+        """
+        cached_files = self.__voiceline_cache.get(cache_key)
+        if not cached_files:
+            return None
+        try:
+            for extension, cached_file in cached_files.items():
+                shutil.copyfile(cached_file, final_voiceline_file.replace(".wav", extension))
+        except OSError as e: # eg if the voiceline was evicted in the meantime
+            logger.debug(f'Could not restore cached voiceline: {e}')
+            for extension in cached_files:
+                if os.path.exists(final_voiceline_file.replace(".wav", extension)):
+                    os.remove(final_voiceline_file.replace(".wav", extension))
+            return None
+        return {extension for extension in cached_files if extension != '.wav'}
+
+
+    @utils.time_it
+    def __generate_voiceline_files_in_background(self, final_voiceline_file: str, voiceline: str, skip_lip_generation: bool, cache_key: str | None):
+        """Generates the lip sync files of a voiceline in a folder of its own (LipFuzer converts every .wav file in its folder), then moves them next to the voiceline
+
+        Args:
+            final_voiceline_file (str): the path of the voiceline
+            voiceline (str): the text of the voiceline
+            skip_lip_generation (bool): whether to use a placeholder .lip file instead of generating one (the placeholder is not cached)
+            cache_key (str | None): the key to cache the voiceline and its files under, or None if voicelines are not cached
+        """
+        working_folder = tempfile.mkdtemp(dir=f"{self._voiceline_folder}/lipsync")
+        try:
+            working_voiceline_file = os.path.join(working_folder, "out.wav")
+            shutil.copyfile(final_voiceline_file, working_voiceline_file)
+            self._generate_voiceline_files(working_voiceline_file, voiceline, skip_lip_generation=skip_lip_generation)
+            if cache_key:
+                self.__cache_voiceline(cache_key, working_voiceline_file, include_artifacts=not skip_lip_generation)
+            for extension in VoicelineCache.ARTIFACT_EXTENSIONS:
+                if os.path.exists(working_voiceline_file.replace(".wav", extension)):
+                    os.replace(working_voiceline_file.replace(".wav", extension), final_voiceline_file.replace(".wav", extension))
+        finally:
+            shutil.rmtree(working_folder, ignore_errors=True)
+
+
+    def __cache_voiceline(self, cache_key: str, final_voiceline_file: str, include_artifacts: bool):
+        files = {'.wav': final_voiceline_file}
+        if include_artifacts:
+            for extension in VoicelineCache.ARTIFACT_EXTENSIONS:
+                artifact_file = final_voiceline_file.replace(".wav", extension)
+                if os.path.exists(artifact_file):
+                    files[extension] = artifact_file
+        self.__voiceline_cache.put(cache_key, files)
+
+
     @abstractmethod
     @utils.time_it
     def change_voice(self, voice: str, in_game_voice: str | None = None, csv_in_game_voice: str | None = None, advanced_voice_model: str | None = None, voice_accent: str | None = None, voice_gender: int | None = None, voice_race: str | None = None):
@@ -217,7 +304,7 @@ class TTSable(ABC):
 
     @utils.time_it
     def _stream_play_and_save(self, url: str, request_data: dict, headers: dict | None, final_voiceline_file: str) -> bool:
-        """Streams a voiceline from the TTS server, playing the audio externally as it arrives and saving the complete wav afterwards
+        """Streams a voiceline from the TTS server, playing the audio externally and writing it to the wav file as it arrives
 
         Args:
             url (str): the streaming endpoint to POST to
@@ -236,13 +323,14 @@ class TTSable(ABC):
 
         self._external_playback_stop.clear()
         volume = self._config.fast_response_mode_volume / 100
-        pcm = bytearray()
         header = bytearray()
         header_parsed = False
-        played_up_to = 0
+        partial_frame = b'' # the start of a frame split across two chunks
+        frames_written = 0
         sample_rate = 24000
         channels = 1
         bytes_per_frame = 2
+        output_file: sf.SoundFile | None = None
         playback_queue: Queue = Queue()
         playback_failed = Event()
         playback_thread: Thread | None = None
@@ -266,23 +354,29 @@ class TTSable(ABC):
                             while playback_queue.get() is not None:
                                 pass
                             return
-                        stream.write(samples)
+                        # samples are a view of the downloaded chunk, converted to float here rather than on the download thread
+                        stream.write(((samples.astype(np.float32) / 32768.0) * volume).reshape(-1, channels))
             except Exception as e:
                 playback_failed.set()
                 logger.warning(f'Streamed voiceline playback failed: {e}')
                 while playback_queue.get() is not None:
                     pass
 
-        def enqueue_new_samples():
-            nonlocal played_up_to
+        def write_pcm(pcm: bytes | memoryview):
+            """Writes the whole frames of a chunk of PCM data straight to the output file and queues them for playback, without copying them"""
+            nonlocal partial_frame, frames_written
+            if partial_frame:
+                pcm = partial_frame + bytes(pcm)
             aligned = len(pcm) - (len(pcm) % bytes_per_frame)
-            if aligned > played_up_to:
-                if played_up_to == 0:
-                    logger.debug(f'First audio received {elapsed_s()} seconds after request start')
-                samples = np.frombuffer(bytes(pcm[played_up_to:aligned]), dtype='<i2')
-                samples = (samples.astype(np.float32) / 32768.0) * volume
-                playback_queue.put(samples.reshape(-1, channels))
-                played_up_to = aligned
+            partial_frame = bytes(pcm[aligned:])
+            if aligned == 0:
+                return
+            samples = np.frombuffer(pcm, dtype='<i2', count=aligned // 2)
+            if frames_written == 0:
+                logger.debug(f'First audio received {elapsed_s()} seconds after request start')
+            playback_queue.put(samples)
+            output_file.buffer_write(samples, dtype='int16')
+            frames_written += aligned // bytes_per_frame
 
         try:
             with self._session.post(url, json=request_data, headers=headers, stream=True, timeout=(5, 60)) as response:
@@ -291,48 +385,46 @@ class TTSable(ABC):
                     return False
 
                 for chunk in response.iter_content(chunk_size=4096):
-                    if not header_parsed:
-                        header += chunk
-                        try:
-                            parsed = self._parse_wav_header(bytes(header))
-                        except ValueError as e:
-                            logger.warning(f'{e}, falling back to non-streamed synthesis')
-                            return False
-                        if parsed is None:
-                            if len(header) > 65536:
-                                logger.warning('Could not find PCM data in streamed TTS response, falling back to non-streamed synthesis')
-                                return False
-                            continue
-                        data_offset, sample_rate, channels, bits_per_sample = parsed
-                        if bits_per_sample != 16:
-                            logger.warning(f'Streamed TTS audio is {bits_per_sample}-bit, only 16-bit is supported. Falling back to non-streamed synthesis')
+                    if header_parsed:
+                        write_pcm(chunk)
+                        continue
+                    header += chunk
+                    try:
+                        parsed = self._parse_wav_header(header)
+                    except ValueError as e:
+                        logger.warning(f'{e}, falling back to non-streamed synthesis')
+                        return False
+                    if parsed is None:
+                        if len(header) > 65536:
+                            logger.warning('Could not find PCM data in streamed TTS response, falling back to non-streamed synthesis')
                             return False
-                        logger.debug(f'Stream header received {elapsed_s()} seconds after request start ({sample_rate}Hz, {channels}ch)')
-                        bytes_per_frame = 2 * channels
-                        pcm += header[data_offset:]
-                        header_parsed = True
-                        playback_thread = Thread(target=playback_worker, daemon=True)
-                        playback_thread.start()
-                        enqueue_new_samples()
-                    else:
-                        pcm += chunk
-                        enqueue_new_samples()
+                        continue
+                    data_offset, sample_rate, channels, bits_per_sample = parsed
+                    if bits_per_sample != 16:
+                        logger.warning(f'Streamed TTS audio is {bits_per_sample}-bit, only 16-bit is supported. Falling back to non-streamed synthesis')
+                        return False
+                    logger.debug(f'Stream header received {elapsed_s()} seconds after request start ({sample_rate}Hz, {channels}ch)')
+                    bytes_per_frame = 2 * channels
+                    header_parsed = True
+                    output_file = sf.SoundFile(final_voiceline_file, 'w', samplerate=sample_rate, channels=channels, subtype='PCM_16', format='WAV')
+                    playback_thread = Thread(target=playback_worker, daemon=True)
+                    playback_thread.start()
+                    write_pcm(memoryview(header)[data_offset:])
         except requests.exceptions.RequestException as e:
             logger.warning(f'Streamed synthesis was interrupted: {e}')
         finally:
             if playback_thread is not None:
                 playback_queue.put(None)
+            if output_file is not None:
+                output_file.close() # completes the header of the wav
+                if frames_written == 0:
+                    os.remove(final_voiceline_file)
 
-        if not pcm:
+        if frames_written == 0:
             return False
 
-        aligned = len(pcm) - (len(pcm) % bytes_per_frame)
-        samples = np.frombuffer(bytes(pcm[:aligned]), dtype='<i2')
-        if channels > 1:
-            samples = samples.reshape(-1, channels)
-        sf.write(final_voiceline_file, samples, sample_rate, subtype='PCM_16')
-        audio_duration = aligned / bytes_per_frame / sample_rate
-        logger.debug(f'Stream complete {elapsed_s()} seconds after request start: saved {audio_duration:.2f}s of audio ({aligned} bytes), playback continues in the background')
+        audio_duration = frames_written / sample_rate
+        logger.debug(f'Stream complete {elapsed_s()} seconds after request start: saved {audio_duration:.2f}s of audio ({frames_written * bytes_per_frame} bytes), playback continues in the background')
 
         if playback_failed.is_set():
             self._play_wav_async(final_voiceline_file)
@@ -376,6 +468,22 @@ class TTSable(ABC):
         return None
 
 
+    @staticmethod
+    def _is_complete_16bit_wav(buffer: bytes | memoryview) -> bool:
+        """Whether a buffer holds a 16-bit WAV file that ends with its data chunk, and whose header gives the correct length of the data
+        (some servers send placeholder lengths in headers, as they do not know the length of the audio up front)
+        """
+        try:
+            parsed = TTSable._parse_wav_header(buffer)
+        except ValueError:
+            return False
+        if parsed is None:
+            return False
+        data_offset, _, _, bits_per_sample = parsed
+        data_length = int.from_bytes(buffer[data_offset - 4:data_offset], 'little')
+        return bits_per_sample == 16 and data_length == len(buffer) - data_offset
+
+
     @utils.time_it
     def _play_wav_async(self, filename: str):
         """Plays a wav file asynchronously at the fast response mode volume"""
@@ -386,6 +494,11 @@ class TTSable(ABC):
     def _convert_to_16bit(self, input_file, output_file=None):
         if output_file is None:
             output_file = input_file
+        if isinstance(input_file, io.BytesIO) and self._is_complete_16bit_wav(input_file.getbuffer()):
+            # already in the right format, so the response is saved as it is rather than decoded and encoded again
+            with open(output_file, 'wb') as f:
+                f.write(input_file.getbuffer())
+            return
         # Read the audio file
         data, samplerate = sf.read(input_file)
 
@@ -413,20 +526,27 @@ class TTSable(ABC):
         """
         @utils.time_it
         def run_facefx_command(command, facefx_path) -> None:
+            # each worker of the voiceline file pool writes its own script, as several can run at once. The script is removed once it has run
             if platform.system() == "Windows":
                 startupinfo = STARTUPINFO()
                 startupinfo.dwFlags |= STARTF_USESHOWWINDOW
                 creationflags = subprocess.CREATE_NO_WINDOW
-                batch_file_path = Path(facefx_path) / "run_mantella_command.bat"
-                with open(batch_file_path, 'w', encoding='utf-8') as file:
-                    file.write(f"@echo off\n{command} >nul 2>&1")
-                subprocess.run(batch_file_path, cwd=facefx_path, creationflags=creationflags)
+                script_path = Path(facefx_path) / f"run_mantella_command_{get_ident()}.bat"
+                try:
+                    with open(script_path, 'w', encoding='utf-8') as file:
+                        file.write(f"@echo off\n{command} >nul 2>&1")
+                    subprocess.run(script_path, cwd=facefx_path, creationflags=creationflags)
+                finally:
+                    script_path.unlink(missing_ok=True)
             else:
-                bash_file_path = Path(facefx_path) / "run_mantella_command.sh"
+                script_path = Path(facefx_path) / f"run_mantella_command_{get_ident()}.sh"
                 user_shell = utils.get_user_shell()
-                with open(bash_file_path, 'w', encoding='utf-8') as file:
-                    file.write(f"#!{user_shell}\nwine {command} > /dev/null 2>&1")
-                subprocess.run([user_shell, str(bash_file_path)], cwd=facefx_path)
+                try:
+                    with open(script_path, 'w', encoding='utf-8') as file:
+                        file.write(f"#!{user_shell}\nwine {command} > /dev/null 2>&1")
+                    subprocess.run([user_shell, str(script_path)], cwd=facefx_path)
+                finally:
+                    script_path.unlink(missing_ok=True)
 
 
         def copy_placeholder_lip_file(lip_file: str, game: str) -> None:
@@ -457,7 +577,7 @@ class TTSable(ABC):
 
                 #Using subprocess.run to retrieve the exit code
                 args: str = f'"{LipGen_path}" "{wav_file}" "{voiceline}" -Language:{language_parm} -Automated'
-                run_result: subprocess.CompletedProcess = subprocess.run(args, cwd=self._voiceline_folder, stderr=DEVNULL, stdout=DEVNULL,
+                run_result: subprocess.CompletedProcess = subprocess.run(args, cwd=Path(wav_file).parent, stderr=DEVNULL, stdout=DEVNULL,
                                                                          creationflags=subprocess.CREATE_NO_WINDOW)
                 if run_result.returncode != 0 and len(voiceline) > 11 :
                     #Very short sentences sometimes fail to generate a .lip file, so skip warning
@@ -502,8 +622,9 @@ class TTSable(ABC):
             LipFuz_path = Path(self._lipgen_path) / "LipFuzer/LipFuzer.exe"
 
             if os.path.exists(LipFuz_path):
-                args: str = f'"{LipFuz_path}" -s "{self._voiceline_folder}" -d "{self._voiceline_folder}" -a wav --norec'
-                run_result: subprocess.CompletedProcess = subprocess.run(args, cwd=self._voiceline_folder, stdout=DEVNULL, stderr=DEVNULL,
+                voiceline_folder = Path(wav_file).parent
+                args: str = f'"{LipFuz_path}" -s "{voiceline_folder}" -d "{voiceline_folder}" -a wav --norec'
+                run_result: subprocess.CompletedProcess = subprocess.run(args, cwd=voiceline_folder, stdout=DEVNULL, stderr=DEVNULL,
                                                                          creationflags=subprocess.CREATE_NO_WINDOW)
                 if run_result.returncode != 0:
                     logger.warning(f'LipFuzer returned {run_result.returncode}')
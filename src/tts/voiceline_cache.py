@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+import src.utils as utils
+
+logger = utils.get_logger()
+
+
+class VoicelineCache:
+    """Disk-backed cache of synthesized voicelines and their lip sync files.
+
+    Each entry is stored as {key}.wav next to an optional {key}.lip and {key}.fuz, where the key is a hash of everything that affects how the line sounds.
+    Entries are evicted in least recently used order once the cache grows beyond its size limit.
+    The order of use is kept in the modification time of the .wav files, so it survives restarts.
+    """
+    ARTIFACT_EXTENSIONS: list[str] = ['.lip', '.fuz']
+
+    def __init__(self, cache_folder: str, max_size_bytes: int) -> None:
+        self.__cache_folder: str = cache_folder
+        self.__max_size_bytes: int = max_size_bytes
+        self.__lock: Lock = Lock()
+        self.__entry_sizes: OrderedDict[str, int] = OrderedDict() # least recently used first
+        self.__total_size: int = 0
+        os.makedirs(self.__cache_folder, exist_ok=True)
+        self.__load_entries()
+
+    @staticmethod
+    def get_key(tts_service: str, voice_parameters: dict[str, Any], voiceline: str) -> str:
+        """Returns the key of a voiceline
+
+        Args:
+            tts_service (str): the name of the TTS service
+            voice_parameters (dict[str, Any]): the voice model and any settings of the service that change how the line sounds
+            voiceline (str): the text of the voiceline
+
+        Returns:
+            str: the key of the voiceline in the cache
+        """
+        normalised_voiceline = ' '.join(voiceline.split())
+        key_data = json.dumps([tts_service, voice_parameters, normalised_voiceline], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> dict[str, str] | None:
+        """Looks up a cached voiceline and marks it as recently used
+
+        Args:
+            key (str): the key returned by `get_key`
+
+        Returns:
+            dict[str, str] | None: the paths of the cached files by extension (.wav and any of .lip and .fuz), or None if the voiceline is not cached
+        """
+        with self.__lock:
+            if key not in self.__entry_sizes:
+                return None
+            wav_file = self.__get_path(key, '.wav')
+            try:
+                os.utime(wav_file)
+            except FileNotFoundError: # removed outside of Mantella
+                self.__remove_entry(key)
+                return None
+            self.__entry_sizes.move_to_end(key)
+            files = {'.wav': wav_file}
+            for extension in self.ARTIFACT_EXTENSIONS:
+                artifact_file = self.__get_path(key, extension)
+                if os.path.exists(artifact_file):
+                    files[extension] = artifact_file
+            return files
+
+    def put(self, key: str, files: dict[str, str]) -> None:
+        """Copies a synthesized voiceline into the cache, replacing any existing files of the entry
+
+        Args:
+            key (str): the key returned by `get_key`
+            files (dict[str, str]): the paths of the files to cache by extension. Must contain the .wav file
+        """
+        with self.__lock:
+            try:
+                # the .wav file is written last, as its existence marks the entry as complete
+                for extension in [*self.ARTIFACT_EXTENSIONS, '.wav']:
+                    if extension in files:
+                        temp_file = self.__get_path(key, extension) + '.tmp'
+                        shutil.copyfile(files[extension], temp_file)
+                        os.replace(temp_file, self.__get_path(key, extension))
+            except OSError as e:
+                logger.warning(f'Could not add voiceline to the cache: {e}')
+                self.__remove_entry(key)
+                return
+
+            self.__total_size -= self.__entry_sizes.pop(key, 0)
+            entry_size = self.__get_entry_size(key)
+            self.__entry_sizes[key] = entry_size
+            self.__total_size += entry_size
+            self.__evict()
+
+    def __get_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.__cache_folder, key + extension)
+
+    def __get_entry_size(self, key: str) -> int:
+        entry_size = 0
+        for extension in ['.wav', *self.ARTIFACT_EXTENSIONS]:
+            try:
+                entry_size += os.path.getsize(self.__get_path(key, extension))
+            except FileNotFoundError:
+                pass
+        return entry_size
+
+    def __load_entries(self):
+        entries: list[tuple[float, str]] = []
+        for file_name in os.listdir(self.__cache_folder):
+            key, extension = os.path.splitext(file_name)
+            if extension == '.wav':
+                entries.append((os.path.getmtime(os.path.join(self.__cache_folder, file_name)), key))
+        for _, key in sorted(entries):
+            entry_size = self.__get_entry_size(key)
+            self.__entry_sizes[key] = entry_size
+            self.__total_size += entry_size
+        self.__evict()
+
+    def __evict(self):
+        while self.__total_size > self.__max_size_bytes and self.__entry_sizes:
+            least_recently_used_key = next(iter(self.__entry_sizes))
+            self.__remove_entry(least_recently_used_key)
+
+    def __remove_entry(self, key: str):
+        self.__total_size -= self.__entry_sizes.pop(key, 0)
+        for extension in ['.wav', *self.ARTIFACT_EXTENSIONS]:
+            try:
+                os.remove(self.__get_path(key, extension))
+            except FileNotFoundError:
+                pass
+
+
+_caches: dict[str, VoicelineCache] = {}
+_caches_lock: Lock = Lock()
+
+
+def get_voiceline_cache(cache_folder: str, max_size_bytes: int) -> VoicelineCache:
+    """Returns the voiceline cache for a folder. Only one cache is created per folder, so that TTS services sharing it keep the same size limit
+
+    Args:
+        cache_folder (str): the folder the voicelines are stored in
+        max_size_bytes (int): the size limit of the cache (only used when the cache is first created)
+
+    Returns:
+        VoicelineCache: the cache for the folder
+    """
+    with _caches_lock:
+        if cache_folder not in _caches:
+            _caches[cache_folder] = VoicelineCache(cache_folder, max_size_bytes)
+        return _caches[cache_folder]
@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable
+import src.utils as utils
+
+logger = utils.get_logger()
+
+
+class VoicelineFilePool:
+    """Bounded pool of workers that generate the lip sync (.lip) and Fallout 4 (.fuz) files of voicelines in the background.
+
+    Generating these files runs external tools (LipGen / FaceFXWrapper, LipFuzer / xWMAEncode / Fuz_extractor) that take about as long as synthesizing the voiceline itself.
+    Running them in the pool lets the next voiceline be synthesized while they run, and lets the files of several voicelines be generated at once.
+    Jobs are tracked by the voiceline file they belong to, so that a voiceline is only passed on to the game once its files are ready.
+    """
+    def __init__(self, max_workers: int) -> None:
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voiceline_files")
+        self.__pending_jobs: dict[str, Future[None]] = {}
+        self.__lock: Lock = Lock()
+
+    def submit(self, voice_file: str, job: Callable[[], None]) -> Future[None]:
+        """Queues the generation of the files of a voiceline
+
+        Args:
+            voice_file (str): the path of the voiceline the files belong to
+            job (Callable[[], None]): generates the files
+
+        Returns:
+            Future[None]: completes once the files have been generated
+        """
+        # Any earlier job for the same file is finished first, so that the two do not overwrite each other's files
+        self.wait(voice_file)
+        with self.__lock:
+            future = self.__executor.submit(job)
+            self.__pending_jobs[voice_file] = future
+        return future
+
+    @utils.time_it
+    def wait(self, voice_file: str) -> None:
+        """Waits until the files of a voiceline have been generated. Returns immediately if no files are being generated for the voiceline
+
+        Args:
+            voice_file (str): the path of the voiceline
+        """
+        with self.__lock:
+            future = self.__pending_jobs.get(voice_file)
+        if future is None:
+            return
+        try:
+            future.result()
+        except Exception as e:
+            logger.warning(f'Could not generate the lip sync files of {voice_file}: {e}')
+        with self.__lock:
+            if self.__pending_jobs.get(voice_file) is future:
+                del self.__pending_jobs[voice_file]
+
+
+_pool: VoicelineFilePool | None = None
+_pool_lock: Lock = Lock()
+
+
+def get_voiceline_file_pool() -> VoicelineFilePool:
+    """Returns the pool shared by all TTS services, which has one worker per CPU core (up to 8)
+
+    Returns:
+        VoicelineFilePool: the shared pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = VoicelineFilePool(max(1, min(8, os.cpu_count() or 1)))
+        return _pool
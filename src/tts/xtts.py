@@ -24,8 +24,8 @@ class XTTS(TTSable):
     supports_streaming = True
 
     @utils.time_it
-    def __init__(self, config: ConfigLoader, game) -> None:
-        super().__init__(config)
+    def __init__(self, config: ConfigLoader, game, voiceline_folder: str | None = None) -> None:
+        super().__init__(config, voiceline_folder)
         self.__xtts_default_model = config.xtts_default_model
         self.__xtts_deepspeed = config.xtts_deepspeed
         self.__xtts_lowvram = config.xtts_lowvram
@@ -59,6 +59,10 @@ class XTTS(TTSable):
         self._set_xtts_settings()
 
 
+    def _get_cache_parameters(self) -> dict[str, Any]:
+        return {'url': self.__xtts_url, 'default_model': self.__xtts_default_model, 'data': self.__xtts_data, 'accent': self.__xtts_accent}
+
+
     def _build_synthesis_payload(self, voiceline: str) -> dict:
         return {
             'text': voiceline,
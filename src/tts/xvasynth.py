@@ -10,6 +10,7 @@ import requests
 from subprocess import Popen, DEVNULL
 import time
 import sys
+from typing import Any
 from src.tts.synthesization_options import SynthesizationOptions
 from src.config.definitions.game_definitions import GameEnum
 
@@ -26,8 +27,8 @@ class xVASynth(TTSable):
     """xVASynth TTS handler
     """
     @utils.time_it
-    def __init__(self, config: ConfigLoader) -> None:
-        super().__init__(config)
+    def __init__(self, config: ConfigLoader, voiceline_folder: str | None = None) -> None:
+        super().__init__(config, voiceline_folder)
         self.__xvasynth_path = config.xvasynth_path
         self.__process_device = config.xvasynth_process_device
         self.__synthesize_url = 'http://127.0.0.1:8008/synthesize'
@@ -47,6 +48,10 @@ class xVASynth(TTSable):
         self._check_if_xvasynth_is_running()
 
 
+    def _get_cache_parameters(self) -> dict[str, Any]:
+        return {'pace': self.__pace, 'use_sr': self.__use_sr, 'use_cleanup': self.__use_cleanup}
+
+
     @utils.time_it
     def _synthesize_voiceline(self, voiceline: str, final_voiceline_file: str, synth_options: SynthesizationOptions):
         phrases = self._split_voiceline(voiceline)
@@ -123,7 +128,7 @@ class xVASynth(TTSable):
                 backup_voice='malenord'
                 self._run_backup_model(backup_voice)
         try:
-            requests.post(self.__loadmodel_url, json=model_change)
+            self._session.post(self.__loadmodel_url, json=model_change)
             self._last_voice = voice
             logger.log(self._loglevel, f'Target model {voice} loaded.')
         except:
@@ -135,7 +140,7 @@ class xVASynth(TTSable):
                 backup_voice='malenord'
             self._run_backup_model(backup_voice)
             try:
-                requests.post(self.__loadmodel_url, json=model_change)
+                self._session.post(self.__loadmodel_url, json=model_change)
                 self._last_voice = voice
                 logger.log(self._loglevel, f'Voice model {voice} loaded.')
             except:
@@ -210,16 +215,25 @@ class xVASynth(TTSable):
 
     @utils.time_it
     def _merge_audio_files(self, audio_files, voiceline_file_name):
-        merged_audio = np.array([])
-
+        """Concatenates the voicelines of a split voiceline in memory and writes the result once. The split voicelines are deleted afterwards"""
+        audio_parts: list[np.ndarray] = []
+        samplerate = None
         for audio_file in audio_files:
             try:
-                audio, samplerate = sf.read(audio_file)
-                merged_audio = np.concatenate((merged_audio, audio))
-                sf.write(voiceline_file_name, merged_audio, samplerate)
+                audio, samplerate = sf.read(audio_file, dtype='float32')
+                audio_parts.append(audio)
             except:
                 logger.error(f'Could not find voiceline file: {audio_file}')
 
+        if audio_parts:
+            sf.write(voiceline_file_name, np.concatenate(audio_parts), samplerate)
+
+        for audio_file in audio_files:
+            try:
+                os.remove(audio_file)
+            except OSError:
+                pass
+
 
     @utils.time_it
     def _synthesize_line(self, line, save_path, aggro: bool = False, voicemodelversion='3.0'):
@@ -245,7 +259,7 @@ class xVASynth(TTSable):
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                requests.post(self.__synthesize_url, json=data)
+                self._session.post(self.__synthesize_url, json=data)
                 break  # exit the loop if the request is successful
             except ConnectionError as e:
                 if attempt < max_attempts - 1:  # if not the last attempt
@@ -277,7 +291,7 @@ class xVASynth(TTSable):
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                requests.post(self.__synthesize_batch_url, json=data)
+                self._session.post(self.__synthesize_batch_url, json=data)
                 break  # Exit the loop if the request is successful
             except ConnectionError as e:
                 if attempt < max_attempts - 1:  # Not the last attempt
@@ -370,7 +384,7 @@ class xVASynth(TTSable):
             'pluginsContext': '{}',
         }
         try:
-            requests.post(self.__loadmodel_url, json=backup_model_change)
+            self._session.post(self.__loadmodel_url, json=backup_model_change)
             logger.log(self._loglevel, f'Backup model {voice} loaded.')
         except:
             logger.error(f"Backup model {voice} failed to load")
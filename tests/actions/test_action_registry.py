@@ -0,0 +1,107 @@
+from src.actions.action_registry import ActionRegistry, ActionValidator
+
+
+def make_action(identifier: str, name: str, key: str | None = None, parameters: dict | None = None) -> dict:
+    action = {'identifier': identifier, 'name': name, 'parameters': parameters or {}}
+    if key:
+        action['key'] = key
+    return action
+
+
+def test_actions_are_indexed_by_name_and_keyword():
+    registry = ActionRegistry()
+    registry['mantella_npc_follow'] = make_action('mantella_npc_follow', 'Follow', 'Follow')
+    registry['mantella_npc_wait'] = make_action('mantella_npc_wait', 'Wait', 'Wait')
+
+    assert registry.get_identifier_by_name('Follow') == 'mantella_npc_follow'
+    assert registry.get_identifier_by_name('follow') is None
+    assert registry.get_identifier_by_name('Wait') == 'mantella_npc_wait'
+    assert registry.get_identifier_by_keyword('wAiT') == 'mantella_npc_wait'
+    assert list(registry) == ['mantella_npc_follow', 'mantella_npc_wait']
+
+
+def test_indexes_follow_replaced_and_removed_actions():
+    registry = ActionRegistry()
+    registry['mantella_npc_follow'] = make_action('mantella_npc_follow', 'Follow', 'Follow')
+    registry['mantella_npc_follow'] = make_action('mantella_npc_follow', 'FollowMe', 'FollowMe')
+
+    assert registry.get_identifier_by_name('Follow') is None
+    assert registry.get_identifier_by_name('FollowMe') == 'mantella_npc_follow'
+
+    # The first action loaded with a name wins, and the next one takes over when it is removed
+    registry['mantella_custom_follow'] = make_action('mantella_custom_follow', 'FollowMe')
+    assert registry.get_identifier_by_name('FollowMe') == 'mantella_npc_follow'
+    del registry['mantella_npc_follow']
+    assert registry.get_identifier_by_name('FollowMe') == 'mantella_custom_follow'
+    assert registry.get_identifier_by_keyword('FollowMe') is None
+
+    registry.clear()
+    assert len(registry) == 0
+    assert registry.get_identifier_by_name('FollowMe') is None
+    assert registry.get_identifier_by_keyword('Follow') is None
+
+
+def test_validator_parses_parameter_scopes():
+    registry = ActionRegistry()
+    registry['mantella_npc_offended'] = make_action('mantella_npc_offended', 'Attack', parameters={
+        'source': {'type': 'array', 'scope': 'conversation'},
+        'target': {'type': 'string', 'scope': 'all_npcs_w_player', 'resolve_to_id': 'npc'},
+        'reason': {'type': 'string'},
+    })
+
+    validator = registry.get_validator('mantella_npc_offended')
+    source = validator.get_parameter('source')
+    target = validator.get_parameter('target')
+    reason = validator.get_parameter('reason')
+
+    assert source.validates_entities and not source.include_player and not source.include_nearby
+    assert target.validates_entities and target.include_player and target.include_nearby and not target.nearby_only
+    assert target.resolve_type == 'npc'
+    assert not reason.validates_entities and reason.resolve_type is None
+    assert validator.get_parameter('unknown') is None
+
+
+def test_validator_converts_arguments_to_their_parameter_type():
+    validator = ActionValidator(make_action('mantella_npc_travelto', 'TravelTo', parameters={
+        'source': {'type': 'array', 'items': {'type': 'string'}, 'scope': 'conversation'},
+        'crime_gold': {'type': 'integer'},
+        'distance': {'type': 'number'},
+        'leave_now': {'type': 'boolean'},
+        'pace': {'type': 'string', 'enum': ['Walk', 'Run']},
+    }))
+
+    validated = validator.validate_arguments({'source': 'Guard', 'crime_gold': '25', 'distance': 2, 'leave_now': 'True', 'pace': 'run'}, 'mantella_npc_travelto')
+
+    assert validated == {'source': 'Guard', 'crime_gold': 25, 'distance': 2, 'leave_now': True, 'pace': 'Run'}
+
+
+def test_validator_drops_unknown_and_invalid_arguments():
+    validator = ActionValidator(make_action('mantella_npc_travelto', 'TravelTo', parameters={
+        'source': {'type': 'array', 'items': {'type': 'string'}},
+        'crime_gold': {'type': 'integer'},
+        'leave_now': {'type': 'boolean'},
+        'pace': {'type': 'string', 'enum': ['Walk', 'Run']},
+    }))
+
+    validated = validator.validate_arguments({'source': ['Guard', {'name': 'Lydia'}], 'crime_gold': 2.5, 'leave_now': 'soon', 'pace': 'Sprint', 'speed': 'fast'}, 'mantella_npc_travelto')
+
+    assert validated == {}
+
+
+def test_validator_keeps_string_or_list_for_scoped_parameters():
+    validator = ActionValidator(make_action('mantella_npc_inventory', 'Inventory', parameters={
+        'source': {'type': 'string', 'scope': 'conversation'},
+        'target': {'type': 'array', 'items': {'type': 'string'}, 'scope': 'all_npcs'},
+    }))
+
+    assert validator.validate_arguments({'source': ['Guard'], 'target': 'Lydia'}, 'mantella_npc_inventory') == {'source': ['Guard'], 'target': 'Lydia'}
+    assert validator.validate_arguments({'source': [{'name': 'Guard'}]}, 'mantella_npc_inventory') == {}
+
+
+def test_validator_rejects_action_when_required_argument_is_invalid():
+    action = make_action('mantella_npc_absolvecrime', 'AbsolveCrime', parameters={'crime_gold': {'type': 'integer'}, 'reason': {'type': 'string'}})
+    action['required'] = ['crime_gold']
+    validator = ActionValidator(action)
+
+    assert validator.validate_arguments({'crime_gold': 'a lot'}, 'mantella_npc_absolvecrime') is None
+    assert validator.validate_arguments({'crime_gold': 5, 'reason': {'text': 'theft'}}, 'mantella_npc_absolvecrime') == {'crime_gold': 5}
@@ -1,6 +1,7 @@
 import pytest
 import json
 from pathlib import Path
+from src.actions.action_registry import ActionValidator
 from src.actions.function_manager import FunctionManager
 from src.conversation.context import Context
 from src.characters_manager import Characters
@@ -227,6 +228,27 @@ def test_parse_function_calls_multiple_calls():
     assert result[1]['arguments'] == {'source': ['Guard']}
 
 
+def test_parse_function_calls_filters_repeated_call_from_previous_turn(example_characters_pc_to_npc: Characters):
+    """Test that a call repeating the previous turn's call is filtered, regardless of argument order"""
+    FunctionManager.load_all_actions()
+    FunctionManager._actions['test_action'] = {
+        'identifier': 'test_action',
+        'name': 'TestAction',
+        'parameters': {
+            'mode': {'type': 'string'},
+            'duration': {'type': 'number'}
+        }
+    }
+    
+    first_turn = FunctionManager.parse_function_calls([{'function': {'name': 'TestAction', 'arguments': json.dumps({'mode': 'calm', 'duration': 5})}}], example_characters_pc_to_npc)
+    repeated_turn = FunctionManager.parse_function_calls([{'function': {'name': 'TestAction', 'arguments': json.dumps({'duration': 5, 'mode': 'calm'})}}], example_characters_pc_to_npc)
+    changed_turn = FunctionManager.parse_function_calls([{'function': {'name': 'TestAction', 'arguments': json.dumps({'duration': 10, 'mode': 'calm'})}}], example_characters_pc_to_npc)
+    
+    assert len(first_turn) == 1
+    assert repeated_turn == []
+    assert changed_turn == [{'identifier': 'test_action', 'arguments': {'duration': 10, 'mode': 'calm'}}]
+
+
 def test_generate_context_aware_tools(default_context: Context):
     """Test generating context-aware tools from loaded actions"""
     FunctionManager.load_all_actions()
@@ -317,6 +339,45 @@ def test_generate_context_aware_tools_with_parameters(default_context: Context):
             break
 
 
+def test_generate_context_aware_tools_reuses_unchanged_tools(example_context_with_nearby: Context, example_nearby_npcs_data: list[dict]):
+    """Test that repeated calls return the same serialized tools and only rebuild tools whose inputs changed"""
+    FunctionManager.load_all_actions()
+    
+    first_tools = FunctionManager.generate_context_aware_tools(example_context_with_nearby)
+    second_tools = FunctionManager.generate_context_aware_tools(example_context_with_nearby)
+    
+    assert json.dumps(second_tools) == json.dumps(first_tools)
+    assert all(second is first for first, second in zip(first_tools, second_tools))
+    
+    # Nearby NPCs leaving only changes the tools that list them
+    example_context_with_nearby.npcs_in_conversation.set_nearby_npcs(example_nearby_npcs_data[:1])
+    third_tools = FunctionManager.generate_context_aware_tools(example_context_with_nearby)
+    
+    first_by_name = {tool['function']['name']: tool for tool in first_tools}
+    third_by_name = {tool['function']['name']: tool for tool in third_tools}
+    assert 'Merchant' not in third_by_name['Attack']['function']['parameters']['properties']['target']['description']
+    assert third_by_name['Attack'] is not first_by_name['Attack']
+    assert any(third_by_name[name] is first_by_name[name] for name in third_by_name if name != 'Attack')
+
+
+def test_generate_context_aware_tools_looks_up_each_scope_once(example_context_with_nearby: Context, monkeypatch):
+    """Test that entity listings are looked up once per call, rather than again for every tool that is built"""
+    FunctionManager.load_all_actions()
+    looked_up_scopes: list[str] = []
+    get_entities_for_scope = FunctionManager._get_entities_for_scope
+    def count_lookups(scope: str, context) -> str:
+        looked_up_scopes.append(scope)
+        return get_entities_for_scope(scope, context)
+    monkeypatch.setattr(FunctionManager, '_get_entities_for_scope', staticmethod(count_lookups))
+
+    tools = FunctionManager.generate_context_aware_tools(example_context_with_nearby)
+
+    assert looked_up_scopes
+    assert len(looked_up_scopes) == len(set(looked_up_scopes))
+    tools_by_name = {tool['function']['name']: tool for tool in tools}
+    assert 'Merchant' in tools_by_name['Attack']['function']['parameters']['properties']['target']['description']
+
+
 def test_validate_npc_names_valid_names(example_characters_pc_to_npc: Characters):
     """Test validation with all valid NPC names"""
     npc_names = ['Guard', 'Dragonborn']
@@ -656,6 +717,31 @@ def test_parse_function_calls_skip_action_when_all_sources_invalid(example_chara
     assert result[0]['arguments']['source'] == ['Guard']
 
 
+def test_parse_function_calls_accepts_list_for_scoped_string_parameter(example_characters_pc_to_npc: Characters):
+    """Test that scoped parameters declared as a string (eg Inventory's source) still accept a list of NPC names"""
+    FunctionManager.load_all_actions()
+
+    tool_calls = [{'function': {'name': 'Inventory', 'arguments': json.dumps({'source': ['Guard']})}}]
+    result = FunctionManager.parse_function_calls(tool_calls, example_characters_pc_to_npc)
+    assert result[0]['arguments']['source'] == ['Guard']
+
+    FunctionManager._last_tool_call_keys = set()
+    tool_calls = [{'function': {'name': 'Inventory', 'arguments': json.dumps({'source': ['FakeNPC']})}}]
+    assert FunctionManager.parse_function_calls(tool_calls, example_characters_pc_to_npc) == []
+
+
+def test_parse_function_calls_skips_action_with_invalid_required_argument(example_characters_pc_to_npc: Characters):
+    """Test that an action is skipped rather than sent without a required argument that failed validation"""
+    FunctionManager.load_all_actions()
+
+    tool_calls = [
+        {'function': {'name': 'AbsolveCrime', 'arguments': json.dumps({'crime_gold': 'a lot'})}},
+        {'function': {'name': 'AbsolveCrime', 'arguments': json.dumps({'crime_gold': '25'})}},
+    ]
+    result = FunctionManager.parse_function_calls(tool_calls, example_characters_pc_to_npc)
+
+    assert [tool['arguments'] for tool in result] == [{'crime_gold': 25}]
+
 def test_validate_arguments_against_schema_valid_args():
     """Test that valid arguments pass through unchanged"""
     FunctionManager.load_all_actions()
@@ -664,9 +750,7 @@ def test_validate_arguments_against_schema_valid_args():
     defined_params = {'source': {'type': 'array'}}
     llm_arguments = {'source': ['Guard']}
     
-    result = FunctionManager._validate_arguments_against_schema(
-        llm_arguments, defined_params, 'mantella_npc_follow'
-    )
+    result = ActionValidator({'parameters': defined_params}).validate_arguments(llm_arguments, 'mantella_npc_follow')
     
     assert result == {'source': ['Guard']}
 
@@ -685,9 +769,7 @@ def test_validate_arguments_against_schema_hallucinated_args():
         'distance': 100
     }
     
-    result = FunctionManager._validate_arguments_against_schema(
-        llm_arguments, defined_params, 'mantella_npc_follow'
-    )
+    result = ActionValidator({'parameters': defined_params}).validate_arguments(llm_arguments, 'mantella_npc_follow')
     
     # Only valid parameter should remain
     assert result == {'source': ['Guard']}
@@ -707,9 +789,7 @@ def test_validate_arguments_against_schema_all_invalid():
         'another_fake': 123
     }
     
-    result = FunctionManager._validate_arguments_against_schema(
-        llm_arguments, defined_params, 'mantella_npc_follow'
-    )
+    result = ActionValidator({'parameters': defined_params}).validate_arguments(llm_arguments, 'mantella_npc_follow')
     
     # Should return empty dict
     assert result == {}
@@ -734,9 +814,7 @@ def test_validate_arguments_against_schema_mixed_valid_invalid():
         'mode': 'aggressive'
     }
     
-    result = FunctionManager._validate_arguments_against_schema(
-        llm_arguments, defined_params, 'test_action'
-    )
+    result = ActionValidator({'parameters': defined_params}).validate_arguments(llm_arguments, 'test_action')
     
     # Only valid parameters should remain
     assert result == {
@@ -755,9 +833,7 @@ def test_validate_arguments_against_schema_empty_params():
     defined_params = {}
     llm_arguments = {'some_arg': 'value'}
     
-    result = FunctionManager._validate_arguments_against_schema(
-        llm_arguments, defined_params, 'test_action'
-    )
+    result = ActionValidator({'parameters': defined_params}).validate_arguments(llm_arguments, 'test_action')
     
     # All arguments should be filtered out
     assert result == {}
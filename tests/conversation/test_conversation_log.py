@@ -0,0 +1,72 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from src.conversation.conversation_log import conversation_log
+from src.character_manager import Character
+
+
+@pytest.fixture
+def conversation_folder(tmp_path, monkeypatch) -> str:
+    folder = str(tmp_path / "conversations")
+    monkeypatch.setattr(conversation_log, 'game_path', folder)
+    return folder
+
+
+def test_save_appends_conversations_and_tracks_length(conversation_folder: str, example_skyrim_npc_character: Character):
+    first_conversation = [{'role': 'user', 'content': 'Hello'}, {'role': 'assistant', 'content': 'Greetings.'}]
+    second_conversation = [{'role': 'user', 'content': 'Goodbye'}]
+
+    conversation_log.save_conversation_log(example_skyrim_npc_character, first_conversation, 'TestWorld')
+    conversation_log.save_conversation_log(example_skyrim_npc_character, second_conversation, 'TestWorld')
+
+    assert conversation_log.get_conversation_log_length(example_skyrim_npc_character, 'TestWorld') == 3
+    assert conversation_log.load_conversation_log(example_skyrim_npc_character, 'TestWorld') == first_conversation + second_conversation
+
+    log_file = os.path.join(conversation_folder, 'TestWorld', 'Guard - 0', 'Guard.jsonl')
+    with open(log_file, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+
+
+def test_legacy_json_log_is_migrated(conversation_folder: str, example_skyrim_npc_character: Character):
+    legacy_folder = os.path.join(conversation_folder, 'TestWorld', 'Guard')
+    os.makedirs(legacy_folder)
+    legacy_history = [[{'role': 'user', 'content': 'Hello'}], [{'role': 'user', 'content': 'Hi'}, {'role': 'assistant', 'content': 'Hey.'}]]
+    with open(os.path.join(legacy_folder, 'Guard.json'), 'w', encoding='utf-8') as f:
+        json.dump(legacy_history, f, indent=4)
+
+    assert conversation_log.get_conversation_log_length(example_skyrim_npc_character, 'TestWorld') == 3
+    conversation_log.save_conversation_log(example_skyrim_npc_character, [{'role': 'user', 'content': 'Farewell'}], 'TestWorld')
+
+    # The existing folder without ref_id keeps being used
+    assert os.path.exists(os.path.join(legacy_folder, 'Guard.jsonl'))
+    assert os.path.exists(os.path.join(legacy_folder, 'Guard.json.migrated'))
+    assert not os.path.exists(os.path.join(legacy_folder, 'Guard.json'))
+    assert conversation_log.get_conversation_log_length(example_skyrim_npc_character, 'TestWorld') == 4
+
+
+def test_incomplete_conversation_is_removed_when_index_is_outdated(conversation_folder: str, example_skyrim_npc_character: Character):
+    conversation_log.save_conversation_log(example_skyrim_npc_character, [{'role': 'user', 'content': 'Hello'}], 'TestWorld')
+    log_file = os.path.join(conversation_folder, 'TestWorld', 'Guard - 0', 'Guard.jsonl')
+    # Simulate Mantella being closed while a conversation was being written
+    with open(log_file, 'a', encoding='utf-8') as f:
+        f.write('[{"role": "user", "con')
+
+    conversation_log.save_conversation_log(example_skyrim_npc_character, [{'role': 'user', 'content': 'Hi again'}], 'TestWorld')
+
+    assert conversation_log.load_conversation_log(example_skyrim_npc_character, 'TestWorld') == [{'role': 'user', 'content': 'Hello'}, {'role': 'user', 'content': 'Hi again'}]
+    assert conversation_log.get_conversation_log_length(example_skyrim_npc_character, 'TestWorld') == 2
+
+
+def test_cached_length_is_used_until_log_changes(conversation_folder: str, example_skyrim_npc_character: Character):
+    conversation_log.save_conversation_log(example_skyrim_npc_character, [{'role': 'user', 'content': 'Hello'}], 'TestWorld')
+
+    with patch('src.conversation.conversation_log.open', create=True, side_effect=AssertionError("The cached length should be used")):
+        assert conversation_log.get_conversation_log_length(example_skyrim_npc_character, 'TestWorld') == 1
+
+    # A log that was changed outside of Mantella is read again
+    log_file = os.path.join(conversation_folder, 'TestWorld', 'Guard - 0', 'Guard.jsonl')
+    with open(log_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps([{'role': 'user', 'content': 'Hi'}, {'role': 'assistant', 'content': 'Hey.'}]) + '\n')
+
+    assert conversation_log.get_conversation_log_length(example_skyrim_npc_character, 'TestWorld') == 3
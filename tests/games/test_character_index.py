@@ -0,0 +1,60 @@
+import json
+from unittest.mock import patch
+import pandas as pd
+from src.config.config_loader import ConfigLoader
+from src.games.character_index import CharacterIndex
+from src.games.skyrim import Skyrim
+
+
+def test_character_index_match_order():
+    df = pd.DataFrame([
+        {'base_id': '0A2C8E', 'name': 'Lydia', 'race': 'Nord'},
+        {'base_id': '013BA3', 'name': 'Guard', 'race': 'Nord'},
+        {'base_id': '013BA4', 'name': 'Guard', 'race': 'Imperial'},
+        {'base_id': 'FF1234', 'name': 'Curie', 'race': 'Robot'},
+        {'base_id': 'FF1234', 'name': 'Curie', 'race': 'Synth'},
+    ])
+    index = CharacterIndex(df)
+
+    assert index.find_row('000A2C8E', 'lydia', 'Nord') == 0 # full ID with leading zeros
+    assert index.find_row('FE0A2C8E', 'Lydia', 'Breton') == 0 # name and ID
+    assert index.find_row('FE013BA3', 'Guard', 'Nord') == 1 # name, ID and race
+    assert index.find_row('FE113BA4', 'Guard', 'Imperial') == 2 # name, partial ID and race
+    assert index.find_row('FFFF1234', 'Curie', 'Synth') == 4 # name, ID and race with duplicate IDs
+    assert index.find_row('123456', 'Guard', 'Orc') is None # ambiguous name
+    assert index.find_row('0A2C8E', 'Someone', 'Orc') == 0 # ID only
+
+
+def test_character_index_follows_changed_rows():
+    df = pd.DataFrame([{'base_id': '0A2C8E', 'name': 'Lydia', 'race': 'Nord'}])
+    index = CharacterIndex(df)
+
+    index.add_row(0, '0A2C8E', 'Lydia the Housecarl', 'Nord')
+    index.add_row(1, '0BBBBB', 'Lydia', 'Nord')
+
+    assert index.find_row('0BBBBB', 'Lydia', 'Nord') == 1
+    assert index.find_row('000000', 'Lydia the Housecarl', 'Nord') == 0
+
+
+def test_characters_are_loaded_from_cache_until_overrides_change(tmp_path, default_config: ConfigLoader):
+    default_config.mod_path_base = str(tmp_path)
+    default_config.save_folder = str(tmp_path)
+    override_dir = tmp_path / "data" / "Skyrim" / "character_overrides"
+    override_dir.mkdir(parents=True, exist_ok=True)
+    override_file = override_dir / "cached_character.json"
+    with open(override_file, 'w') as f:
+        json.dump({"name": "Cached Character", "base_id": "CACHE1", "race": "Nord", "bio": "First bio."}, f)
+
+    skyrim = Skyrim(default_config)
+    assert (tmp_path / "data" / "Skyrim" / "character_cache.pkl").exists()
+
+    with patch.object(Skyrim, '_Gameable__get_character_df', side_effect=AssertionError("Characters should be loaded from the cache")):
+        cached_skyrim = Skyrim(default_config)
+    pd.testing.assert_frame_equal(cached_skyrim.character_df, skyrim.character_df)
+    assert cached_skyrim._get_matching_df_row('CACHE1', 'Cached Character', 'Nord') is not None
+
+    with open(override_file, 'w') as f:
+        json.dump({"name": "Cached Character", "base_id": "CACHE1", "race": "Nord", "bio": "Second bio."}, f)
+    updated_skyrim = Skyrim(default_config)
+    row = updated_skyrim._get_matching_df_row('CACHE1', 'Cached Character', 'Nord')
+    assert updated_skyrim.character_df.loc[row, 'bio'] == "Second bio."
@@ -0,0 +1,149 @@
+import json
+import os
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+import pandas as pd
+from src.games.character_index import CharacterIndex
+from src.games.skyrim import Skyrim
+
+
+COLUMNS = ['name', 'voice_model', 'race', 'base_id', 'bio']
+
+
+def _make_characters() -> pd.DataFrame:
+    return pd.DataFrame([
+        {'name': 'Lydia', 'voice_model': 'Female Even Toned', 'race': 'Nord', 'base_id': '0A2C8E', 'bio': 'Lydia is a Nord housecarl.'},
+        {'name': 'Guard', 'voice_model': 'Male Guard', 'race': 'Nord', 'base_id': '0A8D3', 'bio': 'A guard.'},
+        {'name': 'Belethor', 'voice_model': 'Male Even Toned', 'race': 'Breton', 'base_id': '01A66B', 'bio': 'A merchant.'},
+    ], columns=COLUMNS)
+
+
+def _make_game(character_df: pd.DataFrame) -> Skyrim:
+    """Creates a Skyrim instance that only holds the given characters, without loading the character csv"""
+    game = Skyrim.__new__(Skyrim)
+    game._Gameable__character_df = character_df
+    game._Gameable__character_index = CharacterIndex(character_df)
+    return game
+
+
+def _apply_overrides(game: Skyrim, overrides_folder: Path):
+    # Apply the files in a fixed order, so later files reliably see the changes of earlier ones
+    listdir = os.listdir
+    with patch('src.games.gameable.os.listdir', side_effect=lambda path: sorted(listdir(path))):
+        game._Gameable__apply_character_overrides(str(overrides_folder), game.character_df.columns.values.tolist())
+
+
+def _apply_overrides_row_by_row(game: Skyrim, overrides_folder: Path):
+    """The previous implementation, which adds and updates the DataFrame one row and one cell at a time"""
+    columns = game.character_df.columns.values.tolist()
+
+    def apply(content: dict[str, Any], new_value, update_value):
+        row_label = game._get_matching_df_row(game.get_string_from_df(content, 'base_id'), game.get_string_from_df(content, 'name'), game.get_string_from_df(content, 'race'))
+        if row_label is None:
+            row_label = len(game.character_df.index)
+            game.character_df.loc[row_label] = [new_value(content, entry) for entry in columns]
+        else:
+            for entry in columns:
+                value = update_value(content, entry)
+                if value and not pd.isna(value) and value != "":
+                    game.character_df.loc[row_label, entry] = value
+        row = game.character_df.loc[row_label]
+        game._Gameable__character_index.add_row(row_label, row.get('base_id'), row.get('name'), row.get('race'))
+
+    for file in sorted(os.listdir(overrides_folder)):
+        file_path = overrides_folder / file
+        if file_path.suffix == '.json':
+            with open(file_path) as fp:
+                json_object = json.load(fp)
+            for content in json_object if isinstance(json_object, list) else [json_object]:
+                apply(content, lambda content, entry: content.get(entry, ""), lambda content, entry: content.get(entry, None))
+        elif file_path.suffix == '.csv':
+            for content in pd.read_csv(file_path).to_dict('records'):
+                apply(content, game.get_string_from_df, lambda content, entry: content.get(entry, None))
+
+
+def _write_json(path: Path, content: Any):
+    with open(path, 'w') as f:
+        json.dump(content, f)
+
+
+def test_apply_character_overrides_adds_new_character(tmp_path):
+    game = _make_game(_make_characters())
+    _write_json(tmp_path / 'new.json', {'name': 'Test Character', 'race': 'Imperial', 'base_id': 'ABC123', 'bio': 'Added by an override.'})
+
+    _apply_overrides(game, tmp_path)
+
+    assert len(game.character_df) == 4
+    row = game._get_matching_df_row('ABC123', 'Test Character', 'Imperial')
+    assert row == 3
+    assert game.character_df.loc[row].to_dict() == {'name': 'Test Character', 'voice_model': '', 'race': 'Imperial', 'base_id': 'ABC123', 'bio': 'Added by an override.'}
+
+
+def test_apply_character_overrides_updates_existing_character(tmp_path):
+    game = _make_game(_make_characters())
+    with open(tmp_path / 'update.csv', 'w') as f:
+        f.write("name,race,base_id,voice_model,bio\n")
+        f.write("Lydia,Nord,0A2C8E,,Lydia is sworn to carry your burdens.\n")
+
+    _apply_overrides(game, tmp_path)
+
+    assert len(game.character_df) == 3
+    assert game.character_df.loc[0, 'bio'] == 'Lydia is sworn to carry your burdens.'
+    assert game.character_df.loc[0, 'voice_model'] == 'Female Even Toned' # empty values keep the current value
+    assert game.character_df.loc[1, 'bio'] == 'A guard.'
+
+
+def test_apply_character_overrides_updates_character_added_earlier(tmp_path):
+    game = _make_game(_make_characters())
+    _write_json(tmp_path / '01_add.json', {'name': 'Test Character', 'voice_model': 'Male Nord', 'race': 'Imperial', 'base_id': 'ABC123', 'bio': 'First bio.'})
+    _write_json(tmp_path / '02_update.json', [{'name': 'Test Character', 'race': 'Imperial', 'base_id': 'ABC123', 'bio': 'Second bio.'}])
+
+    _apply_overrides(game, tmp_path)
+
+    assert len(game.character_df) == 4
+    assert game.character_df.loc[3].to_dict() == {'name': 'Test Character', 'voice_model': 'Male Nord', 'race': 'Imperial', 'base_id': 'ABC123', 'bio': 'Second bio.'}
+
+
+def test_apply_character_overrides_follows_changed_identity(tmp_path):
+    game = _make_game(_make_characters())
+    # Only matches Lydia by her ID and renames her
+    _write_json(tmp_path / '01_rename.json', {'name': 'Lydia the Housecarl', 'race': 'Nord', 'base_id': '0A2C8E'})
+    # Only matches the renamed Lydia by her new name and changes her ID
+    _write_json(tmp_path / '02_change_id.json', {'name': 'Lydia the Housecarl', 'race': 'Nord', 'base_id': '0BBBBB', 'bio': 'Renamed.'})
+    # Only matches by the new ID
+    _write_json(tmp_path / '03_by_new_id.json', {'name': 'Someone Else', 'race': 'Nord', 'base_id': '0BBBBB', 'voice_model': 'Female Nord'})
+
+    _apply_overrides(game, tmp_path)
+
+    assert len(game.character_df) == 3
+    assert game.character_df.loc[0].to_dict() == {'name': 'Someone Else', 'voice_model': 'Female Nord', 'race': 'Nord', 'base_id': '0BBBBB', 'bio': 'Renamed.'}
+    assert game._get_matching_df_row('0BBBBB', 'Someone Else', 'Nord') == 0
+    assert game._get_matching_df_row('0A2C8E', 'Lydia', 'Nord') is None
+
+
+def test_apply_character_overrides_matches_row_by_row_merge(tmp_path):
+    _write_json(tmp_path / '01_add.json', [
+        {'name': 'Test Character', 'race': 'Imperial', 'base_id': 'ABC123', 'bio': 'Added.'},
+        {'name': 'Guard', 'race': 'Nord', 'base_id': '0A8D3', 'voice_model': 'Male Commander'},
+    ])
+    with open(tmp_path / '02_mixed.csv', 'w') as f:
+        f.write("name,race,base_id,voice_model,bio\n")
+        f.write("Test Character,Imperial,ABC123,Male Nord,\n")
+        f.write("Belethor,Breton,01A66B,,Everything's for sale.\n")
+        f.write("Nazeem,Redguard,013BB9,Male Condescending,Do you get to the Cloud District very often?\n")
+        f.write("Lydia the Housecarl,Nord,0A2C8E,,\n")
+    _write_json(tmp_path / '03_update.json', [
+        {'name': 'Nazeem', 'race': 'Redguard', 'base_id': '013BB9', 'bio': 'Oh, what am I saying.'},
+        {'name': 'Lydia the Housecarl', 'race': 'Nord', 'base_id': '0BBBBB'},
+        {'name': 'Guard', 'race': 'Imperial', 'base_id': 'FFFFFF', 'bio': 'Another guard.'},
+    ])
+
+    game = _make_game(_make_characters())
+    _apply_overrides(game, tmp_path)
+    row_by_row_game = _make_game(_make_characters())
+    _apply_overrides_row_by_row(row_by_row_game, tmp_path)
+
+    pd.testing.assert_frame_equal(game.character_df, row_by_row_game.character_df, check_dtype=False, check_index_type=False)
+    for base_id, name, race in zip(game.character_df['base_id'], game.character_df['name'], game.character_df['race']):
+        assert game._get_matching_df_row(base_id, name, race) == row_by_row_game._get_matching_df_row(base_id, name, race)
@@ -1,5 +1,6 @@
 from src.http.routes.mantella_route import mantella_route
 import pytest
+import threading
 import wave
 from fastapi.testclient import TestClient
 from src.config.definitions.game_definitions import GameEnum
@@ -188,4 +189,66 @@ def test_setup_route_ends_conversation(default_config: ConfigLoader, english_lan
     assert second_game is not None
     
     # Assert that a new game instance was created
-    assert first_game is not second_game
\ No newline at end of file
+    assert first_game is not second_game
+
+def test_requests_are_processed_per_session_off_the_event_loop(server, default_mantella_route: mantella_route, monkeypatch):
+    """Requests with different session IDs should be handled by different game managers, on worker threads"""
+    created_managers = []
+    def create_mock_game_state_manager(self, voiceline_folder=None):
+        manager = MagicMock()
+        # Reply with the name of the thread the request was processed on
+        manager.end_conversation.side_effect = lambda json: {comm_consts.KEY_REPLYTYPE: threading.current_thread().name}
+        created_managers.append(manager)
+        return manager
+    monkeypatch.setattr(mantella_route, '_mantella_route__create_game_state_manager', create_mock_game_state_manager)
+    default_mantella_route._setup_route()
+    monkeypatch.setattr(default_mantella_route, '_can_route_be_used', lambda: True)
+    server._setup_routes([default_mantella_route])
+    client = TestClient(server.app)
+
+    end_request = models.EndConversationRequest(request_type=comm_consts.KEY_REQUESTTYPE_ENDCONVERSATION)
+    default_reply = client.post("/mantella", json=end_request.model_dump(by_alias=True, exclude_none=True)).json()
+    first_reply = client.post("/mantella", json={**end_request.model_dump(by_alias=True), comm_consts.KEY_SESSIONID: "first"}).json()
+    client.post("/mantella", json={**end_request.model_dump(by_alias=True), comm_consts.KEY_SESSIONID: "first"})
+    client.post("/mantella", json={**end_request.model_dump(by_alias=True), comm_consts.KEY_SESSIONID: "second"})
+
+    # One manager for the default session and one for each named session
+    assert len(created_managers) == 3
+    assert [m.end_conversation.call_count for m in created_managers] == [1, 2, 1]
+    assert default_reply[comm_consts.KEY_REPLYTYPE].startswith("mantella_request")
+    assert first_reply[comm_consts.KEY_REPLYTYPE].startswith("mantella_request")
+
+
+def test_sessions_get_their_own_voiceline_folder_and_inactive_sessions_are_ended(server, default_mantella_route: mantella_route, monkeypatch):
+    """Each named session should synthesize into its own folder, and the least recently used sessions beyond the cap should be ended"""
+    voiceline_folders = []
+    created_managers = []
+    def create_mock_game_state_manager(self, voiceline_folder=None):
+        voiceline_folders.append(voiceline_folder)
+        manager = MagicMock()
+        manager.end_conversation.return_value = {comm_consts.KEY_REPLYTYPE: comm_consts.KEY_REPLYTYPE_ENDCONVERSATION}
+        created_managers.append(manager)
+        return manager
+    monkeypatch.setattr(mantella_route, '_mantella_route__create_game_state_manager', create_mock_game_state_manager)
+    monkeypatch.setattr(mantella_route, 'MAX_SESSIONS', 1)
+    default_mantella_route._setup_route()
+    monkeypatch.setattr(default_mantella_route, '_can_route_be_used', lambda: True)
+    server._setup_routes([default_mantella_route])
+    client = TestClient(server.app)
+
+    init_request = models.InitRequest(request_type=comm_consts.KEY_REQUESTTYPE_INIT).model_dump(by_alias=True)
+    client.post("/mantella", json={**init_request, comm_consts.KEY_SESSIONID: "first"})
+    client.post("/mantella", json={**init_request, comm_consts.KEY_SESSIONID: "second"})
+
+    default_manager, first_manager, second_manager = created_managers
+    assert voiceline_folders[0] is None
+    assert voiceline_folders[1] != voiceline_folders[2]
+    # Starting the second session goes over the cap, so the first one is ended
+    first_manager.end_conversation.assert_called_once_with({})
+    second_manager.end_conversation.assert_not_called()
+    default_manager.end_conversation.assert_not_called()
+
+    # Setting the route up again ends the remaining sessions
+    default_mantella_route._setup_route()
+    second_manager.end_conversation.assert_called_once_with({})
+    default_manager.end_conversation.assert_called_once_with({})
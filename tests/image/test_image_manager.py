@@ -323,3 +323,37 @@ def test_get_image_handles_exception_and_resets_params(image_manager: ImageManag
     img_str = image_manager.get_image()
     assert img_str is None # Should return None on error
     reset_spy.assert_called_once() # Should have reset params
+
+
+def test_frame_hash_ignores_small_changes():
+    """Tests that the perceptual hash is close for near-identical frames and far for different scenes"""
+    rng = np.random.default_rng(0)
+    gradient = np.tile(np.linspace(0, 255, 512), (512, 1)).astype(np.uint8)
+    scene = np.dstack([gradient, gradient.T, gradient, np.full_like(gradient, 255)]) # BGRA, as captured by mss
+    noisy_scene = np.clip(scene.astype(np.int16) + rng.integers(-3, 4, scene.shape), 0, 255).astype(np.uint8)
+    different_scene = np.ascontiguousarray(scene[:, ::-1])
+
+    scene_hash = ImageManager._get_frame_hash(scene)
+
+    assert (scene_hash ^ ImageManager._get_frame_hash(noisy_scene)).bit_count() <= 2
+    assert (scene_hash ^ ImageManager._get_frame_hash(different_scene)).bit_count() > 16
+    assert ImageManager._get_frame_hash(scene[:, :, :3]) == scene_hash # BGR, as read from in-game screenshots
+
+
+def test_get_image_reuses_image_of_unchanged_scene(default_config: ConfigLoader, tmp_path: Path, mocker):
+    """Tests that the previous image is returned without encoding while the scene does not change"""
+    manager = ImageManager(default_config.game, str(tmp_path), False, 50, True, 'Nearest', {}, False, None, similar_frame_threshold=5)
+    mocker.patch('platform.system', return_value='Windows')
+    manager._ImageManager__capture_params = {"left": 0, "top": 0, "width": 600, "height": 600}
+    gradient = np.tile(np.linspace(0, 255, 600), (600, 1)).astype(np.uint8)
+    frames = [np.dstack([gradient] * 3), np.dstack([gradient + 1] * 3), np.dstack([gradient.T] * 3)]
+    mocker.patch.object(manager, '_take_screenshot', side_effect=[(frame, 600, 600) for frame in frames])
+    encode_spy = mocker.spy(manager, '_encode_image_to_jpeg')
+
+    first_image = manager.get_image()
+    unchanged_image = manager.get_image()
+    changed_image = manager.get_image()
+
+    assert unchanged_image is first_image
+    assert changed_image != first_image
+    assert encode_spy.call_count == 2
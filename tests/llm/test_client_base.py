@@ -1,5 +1,9 @@
+import asyncio
+import time
 import pytest
-from src.llm.client_base import ClientBase
+from types import SimpleNamespace
+from src.actions.function_manager import FunctionManager
+from src.llm.client_base import ClientBase, _DrainOnCloseStream, get_pool_limits
 from unittest.mock import patch
 import json
 import os
@@ -132,4 +136,184 @@ def test_nanogpt_success():
     """Test successful NanoGPT model list retrieval"""
     result = ClientBase.get_model_list("NanoGPT")
     assert result.default_model == "mistral-small-31-24b-instruct"
-    assert result.allows_manual_model_input is False
\ No newline at end of file
+    assert result.allows_manual_model_input is False
+
+def test_sync_client_is_reused_until_key_changes():
+    """The pooled sync client should be kept between calls and only rebuilt when the endpoint or key changes"""
+    client = ClientBase('http://localhost:5001/v1', 'local-model', None, 4096)
+
+    first_client = client._get_sync_client()
+    assert client._get_sync_client() is first_client
+
+    client._api_key = 'new-key'
+    new_client = client._get_sync_client()
+    assert new_client is not first_client
+    assert new_client.api_key == 'new-key'
+
+
+def test_pool_limits_are_read_from_config(default_config):
+    """The connection pool of the clients should use the limits set in the config"""
+    default_config.llm_max_connections = 3
+    default_config.llm_max_keepalive_connections = 2
+    default_config.llm_keepalive_expiry = 15.0
+    client = ClientBase('http://localhost:5001/v1', 'local-model', None, 4096, pool_limits=get_pool_limits(default_config))
+
+    pool = client._get_sync_client()._client._transport._pool
+    assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (3, 2, 15.0)
+    assert ClientBase('http://localhost:5001/v1', 'local-model', None, 4096)._pool_limits == ClientBase.default_pool_limits
+
+
+def test_async_client_is_reused_within_the_same_event_loop():
+    """The pooled async client should be reused within an event loop, but not across different event loops"""
+    client = ClientBase('http://localhost:5001/v1', 'local-model', None, 4096)
+
+    async def get_client_twice():
+        return client._get_async_client(), client._get_async_client()
+
+    with asyncio.Runner() as runner:
+        first, second = runner.run(get_client_twice())
+        assert first is second
+        third, _ = runner.run(get_client_twice())
+        assert third is first
+
+    fourth, _ = asyncio.run(get_client_twice())
+    assert fourth is not first
+
+
+class FakeStream:
+    def __init__(self, texts: list[str]):
+        self.__texts = texts
+        self.closed = False
+
+    async def __aiter__(self):
+        for text in self.__texts:
+            await asyncio.sleep(0.01)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text, tool_calls=None))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncClient:
+    def __init__(self, responses: list[list[str]], time_to_first_token: float):
+        self.__responses = responses
+        self.__time_to_first_token = time_to_first_token
+        self.requested_messages: list[list[dict]] = []
+        self.streams: list[FakeStream] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages: list[dict], **kwargs) -> FakeStream:
+        self.requested_messages.append(messages)
+        await asyncio.sleep(self.__time_to_first_token)
+        self.streams.append(FakeStream(self.__responses[len(self.streams)]))
+        return self.streams[-1]
+
+
+class FakeFunctionClient:
+    def __init__(self, tool_calls: list[dict] | None, duration: float):
+        self.__tool_calls = tool_calls
+        self.__duration = duration
+
+    def check_for_actions(self, messages, tools: list[dict]) -> list[dict] | None:
+        time.sleep(self.__duration)
+        return self.__tool_calls
+
+
+class FakeMessageThread:
+    def get_openai_messages(self) -> list[dict]:
+        return [{'role': 'user', 'content': 'Follow me.'}]
+
+    def get_last_message(self):
+        return None
+
+
+def make_tool_call(name: str) -> dict:
+    return {'id': 'call_1', 'type': 'function', 'function': {'name': name, 'arguments': ''}}
+
+
+def stream_response(client: ClientBase, tools: list[dict]) -> list[tuple[str, str | list]]:
+    async def collect():
+        return [item async for item in client.streaming_call(FakeMessageThread(), False, tools)]
+    return asyncio.run(collect())
+
+
+def test_function_llm_runs_alongside_response_stream(monkeypatch):
+    """Actions are chosen while the response starts streaming, and are still passed on before the response"""
+    client = ClientBase('http://localhost:5001/v1', 'local-model', None, 4096)
+    async_client = FakeAsyncClient([['Lead ', 'the way.']], time_to_first_token=0.3)
+    monkeypatch.setattr(client, '_get_async_client', lambda: async_client)
+    client._function_client = FakeFunctionClient([make_tool_call('Follow')], duration=0.3)
+
+    start_time = time.perf_counter()
+    items = stream_response(client, [{'type': 'function'}])
+
+    assert time.perf_counter() - start_time < 0.5
+    assert items == [('tool_calls', [make_tool_call('Follow')]), ('content', 'Lead '), ('content', 'the way.')]
+    assert async_client.streams[0].closed
+
+
+def test_response_is_restarted_with_image_when_function_llm_requests_vision(monkeypatch):
+    client = ClientBase('http://localhost:5001/v1', 'local-model', None, 4096)
+    async_client = FakeAsyncClient([['I see nothing.'], ['I see a dragon.']], time_to_first_token=0)
+    monkeypatch.setattr(client, '_get_async_client', lambda: async_client)
+    monkeypatch.setattr(FunctionManager, '_actions', {'mantella_npc_vision': {'name': 'Vision'}})
+    client._function_client = FakeFunctionClient([make_tool_call('Vision')], duration=0.1)
+    client._image_client = SimpleNamespace(add_image_to_messages=lambda messages, hints: messages + [{'role': 'user', 'content': 'image'}])
+
+    items = stream_response(client, [{'type': 'function'}])
+
+    assert items == [('tool_calls', [make_tool_call('Vision')]), ('content', 'I see a dragon.')]
+    assert len(async_client.requested_messages) == 2
+    assert {'role': 'user', 'content': 'image'} not in async_client.requested_messages[0]
+    assert {'role': 'user', 'content': 'image'} in async_client.requested_messages[1]
+    assert all(stream.closed for stream in async_client.streams)
+
+
+class _FakeByteStream:
+    """A response body that sends its chunks, then the end of the HTTP message once released"""
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+        self.message_ended = asyncio.Event()
+        self.closed = False
+        self.drained = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        await self.message_ended.wait()
+        self.drained = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_finished_stream_is_drained_before_it_is_closed():
+    async def read_until_done():
+        body = _FakeByteStream([b'data: {"content": "Hi"}\n\ndata: [DO', b'NE]\n\n'])
+        stream = _DrainOnCloseStream(body)
+        chunks_read = 0
+        async for _ in stream:
+            chunks_read += 1
+            if chunks_read == len(body.chunks): # the SDK stops reading once it has seen [DONE]
+                break
+        asyncio.get_running_loop().call_soon(body.message_ended.set)
+        await stream.aclose()
+        return body
+
+    body = asyncio.run(read_until_done())
+    assert body.drained and body.closed
+
+
+def test_stream_stopped_early_is_closed_without_draining():
+    async def stop_early():
+        body = _FakeByteStream([b'data: {"content": "Hi"}\n\n', b'data: [DONE]\n\n'])
+        stream = _DrainOnCloseStream(body)
+        async for _ in stream:
+            break
+        start_time = time.perf_counter()
+        await stream.aclose()
+        return body, time.perf_counter() - start_time
+
+    body, close_time = asyncio.run(stop_early())
+    assert body.closed and not body.drained
+    assert close_time < _DrainOnCloseStream.drain_timeout
@@ -188,4 +188,69 @@ def test_add_image_appends_new_message_if_needed_custom(image_client_custom_llm:
     # Check the content format *transcription*
     assert last_message['content'][0]['text'].startswith("*")
     assert last_message['content'][0]['text'].endswith("*")
-    assert len(last_message['content'][0]['text']) > 2 # Should contain more than just "**"
\ No newline at end of file
+    assert len(last_message['content'][0]['text']) > 2 # Should contain more than just "**"
+
+class CountingImageManager:
+    """Replacement for ImageManager that returns a new image on every capture"""
+    def __init__(self):
+        self.captures = 0
+
+    def get_image(self) -> str | None:
+        self.captures += 1
+        return f"image{self.captures}"
+
+
+def test_prefetched_image_is_described_before_it_is_added(image_client_custom_llm: ImageClient, sample_openai_messages: list, mocker):
+    """Tests that the image captured and described in the background is used instead of capturing a new one"""
+    image_manager = CountingImageManager()
+    image_client_custom_llm._ImageClient__image_manager = image_manager
+    request_call = mocker.patch.object(image_client_custom_llm, 'request_call', return_value="A snowy mountain pass.")
+
+    image_client_custom_llm.prefetch_image("A dragon flew overhead.")
+    result_messages = image_client_custom_llm.add_image_to_messages(list(sample_openai_messages), "A dragon flew overhead.")
+
+    assert image_manager.captures == 1
+    assert request_call.call_count == 1
+    assert result_messages[-1]['content'][0]['text'].startswith("*A snowy mountain pass.*")
+
+    # Without a new prefetch, the next image is captured when it is added
+    image_client_custom_llm.add_image_to_messages(list(sample_openai_messages), "A dragon flew overhead.")
+    assert image_manager.captures == 2
+
+
+def test_prefetched_image_is_described_again_if_hints_change(image_client_custom_llm: ImageClient, sample_openai_messages: list, mocker):
+    """Tests that the prefetched image is reused, but described with the latest in-game events"""
+    image_manager = CountingImageManager()
+    image_client_custom_llm._ImageClient__image_manager = image_manager
+    request_call = mocker.patch.object(image_client_custom_llm, 'request_call', return_value="A snowy mountain pass.")
+
+    image_client_custom_llm.prefetch_image("")
+    image_client_custom_llm.add_image_to_messages(list(sample_openai_messages), "A dragon flew overhead.")
+
+    assert image_manager.captures == 1
+    assert request_call.call_count == 2
+    assert "A dragon flew overhead." in request_call.call_args.args[0].text_content
+
+
+def test_out_of_date_prefetched_image_is_not_used(image_client_default_llm: ImageClient, sample_openai_messages: list, monkeypatch):
+    """Tests that an image prefetched too long ago is replaced by a new capture"""
+    image_manager = CountingImageManager()
+    image_client_default_llm._ImageClient__image_manager = image_manager
+    monkeypatch.setattr(ImageClient, 'MAX_PREFETCH_AGE', 0)
+
+    image_client_default_llm.prefetch_image("hint")
+    result_messages = image_client_default_llm.add_image_to_messages(list(sample_openai_messages), "hint")
+
+    assert result_messages[-1]['content'][1]['image_url']['url'].endswith("image2")
+
+
+def test_description_is_reused_for_unchanged_scene(image_client_custom_llm: ImageClient, sample_openai_messages: list, mocker):
+    """Tests that the vision model is not called again when the image manager returns the image of an unchanged scene"""
+    image_client_custom_llm._ImageClient__image_manager = FakeImageManager("unchanged_scene")
+    request_call = mocker.patch.object(image_client_custom_llm, 'request_call', return_value="A quiet tavern.")
+
+    first_messages = image_client_custom_llm.add_image_to_messages([dict(message) for message in sample_openai_messages], "hint")
+    second_messages = image_client_custom_llm.add_image_to_messages([dict(message) for message in sample_openai_messages], "hint")
+
+    assert request_call.call_count == 1
+    assert second_messages[-1]['content'] == first_messages[-1]['content']
@@ -67,7 +67,7 @@ def test_apis_load_correctly(default_config: ConfigLoader):
 @pytest.mark.requires_llm
 def test_startup_async_client_initialized(llm_client: LLMClient):
     """Tests that the initial async client is generated"""
-    assert llm_client._startup_async_client is not None
+    assert llm_client._async_client is not None
 
 
 def test_default_vision_model_loads_correctly(default_config: ConfigLoader):
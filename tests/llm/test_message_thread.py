@@ -0,0 +1,89 @@
+import tiktoken
+from src.config.config_loader import ConfigLoader
+from src.character_manager import Character
+from src.llm.message_thread import message_thread
+from src.llm.messages import AssistantMessage, UserMessage
+from src.llm.sentence import Sentence
+from src.llm.sentence_content import SentenceContent, SentenceTypeEnum
+
+
+class CountingEncoding:
+    """Wraps a tiktoken encoding and counts how often text is encoded"""
+    def __init__(self, encoding: tiktoken.Encoding):
+        self.__encoding = encoding
+        self.name = encoding.name
+        self.encode_calls = 0
+
+    def encode(self, text: str) -> list[int]:
+        self.encode_calls += 1
+        return self.__encoding.encode(text)
+
+
+def full_count(thread: message_thread, encoding: tiktoken.Encoding) -> int:
+    """Counts the tokens of every message in the thread from scratch"""
+    num_tokens = 0
+    for message in thread.get_openai_messages():
+        num_tokens += 4
+        for value in message.values():
+            if isinstance(value, str):
+                num_tokens += len(encoding.encode(value))
+    return num_tokens
+
+
+def test_token_count_is_cached_per_message(default_config: ConfigLoader):
+    encoding = CountingEncoding(tiktoken.get_encoding('cl100k_base'))
+    thread = message_thread(default_config, "system prompt")
+    thread.add_message(UserMessage(default_config, "Hello there", "Player"))
+
+    first_count = thread.get_token_count(encoding)
+    encode_calls = encoding.encode_calls
+    assert thread.get_token_count(encoding) == first_count
+    assert encoding.encode_calls == encode_calls
+
+    thread.add_message(UserMessage(default_config, "How are you?", "Player"))
+    thread.get_token_count(encoding)
+    # Only the new message should have been encoded
+    assert encoding.encode_calls == encode_calls + 2
+
+
+def test_running_total_follows_changes_to_messages(default_config: ConfigLoader, example_skyrim_npc_character: Character):
+    encoding = tiktoken.get_encoding('cl100k_base')
+    thread = message_thread(default_config, "system prompt")
+    user_message = UserMessage(default_config, "Hello there", "Player")
+    assistant_message = AssistantMessage(default_config)
+    thread.add_message(user_message)
+    thread.add_message(assistant_message)
+    assert thread.get_token_count(encoding) == full_count(thread, encoding)
+
+    user_message.add_event(["The player picked up a sword."])
+    assistant_message.add_sentence(Sentence(SentenceContent(example_skyrim_npc_character, "Well met, traveller.", SentenceTypeEnum.SPEECH, False), "", 0))
+    thread.modify_messages("a much longer system prompt than before", multi_npc_conversation=True)
+    assert thread.get_token_count(encoding) == full_count(thread, encoding)
+
+    thread.delete_all_message_type(UserMessage)
+    assert thread.get_token_count(encoding) == full_count(thread, encoding)
+
+
+def test_running_total_after_reload(default_config: ConfigLoader):
+    encoding = tiktoken.get_encoding('cl100k_base')
+    thread = message_thread(default_config, "system prompt")
+    for i in range(10):
+        thread.add_message(UserMessage(default_config, f"Message number {i}", "Player"))
+    thread.get_token_count(encoding)
+
+    thread.reload_message_thread("new prompt", lambda messages, percent: len(messages) > 3, 1.0)
+
+    assert len(thread) == 4
+    assert thread.get_token_count(encoding) == full_count(thread, encoding)
+
+
+def test_copied_messages_do_not_update_the_original_thread(default_config: ConfigLoader):
+    encoding = tiktoken.get_encoding('cl100k_base')
+    thread = message_thread(default_config, "system prompt")
+    thread.add_message(UserMessage(default_config, "Hello there", "Player"))
+    count = thread.get_token_count(encoding)
+
+    copied_message = thread.get_talk_only()[0]
+    copied_message.text = "This text is only changed on the copy"
+
+    assert thread.get_token_count(encoding) == count
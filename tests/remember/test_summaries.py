@@ -1,6 +1,7 @@
 import pytest
 import os
 import logging
+from threading import Event, Timer
 from unittest.mock import patch
 from src.config.config_loader import ConfigLoader
 from src.config.definitions.game_definitions import GameEnum
@@ -22,6 +23,12 @@ def _build_enough_messages(thread: message_thread, config: ConfigLoader, count:
         thread.add_message(AssistantMessage(config))
 
 
+def _append_summary(rememberer: Summaries, new_summary: str, npc_name: str, npc_ref_id: str, world_id: str, **resummarize_kwargs):
+    """Writes a summary the way a summary job does, resummarizing the summary file once it is too long"""
+    rememberer._Summaries__write_conversation_summary(new_summary, npc_name, npc_ref_id, world_id)
+    rememberer._Summaries__resummarize_if_too_long(npc_name, npc_ref_id, world_id, **resummarize_kwargs)
+
+
 class TestPerNpcThreadExtraction:
     def test_single_npc_gets_all_messages(self, default_config: ConfigLoader, default_rememberer: Summaries, example_skyrim_npc_character: Character):
         """A single NPC present for the full conversation should get all messages."""
@@ -281,6 +288,7 @@ class TestSummarizationHappensOncePerNPC:
         # Reload save (triggered by character departure)
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Guard departure summary.\n\n"):
             default_rememberer.save_conversation_state(thread, [guard], npcs, world_id, is_reload=True)
+            default_rememberer.wait_for_pending_summaries()
 
         # Conversation continues with just Lydia
         _build_enough_messages(thread, default_config)
@@ -288,6 +296,7 @@ class TestSummarizationHappensOncePerNPC:
         # Final save (triggered at conversation end)
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Final summary.\n\n") as mock_summarize:
             default_rememberer.save_conversation_state(thread, [lydia], npcs, world_id, is_reload=False)
+            default_rememberer.wait_for_pending_summaries()
 
             # The guard was already summarized in the reload save.
             # The final save should only produce one summarization call (for Lydia).
@@ -321,6 +330,7 @@ class TestSummarizationHappensOncePerNPC:
         # Reload save (guard gets summarized here)
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Guard was at the sawmill.\n\n"):
             default_rememberer.save_conversation_state(thread, [guard], npcs, world_id, is_reload=True)
+            default_rememberer.wait_for_pending_summaries()
 
         # Conversation continues
         _build_enough_messages(thread, default_config)
@@ -328,6 +338,7 @@ class TestSummarizationHappensOncePerNPC:
         # Final save at conversation end
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Lydia continued talking.\n\n"):
             default_rememberer.save_conversation_state(thread, [lydia], npcs, world_id, is_reload=False)
+            default_rememberer.wait_for_pending_summaries()
 
         # Guard's summary file should have exactly one entry (from the reload save)
         guard_folder = os.path.join(skyrim.conversation_folder_path, world_id, f"Guard - {guard.ref_id}")
@@ -368,6 +379,7 @@ class TestSummaryLocationByGame:
 
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Summary.\n\n") as mock_summarize:
             default_rememberer.save_conversation_state(thread, [guard], npcs, world_id, is_reload=False)
+            default_rememberer.wait_for_pending_summaries()
 
             assert mock_summarize.call_count == 1
             prompt_arg = mock_summarize.call_args[0][1]
@@ -397,6 +409,7 @@ class TestSummaryLocationByGame:
 
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Summary.\n\n") as mock_summarize:
             default_rememberer.save_conversation_state(thread, [guard], npcs, world_id, is_reload=False)
+            default_rememberer.wait_for_pending_summaries()
 
             assert mock_summarize.call_count == 1
             prompt_arg = mock_summarize.call_args[0][1]
@@ -425,6 +438,7 @@ class TestGenderAndRacePromptVariables:
 
         with patch.object(rememberer, 'summarize_conversation', return_value="Summary.\n\n") as mock_summarize:
             rememberer.save_conversation_state(thread, [example_skyrim_npc_character], npcs, world_id)
+            rememberer.wait_for_pending_summaries()
 
             assert mock_summarize.call_count == 1
             prompt_arg = mock_summarize.call_args[0][1]
@@ -456,6 +470,7 @@ class TestGenderAndRacePromptVariables:
             rememberer.save_conversation_state(
                 thread, [example_skyrim_npc_character, another_example_skyrim_npc_character], npcs, world_id
             )
+            rememberer.wait_for_pending_summaries()
 
             prompt_arg = mock_summarize.call_args[0][1]
 
@@ -478,6 +493,7 @@ class TestGenderAndRacePromptVariables:
 
         with patch.object(default_rememberer, 'summarize_conversation', return_value="Summary.\n\n") as mock_summarize:
             default_rememberer.save_conversation_state(thread, [example_skyrim_npc_character], npcs, world_id)
+            default_rememberer.wait_for_pending_summaries()
 
             prompt_arg = mock_summarize.call_args[0][1]
 
@@ -503,7 +519,7 @@ class TestGenderAndRacePromptVariables:
 
         with patch.object(client, 'get_count_tokens', return_value=99999), \
              patch.object(rememberer, 'summarize_conversation', return_value="Resummarized.") as mock_summarize:
-            rememberer._Summaries__append_new_conversation_summary(
+            _append_summary(rememberer,
                 "New summary.", guard.name, guard.ref_id, world_id,
                 npc_gender=guard.gender, npc_race=guard.race
             )
@@ -542,6 +558,7 @@ class TestPendingShares:
             default_rememberer.save_conversation_state(
                 thread, [guard], npcs, world_id, is_reload=False, pending_shares=pending_shares
             )
+            default_rememberer.wait_for_pending_summaries()
 
         recipient_folder = os.path.join(
             skyrim.conversation_folder_path, world_id, f"{recipient_name} - {recipient_ref_id}"
@@ -582,6 +599,7 @@ class TestPendingShares:
             default_rememberer.save_conversation_state(
                 thread, [guard], npcs, world_id, is_reload=False, pending_shares=pending_shares
             )
+            default_rememberer.wait_for_pending_summaries()
 
         recipient_folder = os.path.join(
             skyrim.conversation_folder_path, world_id, f"{recipient_name} - {recipient_ref_id}"
@@ -618,6 +636,7 @@ class TestTimestampPrefix:
             default_rememberer.save_conversation_state(
                 thread, [guard], npcs, world_id, is_reload=False, end_timestamp=42.75
             )
+            default_rememberer.wait_for_pending_summaries()
 
         guard_folder = os.path.join(skyrim.conversation_folder_path, world_id, f"Guard - {guard.ref_id}")
         guard_summary_file = os.path.join(guard_folder, "Guard_summary_1.txt")
@@ -654,6 +673,7 @@ class TestTimestampPrefix:
             default_rememberer.save_conversation_state(
                 thread, [guard], npcs, world_id, is_reload=False, end_timestamp=42.75
             )
+            default_rememberer.wait_for_pending_summaries()
 
         guard_folder = os.path.join(skyrim.conversation_folder_path, world_id, f"Guard - {guard.ref_id}")
         guard_summary_file = os.path.join(guard_folder, "Guard_summary_1.txt")
@@ -690,6 +710,7 @@ class TestTimestampPrefix:
             default_rememberer.save_conversation_state(
                 thread, [guard], npcs, world_id, is_reload=False, end_timestamp=None
             )
+            default_rememberer.wait_for_pending_summaries()
 
         guard_folder = os.path.join(skyrim.conversation_folder_path, world_id, f"Guard - {guard.ref_id}")
         guard_summary_file = os.path.join(guard_folder, "Guard_summary_1.txt")
@@ -721,7 +742,7 @@ class TestResummarization:
 
         with patch.object(client, 'get_count_tokens', return_value=99999), \
              patch.object(default_rememberer, 'summarize_conversation', return_value="Resummarized content."):
-            default_rememberer._Summaries__append_new_conversation_summary(
+            _append_summary(default_rememberer,
                 new_summary, guard.name, guard.ref_id, world_id
             )
 
@@ -746,7 +767,7 @@ class TestResummarization:
 
         with patch.object(client, 'get_count_tokens', return_value=99999), \
              patch.object(default_rememberer, 'summarize_conversation', return_value="Resummarized.") as mock_summarize:
-            default_rememberer._Summaries__append_new_conversation_summary(
+            _append_summary(default_rememberer,
                 "New summary.", guard.name, guard.ref_id, world_id
             )
 
@@ -770,7 +791,7 @@ class TestResummarization:
 
         with patch.object(client, 'get_count_tokens', return_value=99999), \
              patch.object(default_rememberer, 'summarize_conversation', return_value="Resummarized.") as mock_summarize:
-            default_rememberer._Summaries__append_new_conversation_summary(
+            _append_summary(default_rememberer,
                 "New summary.", guard.name, guard.ref_id, world_id, player_name="Dragonborn"
             )
 
@@ -840,3 +861,110 @@ class TestSummarizeConversation:
         assert "Someone" in result
         assert "The player" in result
         assert "the player" in result
+
+
+class TestBackgroundSummaries:
+    """Tests that summaries are created in the background and only awaited when they are needed."""
+
+    def test_prompt_text_waits_for_queued_summary(
+        self, default_config: ConfigLoader, llm_client: LLMClient,
+        default_rememberer: Summaries, english_language_info: dict,
+        example_skyrim_player_character: Character, example_skyrim_npc_character: Character
+    ):
+        """save_conversation_state should return before the summary is created, get_prompt_text should wait for it."""
+        guard = example_skyrim_npc_character
+        world_id = "TestWorld"
+
+        context = Context(world_id, default_config, llm_client, default_rememberer, english_language_info)
+        context.add_or_update_characters([example_skyrim_player_character, guard], message_count=0)
+
+        thread = message_thread(default_config, "system prompt")
+        _build_enough_messages(thread, default_config)
+        npcs = context.npcs_in_conversation
+
+        summary_requested = Event()
+        release_summary = Event()
+        def slow_summary(text: str, prompt: str) -> str:
+            summary_requested.set()
+            release_summary.wait(5)
+            return "Guard talked about the weather.\n\n"
+
+        with patch.object(default_rememberer, 'summarize_conversation', side_effect=slow_summary):
+            default_rememberer.save_conversation_state(thread, [guard], npcs, world_id)
+            assert summary_requested.wait(5)
+            assert default_rememberer.get_prompt_text([], world_id) == ""
+
+            Timer(0.2, release_summary.set).start()
+            prompt_text = default_rememberer.get_prompt_text([guard], world_id)
+
+        assert "Guard talked about the weather." in prompt_text
+
+    def test_prompt_text_falls_back_to_saved_summaries_after_timeout(
+        self, default_config: ConfigLoader, llm_client: LLMClient,
+        default_rememberer: Summaries, english_language_info: dict,
+        example_skyrim_player_character: Character, example_skyrim_npc_character: Character, monkeypatch
+    ):
+        """get_prompt_text should not wait longer than the timeout for a summary that is stuck"""
+        guard = example_skyrim_npc_character
+        world_id = "TestWorld"
+        _append_summary(default_rememberer, "Guard met the player.\n\n", guard.name, guard.ref_id, world_id)
+
+        context = Context(world_id, default_config, llm_client, default_rememberer, english_language_info)
+        context.add_or_update_characters([example_skyrim_player_character, guard], message_count=0)
+        thread = message_thread(default_config, "system prompt")
+        _build_enough_messages(thread, default_config)
+
+        summary_requested = Event()
+        release_summary = Event()
+        def stuck_summary(text: str, prompt: str) -> str:
+            summary_requested.set()
+            release_summary.wait(5)
+            return "Guard talked about the weather.\n\n"
+
+        monkeypatch.setattr(Summaries, 'pending_summary_timeout_seconds', 0.1)
+        with patch.object(default_rememberer, 'summarize_conversation', side_effect=stuck_summary):
+            default_rememberer.save_conversation_state(thread, [guard], context.npcs_in_conversation, world_id)
+            assert summary_requested.wait(5)
+            prompt_text = default_rememberer.get_prompt_text([guard], world_id)
+            release_summary.set()
+            assert default_rememberer.wait_for_pending_summaries(timeout=5)
+
+        assert "Guard met the player." in prompt_text
+        assert "Guard talked about the weather." not in prompt_text
+
+
+class TestSummaryIndex:
+    """Tests that summaries are only read from disk again after their files have changed."""
+
+    def test_prompt_text_is_cached_until_summary_is_written(self, default_rememberer: Summaries, example_skyrim_npc_character: Character):
+        guard = example_skyrim_npc_character
+        world_id = "TestWorld"
+        _append_summary(default_rememberer, "Guard met the player.\n\n", guard.name, guard.ref_id, world_id)
+        prompt_text = default_rememberer.get_prompt_text([guard], world_id)
+        assert "Guard met the player." in prompt_text
+
+        with patch('os.listdir', side_effect=AssertionError("Summary folder should not be scanned")), \
+             patch('src.remember.summaries.open', create=True, side_effect=AssertionError("Summary file should not be read")):
+            assert default_rememberer.get_prompt_text([guard], world_id) == prompt_text
+
+        _append_summary(default_rememberer, "Guard met the player.\nGuard saw a dragon.\n\n", guard.name, guard.ref_id, world_id)
+        prompt_text = default_rememberer.get_prompt_text([guard], world_id)
+        assert prompt_text.count("Guard met the player.") == 1
+        assert "Guard saw a dragon." in prompt_text
+
+    def test_summaries_changed_outside_of_mantella_are_reloaded(self, skyrim: Skyrim, default_rememberer: Summaries, example_skyrim_npc_character: Character):
+        guard = example_skyrim_npc_character
+        world_id = "TestWorld"
+        _append_summary(default_rememberer, "Guard met the player.\n\n", guard.name, guard.ref_id, world_id)
+        assert "Guard met the player." in default_rememberer.get_prompt_text([guard], world_id)
+
+        folder = os.path.join(skyrim.conversation_folder_path, world_id, f"Guard - {guard.ref_id}")
+        with open(os.path.join(folder, "Guard_summary_1.txt"), 'w', encoding='utf-8') as f:
+            f.write("Guard was edited by hand.\n\n")
+        assert "Guard was edited by hand." in default_rememberer.get_prompt_text([guard], world_id)
+
+        with open(os.path.join(folder, "Guard_summary_2.txt"), 'w', encoding='utf-8') as f:
+            f.write("Guard has a new summary file.\n\n")
+        prompt_text = default_rememberer.get_prompt_text([guard], world_id)
+        assert "Guard has a new summary file." in prompt_text
+        assert "Guard was edited by hand." not in prompt_text
@@ -0,0 +1,84 @@
+import os
+from threading import Event
+from src.remember.summary_job_queue import SummaryJob, SummaryJobQueue
+
+
+def test_jobs_are_resumed_from_disk(tmp_path):
+    queue_folder = str(tmp_path / "summary_queue")
+    first_queue = SummaryJobQueue(queue_folder)
+    first_queue.add_job({'text': 'unfinished'}, ['TestWorld/Guard - 1'])
+    # The first queue never gets a handler, as if Mantella was closed before the job ran
+    assert len(os.listdir(queue_folder)) == 1
+
+    processed: list[str] = []
+    resumed_queue = SummaryJobQueue(queue_folder)
+    resumed_queue.set_handler(lambda job, save_progress: processed.append(job['text']))
+
+    assert resumed_queue.wait_for_jobs(timeout=5)
+    assert processed == ['unfinished']
+    assert os.listdir(queue_folder) == []
+
+
+def test_failed_job_is_retried_with_saved_progress(tmp_path):
+    queue_folder = str(tmp_path / "summary_queue")
+    queue = SummaryJobQueue(queue_folder)
+    queue.retry_delay_seconds = 0.05
+    attempts: list[str | None] = []
+
+    def handler(job: SummaryJob, save_progress):
+        attempts.append(job['summary'])
+        if job['summary'] is None:
+            job['summary'] = 'created once'
+            save_progress()
+            raise Exception("Writing the summary failed")
+
+    queue.add_job({'summary': None}, ['TestWorld/Guard - 1'])
+    queue.set_handler(handler)
+
+    assert queue.wait_for_jobs(timeout=5)
+    assert attempts == [None, 'created once']
+
+
+def test_job_is_given_up_after_max_attempts(tmp_path):
+    queue_folder = str(tmp_path / "summary_queue")
+    queue = SummaryJobQueue(queue_folder)
+    queue.retry_delay_seconds = 0.01
+    queue.max_attempts = 3
+    attempts: list[int] = []
+
+    def handler(job: SummaryJob, save_progress):
+        attempts.append(job['attempts'])
+        raise Exception("The LLM is unavailable")
+
+    queue.add_job({'summary': None}, ['TestWorld/Guard - 1'])
+    queue.set_handler(handler)
+
+    assert queue.wait_for_jobs(timeout=5)
+    assert attempts == [0, 1, 2]
+    # The failed job is kept on disk, but is not resumed on the next start
+    assert os.listdir(queue_folder) == ['0000000001.json.failed']
+    assert not SummaryJobQueue(queue_folder).has_pending_jobs()
+
+
+def test_jobs_only_wait_for_jobs_with_the_same_keys(tmp_path):
+    queue = SummaryJobQueue(str(tmp_path / "summary_queue"))
+    release_guard = Event()
+    finished: list[str] = []
+
+    def handler(job: SummaryJob, save_progress):
+        if job['name'] == 'Guard first':
+            release_guard.wait(5)
+        finished.append(job['name'])
+
+    queue.add_job({'name': 'Guard first'}, ['TestWorld/Guard - 1'])
+    queue.add_job({'name': 'Guard second'}, ['TestWorld/Guard - 1'])
+    queue.add_job({'name': 'Lydia'}, ['TestWorld/Lydia - 2'])
+    queue.set_handler(handler)
+
+    assert queue.wait_for_jobs(['TestWorld/Lydia - 2'], timeout=5)
+    assert finished == ['Lydia']
+    assert queue.has_pending_jobs(['TestWorld/Guard - 1'])
+
+    release_guard.set()
+    assert queue.wait_for_jobs(timeout=5)
+    assert finished == ['Lydia', 'Guard first', 'Guard second']
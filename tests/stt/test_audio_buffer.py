@@ -0,0 +1,105 @@
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch
+import numpy as np
+import pytest
+from src.config.config_loader import ConfigLoader
+from src.stt.audio_buffer import AudioBuffer
+from src.stt.stt import Transcriber
+
+
+class AlwaysSpeakingVAD:
+    """Stands in for Silero VAD so that synthetic audio is treated as one long utterance"""
+    def process(self, chunk: np.ndarray) -> float:
+        return 1.0
+
+    def reset(self) -> None:
+        pass
+
+
+def make_chunks(seconds: float) -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    chunk_count = int(seconds / Transcriber.CHUNK_DURATION)
+    return [rng.uniform(-0.5, 0.5, Transcriber.CHUNK_SIZE).astype(np.float32) for _ in range(chunk_count)]
+
+
+def test_appended_chunks_are_kept_in_order():
+    buffer = AudioBuffer(4)
+    buffer.append(np.array([1, 2, 3], dtype=np.float32))
+    buffer.append(np.array([4, 5, 6], dtype=np.float32))
+
+    assert len(buffer) == 6
+    assert buffer.capacity >= 6
+    np.testing.assert_array_equal(buffer.view(), [1, 2, 3, 4, 5, 6])
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.capacity >= 6
+
+
+def test_pre_roll_is_kept_without_growing():
+    buffer = AudioBuffer(16)
+    for value in range(100):
+        buffer.append(np.full(2, value, dtype=np.float32))
+        buffer.keep_last(4)
+
+    assert buffer.capacity == 16
+    np.testing.assert_array_equal(buffer.view(), [98, 98, 99, 99])
+
+
+def test_view_shares_memory_with_buffer():
+    buffer = AudioBuffer(8)
+    buffer.append(np.array([1, 2, 3], dtype=np.float32))
+
+    assert np.shares_memory(buffer.view(), buffer.view())
+    assert buffer.view().base is not None
+
+
+@pytest.fixture
+def transcriber(default_config: ConfigLoader) -> Transcriber:
+    default_config.stt_service = 'whisper'
+    default_config.external_whisper_service = False
+    default_config.proactive_mic_mode = False
+    default_config.ptt_enabled = False
+    default_config.save_mic_input = False
+    default_config.listen_timeout = 120
+    default_config.pause_threshold = 120
+    with patch('src.stt.stt.WhisperModel'):
+        transcriber = Transcriber(default_config)
+    transcriber._reset_state()
+    transcriber.vad = AlwaysSpeakingVAD()
+    return transcriber
+
+
+def process_synthetic_speech(transcriber: Transcriber, chunks: list[np.ndarray]) -> int:
+    """Feeds chunks through `_process_audio` and returns the peak memory allocated while processing them"""
+    transcriber._reset_state()
+    transcriber.vad = AlwaysSpeakingVAD()
+    for chunk in chunks:
+        transcriber._audio_queue.put((chunk, None))
+
+    tracemalloc.start()
+    transcriber._running = True
+    processing_thread = threading.Thread(target=transcriber._process_audio, daemon=True)
+    processing_thread.start()
+    while not transcriber._audio_queue.empty():
+        time.sleep(0.01)
+    transcriber._running = False
+    processing_thread.join()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_memory
+
+
+def test_process_audio_copies_buffer_once_for_long_speech(transcriber: Transcriber):
+    short_seconds, long_seconds = 5, 60
+    process_synthetic_speech(transcriber, make_chunks(short_seconds))
+    capacity = transcriber._audio_buffer.capacity
+    long_peak_memory = process_synthetic_speech(transcriber, make_chunks(long_seconds))
+
+    assert len(transcriber._audio_buffer) == int(long_seconds / Transcriber.CHUNK_DURATION) * Transcriber.CHUNK_SIZE
+    # Growing from the preallocated 30 seconds to 60 seconds of speech copies the buffer once, instead of once per chunk
+    assert transcriber._audio_buffer.capacity == capacity * 2
+    one_second_of_audio = Transcriber.SAMPLING_RATE * np.dtype(np.float32).itemsize
+    assert long_peak_memory < (transcriber._audio_buffer.capacity * np.dtype(np.float32).itemsize) + one_second_of_audio
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+import pytest
+from src.config.config_loader import ConfigLoader
+from src.stt.stt import Transcriber
+
+WORD_SECONDS = 0.4
+GAP_SECONDS = 0.2
+
+
+def make_utterance(word_count: int) -> np.ndarray:
+    """Synthetic speech where each word is a run of samples set to its (1-based) index / 1000, followed by silence"""
+    word_samples = int(WORD_SECONDS * Transcriber.SAMPLING_RATE)
+    gap_samples = int(GAP_SECONDS * Transcriber.SAMPLING_RATE)
+    utterance = np.zeros(word_count * (word_samples + gap_samples), dtype=np.float32)
+    for index in range(word_count):
+        start = index * (word_samples + gap_samples)
+        utterance[start:start + word_samples] = (index + 1) / 1000
+    return utterance
+
+
+def find_words(audio: np.ndarray) -> list[tuple[str, float, float]]:
+    """Returns the text, start and end time of each word in synthetic speech"""
+    words = []
+    boundaries = np.flatnonzero(np.diff(audio, prepend=0, append=0)) # the samples where a word starts or ends
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if audio[start] != 0:
+            words.append((f" word{round(audio[start] * 1000)}", start / Transcriber.SAMPLING_RATE, end / Transcriber.SAMPLING_RATE))
+    return words
+
+
+class FakeWhisperModel:
+    def __init__(self) -> None:
+        self.decoded_seconds: list[float] = []
+
+    def transcribe(self, audio: np.ndarray, **kwargs):
+        assert kwargs['word_timestamps']
+        self.decoded_seconds.append(len(audio) / Transcriber.SAMPLING_RATE)
+        words = [SimpleNamespace(word=text, start=start, end=end) for text, start, end in find_words(audio)]
+        return [SimpleNamespace(text=''.join(word.word for word in words), words=words)], None
+
+
+class FakeMoonshineModel:
+    def __init__(self) -> None:
+        self.decoded_seconds: list[float] = []
+
+    def generate(self, audio: np.ndarray):
+        self.decoded_seconds.append(audio.shape[1] / Transcriber.SAMPLING_RATE)
+        return [''.join(text for text, _, _ in find_words(audio[0]))]
+
+
+class SilenceVAD:
+    """Treats every chunk with a non-zero sample as speech"""
+    def process(self, chunk: np.ndarray) -> float:
+        return 1.0 if np.any(chunk) else 0.0
+
+    def reset(self) -> None:
+        pass
+
+
+@pytest.fixture
+def proactive_config(default_config: ConfigLoader) -> ConfigLoader:
+    default_config.external_whisper_service = False
+    default_config.proactive_mic_mode = True
+    default_config.ptt_enabled = False
+    default_config.save_mic_input = False
+    default_config.min_refresh_secs = 0.3
+    default_config.listen_timeout = 120
+    default_config.pause_threshold = 120
+    return default_config
+
+
+def create_transcriber(config: ConfigLoader, model) -> Transcriber:
+    with patch('src.stt.stt.WhisperModel'):
+        transcriber = Transcriber(config)
+    transcriber.transcribe_model = model
+    transcriber.tokenizer = SimpleNamespace(decode_batch=lambda tokens: tokens)
+    transcriber.vad = SilenceVAD()
+    transcriber._reset_state()
+    return transcriber
+
+
+def speak(transcriber: Transcriber, utterance: np.ndarray) -> str:
+    lookback_size = Transcriber.LOOKBACK_CHUNKS * Transcriber.CHUNK_SIZE
+    chunk_count = 0
+    for start in range(0, len(utterance) - Transcriber.CHUNK_SIZE + 1, Transcriber.CHUNK_SIZE):
+        chunk_count = transcriber._process_vad_chunk(utterance[start:start + Transcriber.CHUNK_SIZE], lookback_size, chunk_count)
+    return transcriber._transcribe(transcriber._audio_buffer.view())
+
+
+def test_whisper_only_decodes_the_tail_of_long_utterances(proactive_config: ConfigLoader):
+    proactive_config.stt_service = 'whisper'
+    model = FakeWhisperModel()
+    transcriber = create_transcriber(proactive_config, model)
+    word_count = 60
+
+    transcription = speak(transcriber, make_utterance(word_count))
+
+    assert transcription == ' '.join(f'word{index + 1}' for index in range(word_count))
+    assert len(model.decoded_seconds) > 50
+    # Each update decodes the tail window plus the audio since the last commit, rather than the whole 36 second utterance
+    assert max(model.decoded_seconds) < Transcriber.INCREMENTAL_TAIL_SECONDS + 2
+    assert transcriber._committed_samples > 0
+
+
+def test_moonshine_commits_audio_up_to_pauses(proactive_config: ConfigLoader):
+    proactive_config.stt_service = 'moonshine'
+    model = FakeMoonshineModel()
+    transcriber = create_transcriber(proactive_config, model)
+    word_count = 60
+
+    transcription = speak(transcriber, make_utterance(word_count))
+
+    assert transcription == ' '.join(f'word{index + 1}' for index in range(word_count)) + '.'
+    assert max(model.decoded_seconds) < Transcriber.INCREMENTAL_TAIL_SECONDS + 2
+
+
+def test_state_is_cleared_between_utterances(proactive_config: ConfigLoader):
+    proactive_config.stt_service = 'whisper'
+    transcriber = create_transcriber(proactive_config, FakeWhisperModel())
+    speak(transcriber, make_utterance(30))
+
+    transcriber._reset_state()
+
+    assert transcriber._committed_samples == 0
+    assert transcriber._committed_text == ''
+    assert speak(transcriber, make_utterance(2)) == 'word1 word2'
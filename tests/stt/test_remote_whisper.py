@@ -0,0 +1,62 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from unittest.mock import patch
+import numpy as np
+import pytest
+from src.config.config_loader import ConfigLoader
+from src.stt.stt import Transcriber
+
+
+class WhisperServerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep connections open between requests
+    client_addresses: list[tuple[str, int]] = []
+    uploaded_audio: list[bytes] = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        WhisperServerHandler.client_addresses.append(self.client_address)
+        WhisperServerHandler.uploaded_audio.append(body)
+        response = json.dumps({'text': ' Hello there. '}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def whisper_server_url() -> Iterator[str]:
+    WhisperServerHandler.client_addresses = []
+    WhisperServerHandler.uploaded_audio = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), WhisperServerHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/inference'
+    server.shutdown()
+    server.server_close()
+
+
+def test_custom_server_connection_is_reused_between_transcriptions(default_config: ConfigLoader, whisper_server_url: str):
+    default_config.stt_service = 'whisper'
+    default_config.external_whisper_service = True
+    default_config.whisper_url = whisper_server_url
+    audio = np.zeros(Transcriber.SAMPLING_RATE, dtype=np.float32)
+
+    with patch('src.stt.stt.WhisperModel'):
+        transcriber = Transcriber(default_config)
+        assert transcriber.whisper_transcribe(audio, '') == 'Hello there.'
+        assert transcriber.whisper_transcribe(audio, '') == 'Hello there.'
+        transcriber.close()
+        # A new Transcriber for the same server keeps using the open connection
+        next_transcriber = Transcriber(default_config)
+        assert next_transcriber.whisper_transcribe(audio, '') == 'Hello there.'
+        next_transcriber.close()
+
+    assert len(WhisperServerHandler.client_addresses) == 3
+    assert len(set(WhisperServerHandler.client_addresses)) == 1
+    assert b'RIFF' in WhisperServerHandler.uploaded_audio[0]
@@ -0,0 +1,37 @@
+from unittest.mock import patch
+import numpy as np
+from src.config.config_loader import ConfigLoader
+from src.stt.stt import Transcriber
+from src.stt.vad_pool import VADPool
+
+
+def test_released_vad_is_reused_with_a_cleared_state():
+    pool = VADPool(16000)
+    vad = pool.acquire()
+    chunk = np.random.default_rng(0).uniform(-0.5, 0.5, 512).astype(np.float32)
+    first_probability = vad.process(chunk.tobytes())
+    vad.process(chunk.tobytes())
+    pool.release(vad)
+
+    reused_vad = pool.acquire()
+    assert reused_vad is vad
+    # The state left by the previous stream does not affect the next one
+    assert reused_vad.process(chunk.tobytes()) == first_probability
+    assert pool.acquire() is not vad
+
+
+def test_transcriber_resets_its_vad_instead_of_reloading_it(default_config: ConfigLoader):
+    default_config.stt_service = 'whisper'
+    default_config.external_whisper_service = False
+    with patch('src.stt.stt.WhisperModel'):
+        transcriber = Transcriber(default_config)
+    vad = transcriber.vad
+
+    with patch('src.stt.vad_pool.SileroVAD', side_effect=AssertionError("The VAD model should not be loaded again")):
+        transcriber._reset_state()
+        assert transcriber.vad is vad
+
+        transcriber.close()
+        with patch('src.stt.stt.WhisperModel'):
+            next_transcriber = Transcriber(default_config)
+    assert next_transcriber.vad is vad
@@ -612,3 +612,65 @@ async def test_process_response_stores_discarded_character_on_partial_response(o
     assert len(real_sentences) == 1
     assert "Thank you for your service" in real_sentences[0].content.text
     assert output_manager.discarded_character_name == "Hulda"
+
+
+@pytest.mark.asyncio
+async def test_process_response_keeps_sentence_order_while_streaming_during_synthesis(output_manager: ChatManager, example_skyrim_npc_character: Character, example_characters_pc_to_npc: Characters, mock_queue: SentenceQueue, mock_messages: message_thread, mock_actions: list[Action]):
+    """Sentences are voiced by a separate worker while the LLM stream keeps being read, but should still reach the queue in their original order"""
+    streamed_chunks = []
+    async def tracked_streaming_call(messages=None, is_multi_npc=False, tools=None):
+        for chunk in ["First sentence here. ", "Second sentence here. ", "Third sentence here."]:
+            streamed_chunks.append(chunk)
+            yield ("content", chunk)
+    output_manager._ChatManager__client.streaming_call = tracked_streaming_call
+
+    chunks_streamed_after_first_synthesis: list[int] = []
+    def slow_synthesize(voice, text, *args, **kwargs):
+        # Voice earlier sentences more slowly to catch any reordering
+        time.sleep(0.2 if "First" in text else 0.01)
+        if "First" in text:
+            chunks_streamed_after_first_synthesis.append(len(streamed_chunks))
+        return ("mock_audio_file.wav", False)
+    output_manager.tts.synthesize = slow_synthesize
+
+    await output_manager.process_response(example_skyrim_npc_character, mock_queue, mock_messages, example_characters_pc_to_npc, mock_actions, tools=None)
+
+    output_sentences = get_sentence_list_from_queue(mock_queue)
+    assert [s.content.text.strip() for s in output_sentences] == ["First sentence here.", "Second sentence here.", "Third sentence here.", ""]
+    # The stream should have been read to the end while the first sentence was still being voiced
+    assert chunks_streamed_after_first_synthesis == [3]
+
+
+def test_presynthesize_voicelines_only_voices_characters_with_the_loaded_voice(output_manager: ChatManager, example_skyrim_npc_character: Character, another_example_skyrim_npc_character: Character, monkeypatch):
+    monkeypatch.setattr(type(output_manager.tts), 'caches_voicelines', True, raising=False)
+    output_manager.tts.is_voice_loaded = lambda voice, *args: voice == another_example_skyrim_npc_character.tts_voice_model
+    presynthesis_thread = output_manager.presynthesize_voicelines([example_skyrim_npc_character, another_example_skyrim_npc_character], ["Safe travels.", "Hm", "Farewell."])
+    assert presynthesis_thread is not None
+    presynthesis_thread.join(timeout=5)
+
+    # The voice model of the first character is not loaded, so loading it for presynthesis is skipped
+    calls = output_manager.tts.synthesize.call_args_list
+    assert [(call.args[0], call.args[1].strip()) for call in calls] == [("FemaleEvenToned", "Safe travels."), ("FemaleEvenToned", "Farewell.")]
+    # Lip files are generated for presynthesized lines so they can be reused anywhere in a response
+    assert all(not call.args[5].is_first_line_of_response for call in calls)
+
+
+def test_presynthesize_voicelines_stops_once_a_response_starts(output_manager: ChatManager, example_skyrim_npc_character: Character, monkeypatch):
+    monkeypatch.setattr(type(output_manager.tts), 'caches_voicelines', True, raising=False)
+    output_manager.tts.is_voice_loaded = lambda voice, *args: True
+    def synthesize_while_response_starts(*args, **kwargs):
+        output_manager._ChatManager__response_count += 1
+        return ("mock_audio_file.wav", False)
+    output_manager.tts.synthesize.side_effect = synthesize_while_response_starts
+
+    presynthesis_thread = output_manager.presynthesize_voicelines([example_skyrim_npc_character], ["Safe travels.", "Farewell."])
+    presynthesis_thread.join(timeout=5)
+
+    assert output_manager.tts.synthesize.call_count == 1
+
+
+def test_presynthesize_voicelines_is_skipped_without_voiceline_cache(output_manager: ChatManager, example_skyrim_npc_character: Character, monkeypatch):
+    monkeypatch.setattr(type(output_manager.tts), 'caches_voicelines', False, raising=False)
+
+    assert output_manager.presynthesize_voicelines([example_skyrim_npc_character], ["Safe travels."]) is None
+    output_manager.tts.synthesize.assert_not_called()
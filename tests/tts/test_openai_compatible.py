@@ -1,6 +1,7 @@
 import io
 import sys
 import time
+import numpy as np
 import pytest
 import requests
 import soundfile as sf
@@ -107,6 +108,29 @@ class TestTtsSynthesize:
         assert info.subtype == 'PCM_16'
         assert info.frames > 0
 
+    def test_complete_pcm16_response_is_saved_as_is(self, openai_tts: OpenAICompatibleTTS, synth_options: SynthesizationOptions, tmp_path: Path, monkeypatch):
+        wav_bytes = make_wav_bytes(subtype='PCM_16')
+        monkeypatch.setattr(requests.Session, 'post', lambda self, *args, **kwargs: FakeResponse(content=wav_bytes))
+        openai_tts.change_voice('MaleEvenToned')
+
+        output_file = str(tmp_path / 'out.wav')
+        openai_tts.tts_synthesize('Hello there.', output_file, synth_options)
+
+        assert Path(output_file).read_bytes() == wav_bytes
+
+    def test_pcm16_response_with_placeholder_length_is_reencoded(self, openai_tts: OpenAICompatibleTTS, synth_options: SynthesizationOptions, tmp_path: Path, monkeypatch):
+        wav_bytes = bytearray(make_wav_bytes(subtype='PCM_16'))
+        data_offset = wav_bytes.index(b'data') + 8
+        wav_bytes[data_offset - 4:data_offset] = (0xFFFFFFFF).to_bytes(4, 'little')
+        monkeypatch.setattr(requests.Session, 'post', lambda self, *args, **kwargs: FakeResponse(content=bytes(wav_bytes)))
+        openai_tts.change_voice('MaleEvenToned')
+
+        output_file = str(tmp_path / 'out.wav')
+        openai_tts.tts_synthesize('Hello there.', output_file, synth_options)
+
+        assert Path(output_file).read_bytes() != bytes(wav_bytes)
+        assert sf.info(output_file).subtype == 'PCM_16'
+
     def test_writes_raw_response_when_reencode_fails(self, openai_tts: OpenAICompatibleTTS, synth_options: SynthesizationOptions, tmp_path: Path, monkeypatch):
         wav_bytes = make_wav_bytes(subtype='PCM_16')
         monkeypatch.setattr(requests.Session, 'post', lambda self, *args, **kwargs: FakeResponse(content=wav_bytes))
@@ -174,6 +198,37 @@ class TestStreamedSynthesis:
             time.sleep(0.01)
         fake_sounddevice.OutputStream.assert_called_once_with(samplerate=24000, channels=1, dtype='float32')
 
+    def test_streamed_audio_is_saved_and_played_unchanged(self, streaming_tts: OpenAICompatibleTTS, first_line_options: SynthesizationOptions, tmp_path: Path, monkeypatch):
+        wav_bytes = make_wav_bytes(subtype='PCM_16')
+        expected_samples, _ = sf.read(io.BytesIO(wav_bytes), dtype='int16')
+        played_samples = []
+
+        class FakeStream:
+            def __enter__(self):
+                return self
+            def __exit__(self, *args):
+                return False
+            def write(self, samples):
+                played_samples.append(samples.copy())
+
+        fake_sd = MagicMock()
+        fake_sd.OutputStream.return_value = FakeStream()
+        monkeypatch.setitem(sys.modules, 'sounddevice', fake_sd)
+        streaming_tts._config.fast_response_mode_volume = 100
+        # An odd chunk size splits samples across chunks
+        monkeypatch.setattr(requests.Session, 'post', lambda self, *args, **kwargs: FakeStreamingResponse(split_into_chunks(wav_bytes, 333)))
+
+        output_file = str(tmp_path / 'out.wav')
+        streaming_tts.tts_synthesize('Hello there.', output_file, first_line_options)
+
+        saved_samples, _ = sf.read(output_file, dtype='int16')
+        np.testing.assert_array_equal(saved_samples, expected_samples)
+        for _ in range(100):
+            if sum(len(samples) for samples in played_samples) == len(expected_samples):
+                break
+            time.sleep(0.01)
+        np.testing.assert_allclose(np.concatenate(played_samples).ravel(), expected_samples / 32768.0)
+
     def test_header_split_across_chunks(self, streaming_tts: OpenAICompatibleTTS, first_line_options: SynthesizationOptions, fake_sounddevice: MagicMock, tmp_path: Path, monkeypatch):
         wav_bytes = make_wav_bytes(subtype='PCM_16')
         monkeypatch.setattr(requests.Session, 'post', lambda self, *args, **kwargs: FakeStreamingResponse(split_into_chunks(wav_bytes, 7)))
@@ -1,5 +1,7 @@
 import pytest
 import os
+import time
+import wave
 from unittest.mock import MagicMock, patch
 from queue import Queue
 from src.tts.piper import Piper, TTSServiceFailure
@@ -95,6 +97,72 @@ def test_synthesize_strips_newlines(tmp_path):
         assert '\r' not in payload
 
 
+def _write_wav(path: str):
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(22050)
+        wav_file.writeframes(b'\x00\x00' * 2205)
+
+
+def test_synthesize_returns_once_piper_announces_voiceline(tmp_path):
+    """tts_synthesize returns as soon as Piper prints the path of the finished voiceline, or finds the file if the line is missed"""
+    piper = _make_mock_piper()
+    synth_options = SynthesizationOptions(aggro=False, is_first_line_of_response=False)
+    output_file = str(tmp_path / 'out.wav')
+    piper.q.put(f'{output_file}\n') # left over from an earlier voiceline
+
+    def fake_piper(command: str):
+        if command.startswith('synthesize'):
+            _write_wav(output_file)
+            piper.q.put(f'{output_file}\n')
+
+    piper.process.stdin.write = fake_piper
+    with patch.object(piper, '_restart_piper') as restart_piper, \
+         patch.object(piper, '_Piper__is_voiceline_complete', wraps=piper._Piper__is_voiceline_complete) as is_voiceline_complete:
+        piper.tts_synthesize('Hello.', output_file, synth_options)
+        is_voiceline_complete.assert_not_called() # the printed path is enough, the file is not checked
+
+        # Piper's line is missed this time
+        piper.process.stdin.write = lambda command: _write_wav(output_file) if command.startswith('synthesize') else None
+        os.remove(output_file)
+        start_time = time.perf_counter()
+        piper.tts_synthesize('Goodbye.', output_file, synth_options)
+
+    assert time.perf_counter() - start_time < 1
+    assert is_voiceline_complete.call_count <= 2 # the file is only checked as a fallback, not polled
+    assert os.path.exists(output_file)
+    restart_piper.assert_not_called()
+
+
+def test_synthesize_reruns_piper_when_its_output_ends(tmp_path):
+    """Piper is run again (rather than restarted after a timeout) once its output ends, even if the exit code has not been collected yet"""
+    piper = _make_mock_piper()
+    synth_options = SynthesizationOptions(aggro=False, is_first_line_of_response=False)
+    output_file = str(tmp_path / 'out.wav')
+    synthesize_commands = []
+
+    def fake_piper(command: str):
+        if command.startswith('synthesize'):
+            synthesize_commands.append(command)
+            if len(synthesize_commands) == 1:
+                piper.q.put(None) # crashed
+            else:
+                _write_wav(output_file)
+                piper.q.put(f'{output_file}\n')
+
+    piper.process.stdin.write = fake_piper
+    with patch.object(piper, '_run_piper') as run_piper, \
+         patch.object(piper, '_restart_piper') as restart_piper, \
+         patch.object(piper, 'change_voice'), \
+         patch.object(piper, '_check_voice_changed', return_value=True):
+        piper.tts_synthesize('Hello.', output_file, synth_options)
+
+    assert len(synthesize_commands) == 2
+    run_piper.assert_called_once()
+    restart_piper.assert_not_called()
+
+
 @pytest.mark.requires_external_exe
 def test_piper_model_retrieval(piper: Piper):
     '''Test that at least the base Skyrim models are available'''
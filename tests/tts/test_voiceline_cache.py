@@ -0,0 +1,100 @@
+import os
+import pytest
+import requests
+from pathlib import Path
+from src.config.config_loader import ConfigLoader
+from src.config.definitions.game_definitions import GameEnum
+from src.tts.openai_compatible import OpenAICompatibleTTS
+from src.tts.synthesization_options import SynthesizationOptions
+from src.tts.voiceline_cache import VoicelineCache
+from tests.tts.conftest import FakeResponse, make_wav_bytes
+
+
+def write_file(path: Path, content: bytes) -> str:
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_least_recently_used_voicelines_are_evicted(tmp_path: Path):
+    cache = VoicelineCache(str(tmp_path / "cache"), max_size_bytes=250)
+    for name in ['goodbye', 'hello', 'farewell']:
+        cache.put(name, {'.wav': write_file(tmp_path / f"{name}.wav", b'0' * 100)})
+        if name == 'hello':
+            assert cache.get('goodbye') is not None # goodbye is now used more recently than hello
+
+    assert cache.get('hello') is None
+    assert cache.get('goodbye') is not None
+    assert cache.get('farewell') is not None
+    # The order of use survives a restart
+    reloaded_cache = VoicelineCache(str(tmp_path / "cache"), max_size_bytes=150)
+    assert reloaded_cache.get('goodbye') is None
+    assert reloaded_cache.get('farewell') is not None
+
+
+def test_key_depends_on_voice_and_normalised_text():
+    key = VoicelineCache.get_key('Piper', {'voice': 'femalenord'}, 'Goodbye.')
+    assert VoicelineCache.get_key('Piper', {'voice': 'femalenord'}, '  Goodbye. ') == key
+    assert VoicelineCache.get_key('Piper', {'voice': 'malenord'}, 'Goodbye.') != key
+    assert VoicelineCache.get_key('XTTS', {'voice': 'femalenord'}, 'Goodbye.') != key
+
+
+@pytest.fixture
+def cached_tts(default_config: ConfigLoader, monkeypatch) -> OpenAICompatibleTTS:
+    monkeypatch.setattr(requests.Session, 'get', lambda self, *args, **kwargs: FakeResponse())
+    default_config.lip_generation = 'enabled'
+    default_config.voiceline_cache_size = 10
+    return OpenAICompatibleTTS(default_config)
+
+
+def test_repeated_voiceline_skips_synthesis_and_lip_generation(cached_tts: OpenAICompatibleTTS, monkeypatch):
+    synthesized: list[str] = []
+    lip_files: list[str] = []
+
+    def fake_synthesize(voiceline: str, final_voiceline_file: str, synth_options: SynthesizationOptions) -> bool:
+        synthesized.append(voiceline)
+        write_file(Path(final_voiceline_file), make_wav_bytes())
+        return False
+
+    def fake_generate_voiceline_files(wav_file: str, voiceline: str, skip_lip_generation: bool = False):
+        lip_files.append(voiceline)
+        write_file(Path(wav_file.replace('.wav', '.lip')), b'lip')
+
+    monkeypatch.setattr(cached_tts, 'tts_synthesize', fake_synthesize)
+    monkeypatch.setattr(cached_tts, '_generate_voiceline_files', fake_generate_voiceline_files)
+    options = SynthesizationOptions(aggro=False, is_first_line_of_response=False)
+
+    first_file, _ = cached_tts.synthesize('FemaleNord', 'Goodbye.', 'FemaleNord', 'FemaleNord', 'en', options)
+    with open(first_file, 'rb') as f:
+        first_audio = f.read()
+    repeated_file, played_externally = cached_tts.synthesize('FemaleNord', 'Goodbye.', 'FemaleNord', 'FemaleNord', 'en', options)
+
+    assert synthesized == ['Goodbye.']
+    assert lip_files == ['Goodbye.']
+    assert not played_externally
+    with open(repeated_file, 'rb') as f:
+        assert f.read() == first_audio
+    assert os.path.exists(repeated_file.replace('.wav', '.lip'))
+
+    cached_tts.synthesize('MaleNord', 'Goodbye.', 'MaleNord', 'MaleNord', 'en', options)
+    assert synthesized == ['Goodbye.', 'Goodbye.']
+
+    # Voices of the same name in another game do not share cached voicelines
+    cached_tts._game = GameEnum.SKYRIM_VR if cached_tts._game != GameEnum.SKYRIM_VR else GameEnum.SKYRIM
+    cached_tts.synthesize('FemaleNord', 'Goodbye.', 'FemaleNord', 'FemaleNord', 'en', options)
+    assert synthesized == ['Goodbye.', 'Goodbye.', 'Goodbye.']
+
+
+def test_lip_file_is_generated_for_voiceline_cached_without_one(cached_tts: OpenAICompatibleTTS, monkeypatch):
+    synthesized: list[str] = []
+    lip_files: list[str] = []
+    monkeypatch.setattr(cached_tts, 'tts_synthesize', lambda voiceline, final_voiceline_file, synth_options: synthesized.append(voiceline) or write_file(Path(final_voiceline_file), make_wav_bytes()) and False)
+    monkeypatch.setattr(cached_tts, '_generate_voiceline_files', lambda wav_file, voiceline, skip_lip_generation=False: lip_files.append(voiceline) or write_file(Path(wav_file.replace('.wav', '.lip')), b'lip'))
+    cached_tts._lip_generation_enabled = 'lazy'
+
+    cached_tts.synthesize('FemaleNord', 'Hello there.', 'FemaleNord', 'FemaleNord', 'en', SynthesizationOptions(aggro=False, is_first_line_of_response=True))
+    assert lip_files == []
+    cached_tts.synthesize('FemaleNord', 'Hello there.', 'FemaleNord', 'FemaleNord', 'en', SynthesizationOptions(aggro=False, is_first_line_of_response=False))
+    cached_tts.synthesize('FemaleNord', 'Hello there.', 'FemaleNord', 'FemaleNord', 'en', SynthesizationOptions(aggro=False, is_first_line_of_response=False))
+
+    assert synthesized == ['Hello there.']
+    assert lip_files == ['Hello there.']
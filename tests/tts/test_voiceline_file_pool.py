@@ -0,0 +1,98 @@
+import os
+import threading
+import pytest
+import requests
+from pathlib import Path
+from src.config.config_loader import ConfigLoader
+from src.tts.openai_compatible import OpenAICompatibleTTS
+from src.tts.synthesization_options import SynthesizationOptions
+from src.tts.voiceline_file_pool import VoicelineFilePool
+from tests.tts.conftest import FakeResponse, make_wav_bytes
+
+
+def test_jobs_run_concurrently():
+    pool = VoicelineFilePool(max_workers=2)
+    both_running = threading.Barrier(2, timeout=5) # raises if the jobs are run one after the other
+
+    pool.submit('first.wav', both_running.wait)
+    pool.submit('second.wav', both_running.wait)
+
+    pool.wait('first.wav')
+    pool.wait('second.wav')
+    assert not both_running.broken
+
+
+def test_wait_returns_for_files_without_jobs_and_failed_jobs():
+    pool = VoicelineFilePool(max_workers=1)
+    pool.wait('unknown.wav')
+
+    def failing_job():
+        raise FileNotFoundError('FaceFXWrapper.exe')
+
+    pool.submit('voiceline.wav', failing_job)
+    pool.wait('voiceline.wav')
+
+
+@pytest.fixture
+def lip_synced_tts(default_config: ConfigLoader, monkeypatch) -> OpenAICompatibleTTS:
+    monkeypatch.setattr(requests.Session, 'get', lambda self, *args, **kwargs: FakeResponse())
+    default_config.lip_generation = 'enabled'
+    default_config.voiceline_cache_size = 0
+    tts = OpenAICompatibleTTS(default_config)
+    monkeypatch.setattr(tts, 'tts_synthesize', lambda voiceline, final_voiceline_file, synth_options: Path(final_voiceline_file).write_bytes(make_wav_bytes()) and False)
+    return tts
+
+
+def test_deferred_lip_file_is_generated_while_next_voiceline_is_synthesized(lip_synced_tts: OpenAICompatibleTTS, monkeypatch):
+    lip_generation_may_finish = threading.Event()
+
+    def slow_generate_voiceline_files(wav_file: str, voiceline: str, skip_lip_generation: bool = False):
+        assert lip_generation_may_finish.wait(timeout=5)
+        Path(wav_file.replace('.wav', '.lip')).write_text(voiceline)
+
+    monkeypatch.setattr(lip_synced_tts, '_generate_voiceline_files', slow_generate_voiceline_files)
+    options = SynthesizationOptions(aggro=False, is_first_line_of_response=False, defer_voiceline_files=True)
+
+    first_file, _ = lip_synced_tts.synthesize('FemaleNord', 'Well met.', 'FemaleNord', 'FemaleNord', 'en', options)
+    second_file, _ = lip_synced_tts.synthesize('FemaleNord', 'Safe travels.', 'FemaleNord', 'FemaleNord', 'en', options)
+
+    assert os.path.exists(first_file) and os.path.exists(second_file)
+    assert not os.path.exists(first_file.replace('.wav', '.lip'))
+    lip_generation_may_finish.set()
+    pool = lip_synced_tts._TTSable__voiceline_file_pool
+    pool.wait(first_file)
+    pool.wait(second_file)
+    assert Path(first_file.replace('.wav', '.lip')).read_text() == 'Well met.'
+    assert Path(second_file.replace('.wav', '.lip')).read_text() == 'Safe travels.'
+
+
+def test_lip_file_is_ready_when_synthesis_is_not_deferred(lip_synced_tts: OpenAICompatibleTTS, monkeypatch):
+    monkeypatch.setattr(lip_synced_tts, '_generate_voiceline_files', lambda wav_file, voiceline, skip_lip_generation=False: Path(wav_file.replace('.wav', '.lip')).write_text(voiceline))
+
+    voiceline_file, _ = lip_synced_tts.synthesize('FemaleNord', 'Well met.', 'FemaleNord', 'FemaleNord', 'en', SynthesizationOptions(aggro=False, is_first_line_of_response=False))
+
+    assert Path(voiceline_file.replace('.wav', '.lip')).read_text() == 'Well met.'
+
+
+def test_facefx_scripts_are_removed_after_running(lip_synced_tts: OpenAICompatibleTTS, tmp_path: Path, monkeypatch):
+    facefx_folder = tmp_path / "FaceFXWrapper"
+    facefx_folder.mkdir()
+    (facefx_folder / "FaceFXWrapper.exe").write_bytes(b'')
+    (facefx_folder / "FonixData.cdf").write_bytes(b'')
+    lip_synced_tts._facefx_path = str(facefx_folder)
+    lip_synced_tts._lipgen_path = str(tmp_path / "missing_creation_kit")
+    scripts_run: list[str] = []
+
+    def fake_run(args, *other_args, **kwargs):
+        script_path = Path(args[-1] if isinstance(args, list) else args)
+        assert script_path.exists()
+        scripts_run.append(script_path.name)
+        raise OSError("wine is not installed")
+    monkeypatch.setattr('src.tts.ttsable.subprocess.run', fake_run)
+
+    wav_file = tmp_path / "voiceline.wav"
+    wav_file.write_bytes(make_wav_bytes())
+    lip_synced_tts._generate_voiceline_files(str(wav_file), 'Well met.')
+
+    assert len(scripts_run) == 1 and scripts_run[0].startswith("run_mantella_command_")
+    assert sorted(os.listdir(facefx_folder)) == ["FaceFXWrapper.exe", "FonixData.cdf"]
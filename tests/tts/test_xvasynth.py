@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pytest
+import requests
+import soundfile as sf
+from pathlib import Path
+import src.utils as utils
+from src.config.config_loader import ConfigLoader
+from src.tts.xvasynth import xVASynth
+from src.tts.synthesization_options import SynthesizationOptions
+
+
+@pytest.fixture
+def xvasynth(default_config: ConfigLoader, monkeypatch) -> xVASynth:
+    monkeypatch.setattr(xVASynth, '_check_if_xvasynth_is_running', lambda self: None)
+    return xVASynth(default_config)
+
+
+def test_split_voiceline_is_synthesized_over_one_session_and_merged(xvasynth: xVASynth, tmp_path: Path, monkeypatch):
+    posted_urls: list[str] = []
+    phrase_audio: list[np.ndarray] = []
+
+    def fake_post(self, url, json=None, **kwargs):
+        posted_urls.append(url)
+        for line in json['linesBatch']:
+            audio = np.full(100, len(phrase_audio) + 1, dtype=np.float32) / 10
+            phrase_audio.append(audio)
+            sf.write(line[4], audio, 22050)
+
+    def unpooled_post(*args, **kwargs):
+        raise AssertionError('xVASynth requests should reuse the pooled session')
+
+    monkeypatch.setattr(requests.Session, 'post', fake_post)
+    monkeypatch.setattr(requests, 'post', unpooled_post)
+    long_voiceline = 'I have travelled from the mountains of the east to the marshes of the south, ' * 2 + 'and I have seen things that you would not believe.'
+    final_voiceline_file = str(tmp_path / 'out.wav')
+
+    xvasynth._synthesize_voiceline(long_voiceline, final_voiceline_file, SynthesizationOptions(aggro=False, is_first_line_of_response=False))
+
+    assert posted_urls == ['http://127.0.0.1:8008/synthesize_batch']
+    assert len(phrase_audio) > 1
+    merged_audio, _ = sf.read(final_voiceline_file, dtype='float32')
+    np.testing.assert_allclose(merged_audio, np.concatenate(phrase_audio), atol=1e-4)
+    # Only the merged voiceline is left behind
+    assert all(not os.path.exists(f"{xvasynth._voiceline_folder}/{utils.clean_text(phrase)[:150]}.wav") for phrase in xvasynth._split_voiceline(long_voiceline))